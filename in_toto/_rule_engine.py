@@ -0,0 +1,248 @@
+# Copyright New York University and the in-toto contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Artifact rule pattern evaluation.
+
+Artifact rules filter the not yet consumed artifacts of an item with
+``fnmatch``-style patterns. Instead of matching each pattern against each
+queued artifact path, patterns are compiled once, and common patterns, i.e.
+literal paths and patterns with a single ``*`` wildcard (e.g. ``*``,
+``src/*``, ``*.py`` or ``src/*.py``), are evaluated as lookups in a sorted
+index of the artifact queue. All other patterns are translated to regular
+expressions. The paths filtered by MATCH rules with a source prefix are also
+selected from the sorted index.
+
+The results are the same as those of ``fnmatch.filter``.
+"""
+
+import bisect
+import fnmatch
+import functools
+import os
+import posixpath
+import re
+import sys
+
+# Max number of compiled patterns to cache
+_PATTERN_CACHE_SIZE = 1024
+
+# ``fnmatch`` normalizes case (and path separators) of patterns and paths, if
+# ``os.path`` is not ``posixpath``, e.g. on Windows.
+_NORMCASE = os.path is not posixpath
+
+
+class Pattern:
+    """Compiled artifact rule pattern.
+
+    Attributes:
+      pattern: The fnmatch-style pattern.
+      literal: The path matched by the pattern, if it has no wildcards.
+      prefix, suffix: The strings before and after the only ``*`` wildcard in
+          the pattern, if it has no other wildcards.
+
+    """
+
+    __slots__ = ["pattern", "literal", "prefix", "suffix", "_regex"]
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.literal = None
+        self.prefix = None
+        self.suffix = None
+        self._regex = None
+
+        # Consecutive "*" match the same as a single "*"
+        collapsed = re.sub(r"\*+", "*", pattern)
+
+        if _NORMCASE or "?" in collapsed or "[" in collapsed:
+            self._regex = re.compile(
+                fnmatch.translate(os.path.normcase(pattern))
+            )
+
+        elif "*" not in collapsed:
+            self.literal = pattern
+
+        elif collapsed.count("*") == 1:
+            self.prefix, self.suffix = collapsed.split("*")
+
+        else:
+            self._regex = re.compile(fnmatch.translate(pattern))
+
+    def matches(self, path):
+        """Return True, if the pattern matches the path."""
+        if self.literal is not None:
+            return path == self.literal
+
+        if self._regex is None:
+            return (
+                len(path) >= len(self.prefix) + len(self.suffix)
+                and path.startswith(self.prefix)
+                and path.endswith(self.suffix)
+            )
+
+        if _NORMCASE:
+            path = os.path.normcase(path)
+
+        return self._regex.match(path) is not None
+
+    def filter(self, paths):
+        """Return list of paths matched by the pattern."""
+        return [path for path in paths if self.matches(path)]
+
+
+@functools.lru_cache(maxsize=_PATTERN_CACHE_SIZE)
+def compile_pattern(pattern):
+    """Return compiled Pattern for fnmatch-style pattern."""
+    return Pattern(pattern)
+
+
+def _prefix_range(sorted_paths, prefix):
+    """Helper to return paths that start with prefix from sorted paths."""
+    start = bisect.bisect_left(sorted_paths, prefix)
+    if not prefix:
+        return sorted_paths[start:]
+
+    # All paths that start with prefix sort before the prefix with an
+    # incremented last character, except for the max code point
+    if prefix[-1] == chr(sys.maxunicode):
+        end = start
+        while end < len(sorted_paths) and sorted_paths[end].startswith(prefix):
+            end += 1
+
+    else:
+        end = bisect.bisect_left(
+            sorted_paths, prefix[:-1] + chr(ord(prefix[-1]) + 1), start
+        )
+
+    return sorted_paths[start:end]
+
+
+class ArtifactQueue(set):
+    """Set of not yet consumed artifact paths, indexed for rule patterns.
+
+    The sorted index is created on first use, and is only re-created after
+    paths are added, or once most indexed paths were consumed. Consumed paths
+    that are still indexed are skipped on lookup.
+
+    """
+
+    def __init__(self, paths=()):
+        super().__init__(paths)
+        self._indexed_len = 0
+        self._sorted_paths = None
+        self._sorted_reversed_paths = None
+
+    def __repr__(self):
+        return repr(set(self))
+
+    def _clear_index(self):
+        self._sorted_paths = None
+        self._sorted_reversed_paths = None
+
+    def _get_index(self, reverse=False):
+        """Helper to return (and create) sorted (reversed) paths index."""
+        if len(self) * 2 < self._indexed_len:
+            self._clear_index()
+
+        if self._sorted_paths is None and self._sorted_reversed_paths is None:
+            self._indexed_len = len(self)
+
+        if reverse:
+            if self._sorted_reversed_paths is None:
+                self._sorted_reversed_paths = sorted(
+                    path[::-1] for path in self
+                )
+            return self._sorted_reversed_paths
+
+        if self._sorted_paths is None:
+            self._sorted_paths = sorted(self)
+
+        return self._sorted_paths
+
+    def filter(self, pattern, prefix=""):
+        """Return sorted list of queued paths, which start with prefix, and
+        whose remainder is matched by fnmatch pattern."""
+        compiled = compile_pattern(pattern)
+
+        if compiled.literal is not None:
+            path = prefix + compiled.literal
+            return [path] if path in self else []
+
+        if compiled.prefix is None:
+            return [
+                path
+                for path in _prefix_range(self._get_index(), prefix)
+                if path in self and compiled.matches(path[len(prefix) :])
+            ]
+
+        if prefix or compiled.prefix or not compiled.suffix:
+            candidates = _prefix_range(
+                self._get_index(), prefix + compiled.prefix
+            )
+            if not compiled.suffix:
+                return [path for path in candidates if path in self]
+
+            min_len = len(prefix) + len(compiled.prefix) + len(compiled.suffix)
+            return [
+                path
+                for path in candidates
+                if path in self
+                and len(path) >= min_len
+                and path.endswith(compiled.suffix)
+            ]
+
+        # Pattern "*<suffix>" without prefix
+        return sorted(
+            path
+            for path in (
+                reversed_path[::-1]
+                for reversed_path in _prefix_range(
+                    self._get_index(reverse=True), compiled.suffix[::-1]
+                )
+            )
+            if path in self
+        )
+
+    # Invalidate index when adding paths
+    def add(self, element):
+        super().add(element)
+        self._clear_index()
+
+    def update(self, *others):
+        super().update(*others)
+        self._clear_index()
+
+    def symmetric_difference_update(self, other):
+        super().symmetric_difference_update(other)
+        self._clear_index()
+
+    def __ior__(self, other):
+        result = super().__ior__(other)
+        self._clear_index()
+        return result
+
+    def __ixor__(self, other):
+        result = super().__ixor__(other)
+        self._clear_index()
+        return result
+
+
+def filter_artifacts(artifacts, pattern, prefix=""):
+    """Return list of artifact paths, which start with prefix, and whose
+    remainder is matched by fnmatch pattern.
+
+    Same as ``fnmatch.filter`` on the paths with the prefix removed, but
+    returns the full paths, and uses the index of an ``ArtifactQueue``.
+    """
+    if isinstance(artifacts, ArtifactQueue):
+        return artifacts.filter(pattern, prefix)
+
+    compiled = compile_pattern(pattern)
+    if not prefix:
+        return compiled.filter(artifacts)
+
+    return [
+        path
+        for path in artifacts
+        if path.startswith(prefix) and compiled.matches(path[len(prefix) :])
+    ]
@@ -28,6 +28,7 @@
   ```
 
 """
+import argparse
 import sys
 
 from in_toto import (
@@ -36,7 +37,27 @@ from in_toto import (
     KEY_TYPE_RSA,
     SUPPORTED_KEY_TYPES,
 )
-from in_toto.settings import LINK_CMD_EXEC_TIMEOUT
+from in_toto.settings import (
+    ARTIFACT_HASH_ALGORITHMS,
+    ARTIFACT_HASH_WORKERS,
+    LINK_CMD_EXEC_TIMEOUT,
+)
+
+
+def positive_int(value):
+    """Argparse type for positive integer arguments."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            f"invalid positive integer value: '{value}'"
+        )
+
+    return number
+
 
 EXCLUDE_ARGS = ["--exclude"]
 EXCLUDE_KWARGS = {
@@ -80,6 +101,47 @@ LSTRIP_PATHS_KWARGS = {
     ),
 }
 
+HASH_WORKERS_ARGS = ["--hash-workers"]
+HASH_WORKERS_KWARGS = {
+    "dest": "hash_workers",
+    "type": positive_int,
+    "required": False,
+    "metavar": "<number>",
+    "help": (
+        "number of workers used to hash 'materials' and 'products'"
+        " concurrently. Use this to speed up recording large numbers of"
+        " artifacts. Default is '{workers}', i.e. artifacts are hashed"
+        " serially.".format(workers=ARTIFACT_HASH_WORKERS)
+    ),
+}
+
+HASH_CACHE_DIR_ARGS = ["--hash-cache-dir"]
+HASH_CACHE_DIR_KWARGS = {
+    "dest": "hash_cache_dir",
+    "required": False,
+    "metavar": "<path>",
+    "help": (
+        "path to a directory for a persistent cache of artifact hashes."
+        " 'materials' and 'products', whose device, inode, size, modification"
+        " and change time are in the cache, are not read again. Default is"
+        " to not use a cache."
+    ),
+}
+
+HASH_ALGORITHMS_ARGS = ["--hash-algorithms"]
+HASH_ALGORITHMS_KWARGS = {
+    "dest": "hash_algorithms",
+    "required": False,
+    "metavar": "<algorithm>",
+    "nargs": "+",
+    "help": (
+        "hash algorithms used to hash 'materials' and 'products', e.g."
+        " 'sha256 sha512'. All algorithms are computed in a single pass over"
+        " each artifact and recorded in the link. Default is"
+        " '{algorithms}'.".format(algorithms=" ".join(ARTIFACT_HASH_ALGORITHMS))
+    ),
+}
+
 KEY_ARGS = ["-k", "--key"]
 KEY_KWARGS = {
     "type": str,
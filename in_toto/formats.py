@@ -25,6 +25,7 @@ from re import fullmatch
 from securesystemslib.exceptions import FormatError
 from securesystemslib.signer import Key, Signature
 
+from in_toto.models._keys import get_cached_key
 from in_toto.models._signer import GPGKey, GPGSignature
 
 
@@ -111,6 +112,10 @@ def _check_signature(arg):
 def _check_public_key(arg):
     """Check public key dict."""
     _check_dict(arg)
+    # Keys that can be parsed and cached for verification are valid
+    if get_cached_key(arg) is not None:
+        return
+
     # NOTE: `GPGKey` and `Key` serialization formats are incompatible
     try:
         GPGKey.from_dict(arg["keyid"], arg)
@@ -46,6 +46,12 @@ from in_toto.common_args import (
     GPG_HOME_ARGS,
     GPG_HOME_KWARGS,
     GPG_KWARGS,
+    HASH_ALGORITHMS_ARGS,
+    HASH_ALGORITHMS_KWARGS,
+    HASH_CACHE_DIR_ARGS,
+    HASH_CACHE_DIR_KWARGS,
+    HASH_WORKERS_ARGS,
+    HASH_WORKERS_KWARGS,
     KEY_ARGS,
     KEY_KWARGS,
     KEY_PASSWORD_ARGS,
@@ -150,6 +156,9 @@ file to the target directory (on stop).
     parent_parser.add_argument(*EXCLUDE_ARGS, **EXCLUDE_KWARGS)
     parent_parser.add_argument(*BASE_PATH_ARGS, **BASE_PATH_KWARGS)
     parent_parser.add_argument(*LSTRIP_PATHS_ARGS, **LSTRIP_PATHS_KWARGS)
+    parent_parser.add_argument(*HASH_WORKERS_ARGS, **HASH_WORKERS_KWARGS)
+    parent_parser.add_argument(*HASH_CACHE_DIR_ARGS, **HASH_CACHE_DIR_KWARGS)
+    parent_parser.add_argument(*HASH_ALGORITHMS_ARGS, **HASH_ALGORITHMS_KWARGS)
     parent_parser.add_argument(*DSSE_ARGS, **DSSE_KWARGS)
 
     verbosity_args = parent_parser.add_mutually_exclusive_group(required=False)
@@ -295,6 +304,9 @@ def main():
                 exclude_patterns=args.exclude_patterns,
                 base_path=args.base_path,
                 lstrip_paths=args.lstrip_paths,
+                hash_workers=args.hash_workers,
+                hash_cache_dir=args.hash_cache_dir,
+                hash_algorithms=args.hash_algorithms,
                 use_dsse=args.use_dsse,
                 signer=signer,
             )
@@ -311,6 +323,9 @@ def main():
                 exclude_patterns=args.exclude_patterns,
                 base_path=args.base_path,
                 lstrip_paths=args.lstrip_paths,
+                hash_workers=args.hash_workers,
+                hash_cache_dir=args.hash_cache_dir,
+                hash_algorithms=args.hash_algorithms,
                 metadata_directory=args.metadata_directory,
                 signer=signer,
             )
@@ -45,6 +45,12 @@ from in_toto.common_args import (
     GPG_HOME_ARGS,
     GPG_HOME_KWARGS,
     GPG_KWARGS,
+    HASH_ALGORITHMS_ARGS,
+    HASH_ALGORITHMS_KWARGS,
+    HASH_CACHE_DIR_ARGS,
+    HASH_CACHE_DIR_KWARGS,
+    HASH_WORKERS_ARGS,
+    HASH_WORKERS_KWARGS,
     KEY_ARGS,
     KEY_KWARGS,
     KEY_PASSWORD_ARGS,
@@ -65,10 +71,12 @@ from in_toto.common_args import (
     VERBOSE_ARGS,
     VERBOSE_KWARGS,
     parse_password_and_prompt_args,
+    positive_int,
     sort_action_groups,
     title_case_action_groups,
 )
 from in_toto.models._signer import load_crypto_signer_from_pkcs8_file
+from in_toto.settings import BYPRODUCT_CAPTURE, BYPRODUCT_CAPTURE_SIZE
 
 # Command line interfaces should use in_toto base logger (c.f. in_toto.log)
 LOG = logging.getLogger("in_toto")
@@ -198,6 +206,31 @@ e.g. 'document.pdf'.
         ),
     )
 
+    parser.add_argument(
+        "--byproduct-capture",
+        dest="byproduct_capture",
+        choices=runlib.BYPRODUCT_CAPTURE_POLICIES,
+        help=(
+            "policy to store recorded streams in the resulting link metadata:"
+            " completely ('full'), only head and tail ('truncate'), only length"
+            " and digest ('digest'), or in sidecar files in the metadata"
+            " directory, referenced by digest ('spill')."
+            " Default is '{}'.".format(BYPRODUCT_CAPTURE)
+        ),
+    )
+
+    parser.add_argument(
+        "--byproduct-capture-size",
+        dest="byproduct_capture_size",
+        type=positive_int,
+        metavar="<bytes>",
+        help=(
+            "number of bytes kept of the head and of the tail of each recorded"
+            " stream with '--byproduct-capture truncate'."
+            " Default is {}.".format(BYPRODUCT_CAPTURE_SIZE)
+        ),
+    )
+
     parser.add_argument(
         "-x",
         "--no-command",
@@ -222,6 +255,9 @@ e.g. 'document.pdf'.
     parser.add_argument(*EXCLUDE_ARGS, **EXCLUDE_KWARGS)
     parser.add_argument(*BASE_PATH_ARGS, **BASE_PATH_KWARGS)
     parser.add_argument(*LSTRIP_PATHS_ARGS, **LSTRIP_PATHS_KWARGS)
+    parser.add_argument(*HASH_WORKERS_ARGS, **HASH_WORKERS_KWARGS)
+    parser.add_argument(*HASH_CACHE_DIR_ARGS, **HASH_CACHE_DIR_KWARGS)
+    parser.add_argument(*HASH_ALGORITHMS_ARGS, **HASH_ALGORITHMS_KWARGS)
     parser.add_argument(*METADATA_DIRECTORY_ARGS, **METADATA_DIRECTORY_KWARGS)
     parser.add_argument(*DSSE_ARGS, **DSSE_KWARGS)
     parser.add_argument(*RUN_TIMEOUT_ARGS, **RUN_TIMEOUT_KWARGS)
@@ -326,6 +362,8 @@ def main():
             args.products,
             args.link_cmd,
             record_streams=args.record_streams,
+            byproduct_capture=args.byproduct_capture,
+            byproduct_capture_size=args.byproduct_capture_size,
             signing_key=key,
             gpg_keyid=gpg_keyid,
             gpg_use_default=gpg_use_default,
@@ -333,6 +371,9 @@ def main():
             exclude_patterns=args.exclude_patterns,
             base_path=args.base_path,
             lstrip_paths=args.lstrip_paths,
+            hash_workers=args.hash_workers,
+            hash_cache_dir=args.hash_cache_dir,
+            hash_algorithms=args.hash_algorithms,
             metadata_directory=args.metadata_directory,
             use_dsse=args.use_dsse,
             timeout=args.run_timeout,
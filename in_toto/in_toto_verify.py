@@ -48,12 +48,13 @@ from in_toto.common_args import (
     QUIET_KWARGS,
     VERBOSE_ARGS,
     VERBOSE_KWARGS,
+    positive_int,
     sort_action_groups,
     title_case_action_groups,
 )
 from in_toto.models._signer import load_public_key_from_file
 from in_toto.models.metadata import Metadata
-from in_toto.settings import LINK_CMD_EXEC_TIMEOUT
+from in_toto.settings import INSPECTION_WORKERS, LINK_CMD_EXEC_TIMEOUT
 
 # Command line interfaces should use in_toto base logger (c.f. in_toto.log)
 LOG = logging.getLogger("in_toto")
@@ -83,7 +84,8 @@ The verification includes the following checks:
     link files, adhere to the artifact rules specified by the step.
 
 Additionally, inspection commands defined in the layout are executed
-sequentially, followed by processing the inspections' artifact rules.
+sequentially, or concurrently with '--inspection-workers', followed by
+processing the inspections' artifact rules.
 
 If the layout includes sublayouts, the verification routine will recurse into a
 subdirectory named '<step name>.<keyid prefix>', where all the links relevant
@@ -232,6 +234,19 @@ for which the public part can be found in the GPG keyring at '~/.gnupg'.
         ),
     )
 
+    parser.add_argument(
+        "--inspection-workers",
+        dest="inspection_workers",
+        type=positive_int,
+        metavar="<number>",
+        help=(
+            "number of inspection commands run concurrently. Inspections,"
+            " which match artifacts from each other, always run in layout"
+            " order. Default is '{workers}', i.e. inspections run in layout"
+            " order.".format(workers=INSPECTION_WORKERS)
+        ),
+    )
+
     verbosity_args = parser.add_mutually_exclusive_group(required=False)
     verbosity_args.add_argument(*VERBOSE_ARGS, **VERBOSE_KWARGS)
     verbosity_args.add_argument(*QUIET_ARGS, **QUIET_KWARGS)
@@ -298,6 +313,7 @@ def main():
             layout_key_dict,
             args.link_dir,
             inspect_timeout=args.inspect_timeout,
+            inspection_workers=args.inspection_workers,
         )
 
     except Exception as e:  # pylint: disable=broad-exception-caught
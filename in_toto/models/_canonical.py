@@ -0,0 +1,139 @@
+# Copyright New York University and the in-toto contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Canonical JSON encoding of in-toto metadata.
+
+``encode_canonical`` returns the same bytes as
+``securesystemslib.formats.encode_canonical(attr.asdict(obj))``, but encodes
+attrs instances without copying them to dicts first, and takes a fast path
+for artifact dicts, i.e. ``{path: {algorithm: hexdigest}}``, which make up
+most of a large link.
+"""
+
+import attr
+import securesystemslib.formats
+
+
+class _UnsupportedValue(Exception):
+    """Value is not handled by the fast encoder."""
+
+
+def _encode_str(string):
+    """Helper to encode string, escaping only quotes and backslashes."""
+    return '"' + string.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _encode_hashes(hashes):
+    """Helper to encode hash dict of an artifact. Returns None, if dict is not
+    a hash dict."""
+    # Most artifacts have one hash
+    if len(hashes) == 1:
+        ((algorithm, digest),) = hashes.items()
+        if not isinstance(algorithm, str) or not isinstance(digest, str):
+            return None
+
+        return f"{{{_encode_str(algorithm)}:{_encode_str(digest)}}}"
+
+    parts = []
+    for algorithm, digest in sorted(hashes.items()):
+        if not isinstance(algorithm, str) or not isinstance(digest, str):
+            return None
+
+        parts.append(f"{_encode_str(algorithm)}:{_encode_str(digest)}")
+
+    return "{" + ",".join(parts) + "}"
+
+
+def _encode_artifacts(artifacts):
+    """Helper to encode an artifact dict as one string. Returns None, if dict
+    is not an artifact dict."""
+    parts = []
+    for path, hashes in sorted(artifacts.items()):
+        if not isinstance(path, str) or not isinstance(hashes, dict):
+            return None
+
+        encoded_hashes = _encode_hashes(hashes)
+        if encoded_hashes is None:
+            return None
+
+        parts.append(f"{_encode_str(path)}:{encoded_hashes}")
+
+    return "{" + ",".join(parts) + "}"
+
+
+def _encode(value, output):
+    """Helper to append canonical JSON fragments of value to output list."""
+    # pylint: disable=too-many-branches
+    if isinstance(value, str):
+        output.append(_encode_str(value))
+
+    elif value is True:
+        output.append("true")
+
+    elif value is False:
+        output.append("false")
+
+    elif value is None:
+        output.append("null")
+
+    elif isinstance(value, int):
+        output.append(str(value))
+
+    elif isinstance(value, (tuple, list)):
+        output.append("[")
+        for idx, item in enumerate(value):
+            if idx:
+                output.append(",")
+            _encode(item, output)
+        output.append("]")
+
+    elif isinstance(value, dict):
+        # Artifact dicts are only detected by trying to encode them, which
+        # usually fails on the first item of other dicts.
+        encoded = _encode_artifacts(value) if value else "{}"
+        if encoded is not None:
+            output.append(encoded)
+            return
+
+        output.append("{")
+        for idx, (key, item) in enumerate(sorted(value.items())):
+            if not isinstance(key, str):
+                raise _UnsupportedValue
+            if idx:
+                output.append(",")
+            output.append(_encode_str(key) + ":")
+            _encode(item, output)
+        output.append("}")
+
+    elif attr.has(type(value)):
+        _encode(
+            {
+                field.name: getattr(value, field.name)
+                for field in attr.fields(type(value))
+            },
+            output,
+        )
+
+    else:
+        raise _UnsupportedValue
+
+
+def encode_canonical(obj):
+    """Returns UTF-8 encoded canonical JSON bytes of attrs instance.
+
+    Raises:
+      securesystemslib.exceptions.FormatError: obj cannot be encoded.
+
+    """
+    output = []
+    try:
+        _encode(obj, output)
+
+    # Let securesystemslib handle and report other values, e.g. floats, or
+    # non-str dict keys, which may also fail sorting.
+    except (_UnsupportedValue, TypeError):
+        return securesystemslib.formats.encode_canonical(
+            attr.asdict(obj)
+        ).encode("UTF-8")
+
+    return "".join(output).encode("UTF-8")
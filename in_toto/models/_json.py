@@ -0,0 +1,141 @@
+# Copyright New York University and the in-toto contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Metadata JSON (de-)serialization with a configurable backend.
+
+The standard library ``json`` module is always available. The optional
+``orjson`` library is faster, but only used where it produces the same bytes
+as ``json``, so that written metadata does not depend on installed libraries.
+Otherwise ``json`` is used as fallback (see ``in_toto.settings.JSON_BACKEND``).
+"""
+
+import json
+import re
+
+import in_toto.settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+JSON_BACKENDS = ["json", "orjson"]
+
+# Output of orjson that may differ from json output: ``json`` escapes DEL and
+# non-ASCII characters (``ensure_ascii``), and formats floats differently.
+# NOTE: The float pattern may also match in strings, which only means that
+# json is used needlessly.
+_ORJSON_MISMATCH = re.compile(rb"[\x7f-\xff]|[\[:,]\s*-?\d+[.eE]")
+
+# Input that orjson may load differently than json: orjson loads integers that
+# exceed 64 bits as floats. Match any integer with at least 19 digits, which
+# includes all integers that do not fit into int64 or uint64.
+# NOTE: The pattern may also match in strings, which only means that json is
+# used needlessly.
+_ORJSON_LOADS_MISMATCH = re.compile(rb"(?:^|[\[:,])\s*-?\d{19}")
+
+
+def _get_backend():
+    """Helper to return configured backend, or orjson, if installed."""
+    backend = in_toto.settings.JSON_BACKEND
+    if backend is None:
+        return "orjson" if orjson else "json"
+
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"'JSON_BACKEND' must be one of {JSON_BACKENDS}")
+
+    if backend == "orjson" and not orjson:
+        raise ValueError("'JSON_BACKEND' is 'orjson', but it is not installed")
+
+    return backend
+
+
+def _indent_depth(data):
+    """Helper to return max indentation depth of orjson OPT_INDENT_2 output."""
+    depth = 0
+    while b"\n" + b"  " * (depth + 1) in data:
+        depth += 1
+
+    return depth
+
+
+def _orjson_dumps(obj, indent):
+    """Helper to dump obj with orjson, formatted like json with sorted keys and
+    compact separators, or with an indent of 1. Returns None, if output may
+    differ from json output."""
+    option = orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+
+    try:
+        data = orjson.dumps(obj, option=option)
+
+    # e.g. non-str keys or integers that exceed 64 bits
+    except orjson.JSONEncodeError:
+        return None
+
+    if _ORJSON_MISMATCH.search(data):
+        return None
+
+    if indent:
+        # Strings cannot contain raw newlines, i.e. each newline is followed by
+        # indentation. Halve it, from the deepest level up, marking replaced
+        # newlines with NUL, which orjson output cannot contain either.
+        for depth in range(_indent_depth(data), 0, -1):
+            data = data.replace(b"\n" + b"  " * depth, b"\n\x00" + b" " * depth)
+        data = data.replace(b"\n\x00", b"\n")
+
+    return data
+
+
+def loads(data):
+    """Returns object deserialized from JSON bytes.
+
+    Raises:
+      json.JSONDecodeError: Invalid JSON.
+      UnicodeDecodeError: Invalid UTF-8.
+
+    """
+    if _get_backend() == "orjson" and not _ORJSON_LOADS_MISMATCH.search(data):
+        try:
+            return orjson.loads(data)
+
+        # Parse again with json, to raise the same errors, and accept the same
+        # inputs.
+        except orjson.JSONDecodeError:
+            pass
+
+    return json.loads(data.decode("utf-8"))
+
+
+def dumps(obj, indent=None, compact=False):
+    """Returns JSON bytes of obj with sorted keys.
+
+    Arguments:
+      obj: A JSON-serializable object.
+      indent (optional): None, or 1 to indent nested items by one space.
+      compact (optional): Use "," and ":" as separators instead of ", " and
+          ": ". Only used, if indent is None.
+
+    Returns:
+      The same bytes as ``json.dumps(obj, sort_keys=True, ...).encode()``,
+      regardless of the backend.
+
+    """
+    if indent not in (None, 1):
+        raise ValueError("'indent' must be None or 1")
+
+    separators = None
+    if compact and indent is None:
+        separators = (",", ":")
+
+    # orjson has no separators option, and cannot be used for the default
+    # separators without indent.
+    if _get_backend() == "orjson" and (indent or compact):
+        data = _orjson_dumps(obj, indent)
+        if data is not None:
+            return data
+
+    return json.dumps(
+        obj, indent=indent, separators=separators, sort_keys=True
+    ).encode("utf-8")
@@ -0,0 +1,76 @@
+# Copyright New York University and the in-toto contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Cache of parsed verification keys.
+
+Verifying many links with the keys of a layout would otherwise parse the same
+key dicts into ``Key`` objects for each signature. Keys are cached by the
+values that are used for verification, i.e. keyid, keytype, scheme and public
+key value, so that different key dicts with the same keyid do not share a
+cache entry.
+"""
+
+import functools
+from copy import deepcopy
+
+from securesystemslib.signer import Key
+
+# Max number of parsed keys to cache
+_KEY_CACHE_SIZE = 1024
+
+
+def _get_key_fields(key_dict):
+    """Helper to return hashable fields of key dict used for verification, or
+    None, if the key dict has no str public key value (e.g. GPG keys)."""
+    try:
+        fields = (
+            key_dict["keyid"],
+            key_dict["keytype"],
+            key_dict["scheme"],
+            key_dict["keyval"]["public"],
+        )
+
+    except (KeyError, TypeError):
+        return None
+
+    if not all(isinstance(field, str) for field in fields):
+        return None
+
+    return fields
+
+
+@functools.lru_cache(maxsize=_KEY_CACHE_SIZE)
+def _load_key(keyid, keytype, scheme, public):
+    """Helper to parse and cache key from fields."""
+    return Key.from_dict(
+        keyid,
+        {"keytype": keytype, "scheme": scheme, "keyval": {"public": public}},
+    )
+
+
+def get_cached_key(key_dict):
+    """Returns cached Key for key dict, or None, if it cannot be cached or is
+    invalid."""
+    fields = _get_key_fields(key_dict)
+    if fields is None:
+        return None
+
+    try:
+        return _load_key(*fields)
+
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def get_key(key_dict):
+    """Returns Key for key dict, from cache if possible.
+
+    Raises:
+      Errors of ``securesystemslib.signer.Key.from_dict``.
+
+    """
+    key = get_cached_key(key_dict)
+    if key is None:
+        key = Key.from_dict(key_dict["keyid"], deepcopy(key_dict))
+
+    return key
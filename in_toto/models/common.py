@@ -20,11 +20,14 @@
 
 """
 
+import hashlib
 import inspect
 import json
+import marshal
 
 import attr
-import securesystemslib.formats
+
+from in_toto.models._canonical import encode_canonical
 
 
 class ValidationMixin:
@@ -55,10 +58,40 @@ class Signable(ValidationMixin):
             attr.asdict(self), indent=1, separators=(",", ": "), sort_keys=True
         )
 
+    def _state_digest(self):
+        """Returns a digest of the attribute values of the instance, including
+        nested values, or None if they cannot be serialized."""
+        try:
+            state = marshal.dumps(attr.astuple(self, recurse=False))
+        except ValueError:
+            # Nested attrs instances, e.g. layout steps, are converted to
+            # tuples, which is slower
+            try:
+                state = marshal.dumps(attr.astuple(self))
+            except ValueError:
+                return None
+
+        return hashlib.sha256(state).digest()
+
     @property
     def signable_bytes(self):
         """The UTF-8 encoded canonical JSON byte representation of the dictionary
-        representation of the instance."""
-        return securesystemslib.formats.encode_canonical(
-            attr.asdict(self)
-        ).encode("UTF-8")
+        representation of the instance.
+
+        The bytes are cached until any attribute value, including nested values,
+        is changed. Changes are detected by comparing a digest of the serialized
+        attribute values, which is much faster than canonical JSON encoding.
+
+        """
+        digest = self._state_digest()
+        cached = getattr(self, "_signable_bytes_cache", None)
+        if digest is not None and cached is not None and cached[0] == digest:
+            return cached[1]
+
+        signable_bytes = encode_canonical(self)
+
+        if digest is not None:
+            # pylint: disable=attribute-defined-outside-init
+            self._signable_bytes_cache = (digest, signable_bytes)
+
+        return signable_bytes
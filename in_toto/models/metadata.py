@@ -22,8 +22,6 @@
 
 """
 
-import json
-from copy import deepcopy
 from typing import Union
 
 import attr
@@ -35,7 +33,7 @@ from securesystemslib.exceptions import (
     UnverifiedSignatureError,
     VerificationError,
 )
-from securesystemslib.signer import Key, Signature, Signer
+from securesystemslib.signer import Signature, Signer
 
 from in_toto.exceptions import InvalidMetadata, SignatureVerificationError
 from in_toto.formats import (
@@ -43,6 +41,8 @@ from in_toto.formats import (
     _check_signature,
     _check_signing_key,
 )
+from in_toto.models import _json
+from in_toto.models._keys import get_key
 from in_toto.models._signer import GPGSigner
 from in_toto.models.common import Signable, ValidationMixin
 from in_toto.models.layout import Layout
@@ -87,8 +87,8 @@ class Metadata:
           A Metadata containing a Link or Layout object.
 
         """
-        with open(path, "r", encoding="utf8") as fp:
-            data = json.load(fp)
+        with open(path, "rb") as fp:
+            data = _json.loads(fp.read())
 
         return cls.from_dict(data)
 
@@ -102,10 +102,7 @@ class Metadata:
           IOError: File cannot be written.
 
         """
-        json_bytes = json.dumps(
-            self.to_dict(),
-            sort_keys=True,
-        ).encode("utf-8")
+        json_bytes = _json.dumps(self.to_dict())
 
         with open(path, "wb") as fp:
             fp.write(json_bytes)
@@ -152,10 +149,7 @@ class Envelope(SSlibEnvelope, Metadata):
     def from_signable(cls, signable: Signable) -> "Envelope":
         """Creates DSSE envelope with signable bytes as payload."""
 
-        json_bytes = json.dumps(
-            attr.asdict(signable),
-            sort_keys=True,
-        ).encode("utf-8")
+        json_bytes = _json.dumps(attr.asdict(signable))
 
         return cls(
             payload=json_bytes,
@@ -170,12 +164,9 @@ class Envelope(SSlibEnvelope, Metadata):
         return super().sign(signer)
 
     def verify_signature(self, verification_key):
-        # Deepcopy to preserve `verification_key`, which might still be needed
-        # in calling context and would otherwise be destroyed in `from_dict`.
+        # Parse key, or get it from cache, which preserves `verification_key`.
         # NOTE: It would be nice to support `Key` natively in in-toto model.
-        key = Key.from_dict(
-            verification_key["keyid"], deepcopy(verification_key)
-        )
+        key = get_key(verification_key)
 
         try:
             super().verify(keys=[key], threshold=1)
@@ -192,7 +183,7 @@ class Envelope(SSlibEnvelope, Metadata):
             Link or Layout.
         """
 
-        data = json.loads(self.payload.decode("utf-8"))
+        data = _json.loads(self.payload)
         _type = data.get("_type")
         if _type == "link":
             return Link.read(data)
@@ -231,14 +222,14 @@ class Metablock(Metadata, ValidationMixin):
 
     def __repr__(self):
         """Returns the JSON string representation."""
+        return self._to_json_bytes().decode("utf-8")
+
+    def _to_json_bytes(self):
+        """Returns the UTF-8 encoded JSON string representation."""
         indent = None if self.compact_json else 1
-        separators = (",", ":") if self.compact_json else (",", ": ")
 
-        return json.dumps(
-            {"signatures": self.signatures, "signed": attr.asdict(self.signed)},
-            indent=indent,
-            separators=separators,
-            sort_keys=True,
+        return _json.dumps(
+            self.to_dict(), indent=indent, compact=self.compact_json
         )
 
     def dump(self, path):
@@ -252,7 +243,7 @@ class Metablock(Metadata, ValidationMixin):
 
         """
         with open(path, "wb") as fp:
-            fp.write("{}".format(self).encode("utf-8"))
+            fp.write(self._to_json_bytes())
 
     @classmethod
     def from_dict(cls, data):
@@ -415,14 +406,16 @@ class Metablock(Metadata, ValidationMixin):
         else:
             # Parse key and (below) signature dicts as `Key` and `Signature`
             # instances to use modern securesystemslib verification code.
-            # Deepcopy to preserve original dicts, which are otherwise destroyed
-            # in `from_dict` methods.
+            # Keys are cached, and the signature dict is copied, to preserve
+            # original dicts, which are otherwise destroyed in `from_dict`
+            # methods. A shallow copy suffices, because only top-level fields
+            # are removed.
             # NOTE: It would be nice to support `Key` and `Signature` natively
             # in in-toto model classes.
-            key = Key.from_dict(verification_keyid, deepcopy(verification_key))
+            key = get_key(verification_key)
 
             try:
-                sig = Signature.from_dict(deepcopy(signature))
+                sig = Signature.from_dict(dict(signature))
                 key.verify_signature(sig, self.signed.signable_bytes)
                 valid = True
 
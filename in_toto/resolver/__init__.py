@@ -15,6 +15,11 @@ Example usage::
 
 """
 
+from in_toto.resolver._hash_cache import (
+    HashCache,
+    MemoryHashCache,
+    SQLiteHashCache,
+)
 from in_toto.resolver._resolver import (
     RESOLVER_FOR_URI_SCHEME,
     DirectoryResolver,
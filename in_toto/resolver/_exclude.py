@@ -0,0 +1,145 @@
+"""Compiled matcher for gitignore-style artifact exclude patterns."""
+
+import re
+
+from pathspec import GitIgnoreSpec
+from pathspec.util import normalize_file
+
+# Regex, into which 'gitwildmatch' translates patterns without slash, which
+# match a path component anywhere in the path, e.g. '.git' or '*.pyc'
+_COMPONENT_PATTERN_RE = re.compile(
+    r"\^\(\?:\.\+/\)\?(?P<component>.*)\(\?:\(\?P<ps_d>/\)\.\*\)\?\$"
+)
+
+# Regex for 'gitwildmatch' translation of the component wildcard '*'
+_WILDCARD = "[^/]*"
+
+# Regex for regex strings, which only match a literal string
+_LITERAL_RE = re.compile(r"(?:\\[^0-9A-Za-z]|[^.^$*+?{}\[\]\\|()])+")
+
+# Regex for named groups, which cannot repeat in a combined regex
+_NAMED_GROUP_RE = re.compile(r"\(\?P<\w+>")
+
+
+def _unescape(literal_regex):
+    """Helper to return literal string, if regex string only matches a
+    literal string, which is not empty and has no slash, or None otherwise."""
+    if not literal_regex or not _LITERAL_RE.fullmatch(literal_regex):
+        return None
+
+    literal = re.sub(r"\\(.)", r"\1", literal_regex)
+    if "/" in literal:
+        return None
+
+    return literal
+
+
+class ExcludeFilter:
+    """Matcher for gitignore-style exclude patterns.
+
+    Matches paths exactly like ``GitIgnoreSpec.match_file`` does for the
+    'gitwildmatch' translation of the passed patterns, but splits patterns
+    that match a path component by a literal name, prefix, suffix or substring,
+    e.g. '.git', 'build*', '*.pyc' or '*.link*', into sets for fast lookups.
+    The remaining patterns are combined into a single regex.
+
+    If any pattern is negated, e.g. '!keep', all paths are matched with
+    ``GitIgnoreSpec``, because the result depends on the order of patterns.
+
+    """
+
+    def __init__(self, patterns):
+        self._spec = GitIgnoreSpec.from_lines("gitwildmatch", patterns)
+        self._negated = any(
+            pattern.include is False for pattern in self._spec.patterns
+        )
+
+        self._names = set()
+        self._prefixes = []
+        self._suffixes = []
+        self._substrings = []
+        residual_regexes = []
+
+        for pattern in self._spec.patterns:
+            if pattern.include is None:  # comments and blank lines
+                continue
+
+            regex = pattern.regex.pattern
+            match = _COMPONENT_PATTERN_RE.fullmatch(regex)
+            component = match.group("component") if match else ""
+
+            # Strip leading and trailing wildcard to get literal part
+            is_suffix = component.startswith(_WILDCARD)
+            if is_suffix:
+                component = component[len(_WILDCARD) :]
+
+            is_prefix = component.endswith(_WILDCARD)
+            if is_prefix:
+                component = component[: -len(_WILDCARD)]
+
+            literal = _unescape(component)
+
+            if literal is None:
+                residual_regexes.append(_NAMED_GROUP_RE.sub("(?:", regex))
+            elif is_prefix and is_suffix:
+                self._substrings.append(literal)
+            elif is_prefix:
+                self._prefixes.append(literal)
+            elif is_suffix:
+                self._suffixes.append(literal)
+            else:
+                self._names.add(literal)
+
+        self._prefixes = tuple(self._prefixes)
+        self._suffixes = tuple(self._suffixes)
+        self._residual = None
+        if residual_regexes:
+            self._residual = re.compile(
+                "|".join(f"(?:{regex})" for regex in residual_regexes)
+            )
+
+    def _match_name(self, name):
+        """Helper to match path component against literal pattern sets."""
+        return (
+            name in self._names
+            or name.startswith(self._prefixes)
+            or name.endswith(self._suffixes)
+            or any(substring in name for substring in self._substrings)
+        )
+
+    def _match_residual(self, norm_path):
+        """Helper to match normalized path against remaining patterns."""
+        return bool(self._residual and self._residual.match(norm_path))
+
+    def _use_spec(self, norm_path):
+        """Helper to check, if normalized path can only be matched with spec.
+
+        NOTE: 'gitwildmatch' regexes don't match newlines in '.' and don't
+        treat a leading slash as component separator.
+        """
+        return self._negated or "\n" in norm_path or norm_path.startswith("/")
+
+    def match(self, path):
+        """Return True, if path is matched by exclude patterns."""
+        norm_path = normalize_file(path)
+        if self._use_spec(norm_path):
+            return self._spec.match_file(path)
+
+        return any(
+            self._match_name(name) for name in norm_path.split("/")
+        ) or self._match_residual(norm_path)
+
+    def match_child(self, path, name):
+        """Return True, if path is matched by exclude patterns.
+
+        Like ``match``, but only matches the last path component ``name``
+        against literal patterns. Use this while walking directory trees, to
+        match the components of a parent directory, which was not excluded,
+        only once.
+
+        """
+        norm_path = normalize_file(path)
+        if self._use_spec(norm_path):
+            return self._spec.match_file(path)
+
+        return self._match_name(name) or self._match_residual(norm_path)
@@ -0,0 +1,231 @@
+"""Content hash caches to avoid re-reading unchanged artifacts."""
+
+import json
+import os
+import sqlite3
+import time
+from abc import ABCMeta, abstractmethod
+
+# Files changed more recently than this are not cached, because a subsequent
+# change might not be reflected in their stat signature on filesystems with
+# coarse timestamp granularity (e.g. FAT uses 2 seconds).
+_RACY_INTERVAL_NS = 2_000_000_000
+
+
+def is_racy(stat_result):
+    """Return True, if file was changed too recently to be cached."""
+    latest_ns = max(stat_result.st_mtime_ns, stat_result.st_ctime_ns)
+    return time.time_ns() - latest_ns < _RACY_INTERVAL_NS
+
+
+class HashCache(metaclass=ABCMeta):
+    """Hash cache interface.
+
+    A hash cache maps the stat signature of a file, i.e. device, inode, size,
+    modification and change time, to the hash dictionary of its contents.
+    Entries are kept separately per set of hash algorithms and line ending
+    normalization flag.
+
+    A hash cache may also map digests of directory tree signatures to hash
+    dictionaries of their contents (see ``DirectoryResolver``). By default,
+    tree entries are not cached.
+
+    """
+
+    @staticmethod
+    def _key(stat_result, algorithms, normalize_line_endings):
+        """Return lookup key for passed stat result and hash options."""
+        return (
+            stat_result.st_dev,
+            stat_result.st_ino,
+            ",".join(algorithms),
+            int(normalize_line_endings),
+        )
+
+    @staticmethod
+    def _signature(stat_result):
+        """Return signature to detect changes of file with passed stat result."""
+        return (
+            stat_result.st_size,
+            stat_result.st_mtime_ns,
+            stat_result.st_ctime_ns,
+        )
+
+    @abstractmethod
+    def get(self, stat_result, algorithms, normalize_line_endings):
+        """Return cached hash dictionary for passed stat result or None."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, stat_result, algorithms, normalize_line_endings, hashes):
+        """Add hash dictionary for passed stat result to cache."""
+        raise NotImplementedError
+
+    def get_tree(self, key):  # pylint: disable=unused-argument
+        """Return cached value for passed tree signature digest or None."""
+        return None
+
+    def put_tree(self, key, value):
+        """Add JSON-serializable value for passed tree signature digest."""
+
+    def close(self):
+        """Persist pending changes and release resources."""
+
+
+class SQLiteHashCache(HashCache):
+    """Hash cache persisted in an SQLite database.
+
+    The database is stored as ``hash-cache.sqlite3`` in the passed directory,
+    which is created if it does not exist. Once the cache holds more than
+    ``max_entries`` file or tree entries, least recently used entries are
+    evicted on ``close``.
+
+    Entries are committed as they are added, and the database is kept in
+    write-ahead log mode, so that multiple caches, e.g. of concurrent
+    in-toto-run processes, can share a directory.
+
+    """
+
+    FILENAME = "hash-cache.sqlite3"
+
+    def __init__(self, directory, max_entries=1000000):
+        if not isinstance(directory, str):
+            raise ValueError("'directory' must be string")
+
+        if not isinstance(max_entries, int) or max_entries < 1:
+            raise ValueError("'max_entries' must be positive integer")
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._max_entries = max_entries
+        self._session_ns = time.time_ns()
+        self._hits = []
+        self._tree_hits = []
+        # NOTE: The connection is used by one thread at a time, but may be
+        # passed between threads, e.g. by executors of asynchronous recording
+        self._connection = sqlite3.connect(
+            os.path.join(directory, self.FILENAME),
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        # Losing the latest entries on power failure is fine for a cache
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            "dev INTEGER, ino INTEGER, algorithms TEXT, normalize INTEGER, "
+            "size INTEGER, mtime_ns INTEGER, ctime_ns INTEGER, "
+            "hashes TEXT, last_used INTEGER, "
+            "PRIMARY KEY (dev, ino, algorithms, normalize))"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS trees ("
+            "key TEXT PRIMARY KEY, value TEXT, last_used INTEGER)"
+        )
+
+    def get(self, stat_result, algorithms, normalize_line_endings):
+        key = self._key(stat_result, algorithms, normalize_line_endings)
+        row = self._connection.execute(
+            "SELECT size, mtime_ns, ctime_ns, hashes FROM hashes "
+            "WHERE dev = ? AND ino = ? AND algorithms = ? AND normalize = ?",
+            key,
+        ).fetchone()
+
+        if row is None or row[:3] != self._signature(stat_result):
+            return None
+
+        self._hits.append(key)
+        return json.loads(row[3])
+
+    def put(self, stat_result, algorithms, normalize_line_endings, hashes):
+        if is_racy(stat_result):
+            return
+
+        self._connection.execute(
+            "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            self._key(stat_result, algorithms, normalize_line_endings)
+            + self._signature(stat_result)
+            + (json.dumps(hashes), self._session_ns),
+        )
+
+    def get_tree(self, key):
+        row = self._connection.execute(
+            "SELECT value FROM trees WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        self._tree_hits.append(key)
+        return json.loads(row[0])
+
+    def put_tree(self, key, value):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO trees VALUES (?, ?, ?)",
+            (key, json.dumps(value), self._session_ns),
+        )
+
+    def close(self):
+        with self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.executemany(
+                "UPDATE hashes SET last_used = ? "
+                "WHERE dev = ? AND ino = ? AND algorithms = ? AND normalize = ?",
+                ((self._session_ns,) + key for key in self._hits),
+            )
+            self._connection.executemany(
+                "UPDATE trees SET last_used = ? WHERE key = ?",
+                ((self._session_ns, key) for key in self._tree_hits),
+            )
+            for table in ["hashes", "trees"]:
+                self._connection.execute(
+                    f"DELETE FROM {table} WHERE rowid IN ("  # nosec
+                    f"SELECT rowid FROM {table} ORDER BY last_used DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (self._max_entries,),
+                )
+
+        self._hits = []
+        self._tree_hits = []
+        self._connection.close()
+
+
+class MemoryHashCache(HashCache):
+    """Hash cache kept in memory.
+
+    Use the same instance for multiple ``hash_artifacts`` calls, to only read
+    files that were changed in between, e.g. by a link command.
+
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._trees = {}
+
+    def get(self, stat_result, algorithms, normalize_line_endings):
+        key = self._key(stat_result, algorithms, normalize_line_endings)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != self._signature(stat_result):
+            return None
+
+        # Copy to not share mutable hash dictionaries between callers
+        return dict(entry[1])
+
+    def put(self, stat_result, algorithms, normalize_line_endings, hashes):
+        if is_racy(stat_result):
+            return
+
+        key = self._key(stat_result, algorithms, normalize_line_endings)
+        self._entries[key] = (self._signature(stat_result), dict(hashes))
+
+    def get_tree(self, key):
+        value = self._trees.get(key)
+        if value is None:
+            return None
+
+        # Copy to not share mutable values between callers
+        return json.loads(value)
+
+    def put_tree(self, key, value):
+        self._trees[key] = json.dumps(value)
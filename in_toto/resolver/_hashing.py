@@ -0,0 +1,133 @@
+"""Helpers to read and hash artifact files."""
+
+import os
+import threading
+
+from securesystemslib.exceptions import StorageError
+from securesystemslib.hash import digest
+
+# Files up to this size are read in a single call. Larger files are read in
+# chunks of this size into a preallocated buffer, which is reused for all
+# chunks of all files hashed in the same thread.
+# NOTE: Large chunks reduce the number of system calls, and allow threads to
+# hash concurrently, because hashlib releases the GIL for large updates.
+CHUNK_SIZE = 1024 * 1024
+
+# Per-thread storage of the buffer for reading large files
+_local = threading.local()
+
+
+def _advise_sequential(fileobj):
+    """Helper to hint the kernel to read ahead aggressively."""
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fileobj.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:  # pragma: no cover
+            pass
+
+
+def _get_buffer():
+    """Helper to return buffer of CHUNK_SIZE bytes, which is allocated once per
+    thread. Returns the buffer and a memoryview of it."""
+    buf = getattr(_local, "buf", None)
+    if buf is None or len(buf) != CHUNK_SIZE:
+        buf = _local.buf = bytearray(CHUNK_SIZE)
+        _local.view = memoryview(buf)
+
+    return buf, _local.view
+
+
+def _update_chunked(digest_objs, fileobj):
+    """Helper to update digest objects with contents of large file object."""
+    buf, view = _get_buffer()
+    while True:
+        size = fileobj.readinto(buf)
+        if not size:
+            break
+
+        chunk = view[:size]
+        for digest_obj in digest_objs:
+            digest_obj.update(chunk)
+
+
+def _read_chunks(fileobj):
+    """Helper to yield contents of file object in chunks of bytes."""
+    while True:
+        chunk = fileobj.read(CHUNK_SIZE)
+        if not chunk:
+            break
+
+        yield chunk
+
+
+def normalize_line_endings(chunks):
+    """Yield passed chunks of bytes with normalized line endings.
+
+    Replaces windows line endings, and then remaining mac line endings, with
+    unix line endings, like securesystemslib does on whole file contents. A
+    carriage return at the end of a chunk is held back until the next chunk,
+    to also replace windows line endings split across chunks. Only one chunk
+    is kept in memory at a time.
+
+    """
+    carry = b""
+    for chunk in chunks:
+        if carry:
+            chunk = carry + chunk
+            carry = b""
+
+        if chunk.endswith(b"\r"):
+            chunk, carry = chunk[:-1], b"\r"
+
+        # First Windows, then Mac
+        yield chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+    if carry:
+        yield b"\n"
+
+
+def digest_file(path, algorithms, normalize=False):
+    """Return digest objects updated with the contents of the file at path.
+
+    Like ``securesystemslib.hash.digest_filename``, but returns a list of
+    digest objects, one for each passed algorithm in order, which are all
+    updated in a single pass over the file. Large files are read in large
+    chunks into a reused buffer, instead of allocating a small chunk per read.
+
+    If ``normalize`` is True, line endings are normalized while reading the
+    file (see ``normalize_line_endings``), so that memory usage is bounded by
+    the chunk size, regardless of the file size.
+
+    Raises:
+        securesystemslib.exceptions.StorageError: file cannot be read.
+        securesystemslib.exceptions.UnsupportedAlgorithmError: algorithm is
+            not supported.
+
+    """
+    digest_objs = [digest(algorithm) for algorithm in algorithms]
+
+    try:
+        # Unbuffered, to read directly into the passed buffer
+        with open(path, "rb", buffering=0) as fileobj:
+            size = os.fstat(fileobj.fileno()).st_size
+            if size > CHUNK_SIZE:
+                _advise_sequential(fileobj)
+
+            if normalize:
+                chunks = normalize_line_endings(_read_chunks(fileobj))
+                for chunk in chunks:
+                    for digest_obj in digest_objs:
+                        digest_obj.update(chunk)
+
+            elif size <= CHUNK_SIZE:
+                data = fileobj.read()
+                for digest_obj in digest_objs:
+                    digest_obj.update(data)
+
+            else:
+                _update_chunked(digest_objs, fileobj)
+
+    except OSError as e:
+        raise StorageError(f"Can't open {path}") from e
+
+    return digest_objs
@@ -1,38 +1,124 @@
 """Resolver interface and implementations for files, OSTree, and directory
 artifacts."""
 
-import locale
+import errno
+import json
 import logging
 import os
+import posixpath
 from abc import ABCMeta, abstractmethod
-from functools import cmp_to_key
-from itertools import combinations
-from os.path import exists, isdir, isfile, join, normpath
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import combinations, repeat
+from os.path import join, normpath
+from stat import S_ISDIR, S_ISREG
 
-from pathspec import GitIgnoreSpec
+from securesystemslib.exceptions import UnsupportedAlgorithmError
 from securesystemslib.hash import digest, digest_filename
 
 from in_toto.exceptions import PrefixError
+from in_toto.resolver._exclude import ExcludeFilter
+from in_toto.resolver._hash_cache import HashCache, is_racy
+from in_toto.resolver._hashing import digest_file
 
 logger = logging.getLogger(__name__)
 
 _HASH_ALGORITHM = "sha256"
 
+# Number of lines of a directory manifest to hash at once (see DirectoryResolver)
+_DIGEST_BATCH_SIZE = 4096
+
+# Max number of OSTree commit object digests to cache (see OSTreeResolver)
+_COMMIT_CACHE_SIZE = 4096
+
+_HASH_EXECUTORS = {
+    "thread": ThreadPoolExecutor,
+    "process": ProcessPoolExecutor,
+}
+
 RESOLVER_FOR_URI_SCHEME = {}
 
 
+def _check_base_path(base_path):
+    """Helper to fail early, if base path is not a directory.
+
+    Raises the same errors as changing the working directory to base path.
+    """
+    if not S_ISDIR(os.stat(base_path).st_mode):
+        raise NotADirectoryError(
+            errno.ENOTDIR, os.strerror(errno.ENOTDIR), base_path
+        )
+
+
+def _check_hash_algorithms(hash_algorithms):
+    """Helper to check and normalize list of hash algorithms.
+
+    Returns sorted list without duplicates, to get the same hash cache keys
+    independently of the passed order.
+    """
+    if (
+        not isinstance(hash_algorithms, list)
+        or not hash_algorithms
+        or not all(isinstance(i, str) for i in hash_algorithms)
+    ):
+        raise ValueError("'hash_algorithms' must be non-empty list of strings")
+
+    for algorithm in hash_algorithms:
+        try:
+            # Also fails for variable length digests, e.g. 'shake_128'
+            digest(algorithm).hexdigest()
+        except (UnsupportedAlgorithmError, TypeError) as e:
+            raise ValueError(f"unsupported hash algorithm '{algorithm}'") from e
+
+    return sorted(set(hash_algorithms))
+
+
+def _stat_entry(entry):
+    """Helper to return stat result of ``os.scandir`` entry.
+
+    On Windows, the stat results cached in entries have zero device and inode
+    numbers, which hash caches use to identify files, so files are stat'ed
+    again.
+    """
+    if os.name == "nt":
+        return os.stat(entry.path)
+
+    return entry.stat()
+
+
+def _hash_file(path, algorithms, normalize_line_endings):
+    """Helper to generate hash dictionary for file at path.
+
+    All algorithms are computed in a single pass over the file.
+
+    NOTE: Defined on module level, so that it can be passed to a process pool.
+    """
+    digest_objs = digest_file(path, algorithms, normalize_line_endings)
+    return {
+        algorithm: digest_obj.hexdigest()
+        for algorithm, digest_obj in zip(algorithms, digest_objs)
+    }
+
+
 class Resolver(metaclass=ABCMeta):
     """Resolver interface and factory."""
 
     @classmethod
-    def for_uri(cls, uri):
-        """Return registered resolver instance for passed URI."""
+    def for_uri(cls, uri, resolver_for_uri_scheme=None):
+        """Return registered resolver instance for passed URI.
+
+        Resolvers are looked up in the passed registry, or in the global
+        ``RESOLVER_FOR_URI_SCHEME`` registry, if none is passed.
+        """
+        if resolver_for_uri_scheme is None:
+            resolver_for_uri_scheme = RESOLVER_FOR_URI_SCHEME
+
         scheme, match, _ = uri.partition(":")
 
-        if not match or scheme not in RESOLVER_FOR_URI_SCHEME:
+        if not match or scheme not in resolver_for_uri_scheme:
             scheme = FileResolver.SCHEME
 
-        return RESOLVER_FOR_URI_SCHEME[scheme]
+        return resolver_for_uri_scheme[scheme]
 
     @abstractmethod
     def hash_artifacts(self, uris):
@@ -46,8 +132,21 @@ class FileResolver(Resolver):
     Provides a ``hash_artifacts`` method to generate hashes for passed file
     paths. The resolver is configurable via its constructor.
 
+    If ``hash_workers`` is greater than 1, files are hashed concurrently, using
+    a thread or process pool as configured by ``hash_executor``. The result is
+    the same as with serial hashing.
+
+    If a ``hash_cache`` is passed, files whose stat signature is in the cache
+    are not read again.
+
+    ``hash_algorithms`` is a list of hash algorithms supported by hashlib,
+    which are all computed in a single pass over each file. Default is
+    ``["sha256"]``.
+
     """
 
+    # pylint: disable=too-many-instance-attributes
+
     SCHEME = "file"
 
     def __init__(
@@ -57,6 +156,10 @@ class FileResolver(Resolver):
         follow_symlink_dirs=False,
         normalize_line_endings=False,
         lstrip_paths=None,
+        hash_workers=1,
+        hash_executor="thread",
+        hash_cache=None,
+        hash_algorithms=None,
     ):
         if exclude_patterns is None:
             exclude_patterns = []
@@ -77,6 +180,27 @@ class FileResolver(Resolver):
             ):
                 raise ValueError(f"'{name}' must be list of strings")
 
+        if (
+            not isinstance(hash_workers, int)
+            or isinstance(hash_workers, bool)
+            or hash_workers < 1
+        ):
+            raise ValueError("'hash_workers' must be positive integer")
+
+        if hash_executor not in _HASH_EXECUTORS:
+            raise ValueError(
+                "'hash_executor' must be one of "
+                f"{', '.join(repr(name) for name in _HASH_EXECUTORS)}"
+            )
+
+        if hash_cache is not None and not isinstance(hash_cache, HashCache):
+            raise ValueError("'hash_cache' must be HashCache")
+
+        if hash_algorithms is None:
+            hash_algorithms = [_HASH_ALGORITHM]
+
+        hash_algorithms = _check_hash_algorithms(hash_algorithms)
+
         for a_, b_ in combinations(lstrip_paths, 2):
             if a_.startswith(b_) or b_.startswith(a_):
                 raise PrefixError(
@@ -84,26 +208,91 @@ class FileResolver(Resolver):
                 )
 
         # Compile gitignore-style patterns
-        self._exclude_filter = GitIgnoreSpec.from_lines(
-            "gitwildmatch", exclude_patterns
-        )
+        self._exclude_filter = ExcludeFilter(exclude_patterns)
         self._base_path = base_path
         self._follow_symlink_dirs = follow_symlink_dirs
         self._normalize_line_endings = normalize_line_endings
         self._lstrip_paths = lstrip_paths
+        self._hash_workers = hash_workers
+        self._hash_executor = hash_executor
+        self._hash_cache = hash_cache
+        self._hash_algorithms = hash_algorithms
 
     def _exclude(self, path):
         """Helper to check, if path matches pre-compiled exclude patterns."""
-        return self._exclude_filter.match_file(path)
+        return self._exclude_filter.match(path)
+
+    def _exclude_child(self, path, name):
+        """Helper to check, if path in a not excluded directory matches
+        pre-compiled exclude patterns."""
+        return self._exclude_filter.match_child(path, name)
+
+    def _fs_path(self, path):
+        """Helper to return path to access artifact at path relative to base
+        path, without changing the working directory."""
+        if self._base_path:
+            return join(self._base_path, path)
+
+        return path
 
     def _hash(self, path):
         """Helper to generate hash dictionary for path."""
-        digest_obj = digest_filename(
-            path,
-            algorithm=_HASH_ALGORITHM,
-            normalize_line_endings=self._normalize_line_endings,
+        return _hash_file(
+            path, self._hash_algorithms, self._normalize_line_endings
         )
-        return {_HASH_ALGORITHM: digest_obj.hexdigest()}
+
+    def _hash_all(self, paths, stat_results):
+        """Helper to generate hash dictionaries for paths, in order.
+
+        Only files whose stat results are not in the configured hash cache are
+        read. Stat results must be obtained before the files are read, so that
+        a cached hash can only be stale, if a file is changed afterwards.
+        """
+        if self._hash_cache is None:
+            return self._digest_all(paths)
+
+        algorithms = self._hash_algorithms
+        results = []
+        misses = []
+        for stat_result in stat_results:
+            hashes = self._hash_cache.get(
+                stat_result, algorithms, self._normalize_line_endings
+            )
+            if hashes is None:
+                misses.append((len(results), stat_result))
+
+            results.append(hashes)
+
+        digests = self._digest_all([paths[idx] for idx, _ in misses])
+        for (idx, stat_result), hashes in zip(misses, digests):
+            self._hash_cache.put(
+                stat_result, algorithms, self._normalize_line_endings, hashes
+            )
+            results[idx] = hashes
+
+        return results
+
+    def _digest_all(self, paths):
+        """Helper to read and hash files at paths, in order.
+
+        Hashes serially or in a worker pool, depending on configuration.
+        """
+        if self._hash_workers == 1 or len(paths) < 2:
+            return [self._hash(path) for path in paths]
+
+        # Hand out paths in batches to reduce inter-process communication
+        chunksize = max(1, len(paths) // (self._hash_workers * 4))
+        executor_cls = _HASH_EXECUTORS[self._hash_executor]
+        with executor_cls(max_workers=self._hash_workers) as executor:
+            return list(
+                executor.map(
+                    _hash_file,
+                    paths,
+                    repeat(self._hash_algorithms),
+                    repeat(self._normalize_line_endings),
+                    chunksize=chunksize,
+                )
+            )
 
     def _mangle(self, path, existing_paths, scheme_prefix):
         """Helper for path mangling."""
@@ -140,12 +329,97 @@ class FileResolver(Resolver):
 
         return path, prefix
 
-    def hash_artifacts(self, uris):
-        hashes = {}
+    def _walk(self, top):
+        """Helper to yield paths and stat results of files in directory tree.
+
+        Traverses the tree top-down, like ``os.walk``, but uses the type
+        information and stat results cached in ``os.scandir`` entries, and
+        does not descend into excluded directories. Yields each path relative
+        to base path, and the path to access it from the working directory.
+
+        NOTE: The passed top directory must not be excluded, so that only the
+        names of its entries need to be matched against literal exclude
+        patterns.
+
+        NOTE: Like ``os.walk``, ignores directories that cannot be listed.
+        """
+        stack = [(top, self._fs_path(top))]
+        while stack:
+            base, fs_base = stack.pop()
+            dirs = []
+            try:
+                with os.scandir(fs_base) as entries:
+                    for entry in entries:
+                        # NOTE: Normalize to filter on and return paths without
+                        # their dot-slash prefix, if top was dot.
+                        path = normpath(join(base, entry.name))
+
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+
+                        if is_dir:
+                            # Skip symlinked directories, unless configured
+                            # otherwise, and excluded directories
+                            if (
+                                self._follow_symlink_dirs
+                                or not entry.is_symlink()
+                            ) and not self._exclude_child(path, entry.name):
+                                dirs.append((path, entry.path))
+                            continue
+
+                        if self._exclude_child(path, entry.name):
+                            continue
 
+                        try:
+                            stat_result = _stat_entry(entry)
+                        except OSError:
+                            stat_result = None
+
+                        if stat_result is None or not S_ISREG(
+                            stat_result.st_mode
+                        ):
+                            logger.info(
+                                "File '%s' appears to be a broken symlink. "
+                                "Skipping...",
+                                path,
+                            )
+                            continue
+
+                        yield path, entry.path, stat_result
+
+            except OSError:
+                continue
+
+            # Descend into subdirectories in listing order
+            stack.extend(reversed(dirs))
+
+    def _collect(self, uris):
+        """Helper to collect files to hash for passed list of artifact URIs.
+
+        Returns lists of artifact names, paths to access the files from the
+        working directory, and stat results, in the same order.
+        """
+        # Names, paths and stat results of files to hash, and names for
+        # duplicate detection
+        artifact_names = []
+        artifact_paths = []
+        artifact_stat_results = []
+        existing_names = set()
+
+        def _add(path, fs_path, stat_result, prefix):
+            name = self._mangle(path, existing_names, prefix)
+            existing_names.add(name)
+            artifact_names.append(name)
+            artifact_paths.append(fs_path)
+            artifact_stat_results.append(stat_result)
+
+        # NOTE: Paths are joined with base path instead of changing the working
+        # directory, which is process-global state and would make concurrent
+        # use of resolvers unsafe.
         if self._base_path:
-            original_cwd = os.getcwd()
-            os.chdir(self._base_path)
+            _check_base_path(self._base_path)
 
         for path in uris:
             # Remove scheme prefix, but preserver to re-add later (see _mangle)
@@ -160,55 +434,56 @@ class FileResolver(Resolver):
             if self._exclude(path):
                 continue
 
-            if not exists(path):
+            fs_path = self._fs_path(path)
+            try:
+                stat_result = os.stat(fs_path)
+            except (OSError, ValueError):
                 logger.info("path: %s does not exist, skipping..", path)
                 continue
 
-            if isfile(path):
-                name = self._mangle(path, hashes, prefix)
-                hashes[name] = self._hash(path)
+            if S_ISREG(stat_result.st_mode):
+                _add(path, fs_path, stat_result, prefix)
 
-            if isdir(path):
-                for base, dirs, names in os.walk(
-                    path, followlinks=self._follow_symlink_dirs
+            elif S_ISDIR(stat_result.st_mode):
+                for file_path, file_fs_path, file_stat_result in self._walk(
+                    path
                 ):
-                    # Filter directories to avoid unnecessary recursion below
-                    # NOTE: Normalize to filter on directory paths without
-                    # their dot-slash prefix, if path was dot.
-                    dirs[:] = [
-                        dirname
-                        for dirname in dirs
-                        if not self._exclude(normpath(join(base, dirname)))
-                    ]
+                    _add(file_path, file_fs_path, file_stat_result, prefix)
 
-                    for filename in names:
-                        # NOTE: Normalize to filter on and return file paths
-                        # without their dot-slash prefix, if path was dot.
-                        filepath = normpath(join(base, filename))
+        return artifact_names, artifact_paths, artifact_stat_results
 
-                        if self._exclude(filepath):
-                            continue
+    def hash_artifacts(self, uris):
+        names, paths, stat_results = self._collect(uris)
 
-                        if not isfile(filepath):
-                            logger.info(
-                                "File '%s' appears to be a broken symlink. "
-                                "Skipping...",
-                                filepath,
-                            )
-                            continue
+        # Hash files only after the walk, to allow doing it concurrently
+        return dict(zip(names, self._hash_all(paths, stat_results)))
 
-                        name = self._mangle(filepath, hashes, prefix)
-                        hashes[name] = self._hash(filepath)
 
-        # Change back to original current working dir
-        if self._base_path:
-            os.chdir(original_cwd)
+@lru_cache(maxsize=_COMMIT_CACHE_SIZE)
+def _digest_commit(object_path, algorithm):
+    """Helper to return hex digest of OSTree commit object at absolute path.
 
-        return hashes
+    NOTE: Commit objects are content-addressed, i.e. the path of an object
+    determines its contents, hence cached digests never need invalidation.
+    Errors are not cached.
+    """
+    return digest_filename(object_path, algorithm=algorithm).hexdigest()
 
 
 class OSTreeResolver(Resolver):
-    """Resolver for OSTree repositories."""
+    """Resolver for OSTree repositories.
+
+    Each URI is resolved by reading the ref in 'refs/heads'. If `index_refs` is
+    True, URIs without such a local ref are resolved from an index of all refs
+    of the repository, which is built on the first of these URIs once per
+    `hash_artifacts` call. In addition to local refs, the index includes remote
+    refs in 'refs/remotes/<remote>' and collection refs in
+    'refs/mirrors/<collection id>', which are resolved with URIs like
+    'ostree:<remote>:<ref>' and 'ostree:<collection id>:<ref>'.
+
+    Digests of commit objects are cached across calls.
+
+    """
 
     SCHEME = "ostree"
 
@@ -216,8 +491,13 @@ class OSTreeResolver(Resolver):
     # rather than in-toto's
     _HASH_ALGORITHM = "sha256"
 
-    def __init__(self, base_path=None):
+    # Ref directories in order of precedence, and whether their refs are
+    # grouped by remote or collection id
+    _REF_KINDS = [("heads", False), ("remotes", True), ("mirrors", True)]
+
+    def __init__(self, base_path=None, index_refs=False):
         self._base_path = base_path
+        self._index_refs = index_refs
 
     def _strip_scheme_prefix(self, path):
         """Helper to strip OSTree resolver scheme prefix from path."""
@@ -229,41 +509,79 @@ class OSTreeResolver(Resolver):
 
         return f"{self.SCHEME}:{path}"
 
-    def _hash(self, path):
+    def _read_ref(self, path):
+        """Helper to read commit checksum from ref file."""
+        with open(path, "r") as ref:  # pylint: disable=unspecified-encoding
+            ref_contents = ref.read()
+
+        return ref_contents.strip("\n")
+
+    def _build_ref_index(self):
+        """Helper to map names of all refs in the repository to commits."""
+        index = {}
+        for kind, grouped in self._REF_KINDS:
+            kind_path = os.path.join(self._base_path or "", "refs", kind)
+            for dir_path, _, file_names in os.walk(kind_path):
+                for file_name in file_names:
+                    ref_path = os.path.join(dir_path, file_name)
+                    name = os.path.relpath(ref_path, kind_path)
+                    name = name.replace(os.sep, "/")
+                    if grouped:
+                        name = name.replace("/", ":", 1)
+
+                    # Refs of kinds with higher precedence take priority
+                    if name not in index:
+                        index[name] = self._read_ref(ref_path)
+
+        return index
+
+    def _hash(self, path, get_ref_index=None):
         """Helper to hash OSTree commits."""
 
-        ref_path = os.path.join("refs", "heads", path)
+        ref_path = os.path.join(self._base_path or "", "refs", "heads", path)
 
-        with open(ref_path, "r") as ref:  # pylint: disable=unspecified-encoding
-            ref_contents = ref.read()
-        ref_contents = ref_contents.strip("\n")
+        try:
+            ref_contents = self._read_ref(ref_path)
 
-        object_path = os.path.join(
-            "objects", ref_contents[:2], f"{ref_contents[2:]}.commit"
-        )
+        except (FileNotFoundError, IsADirectoryError):
+            ref_index = get_ref_index() if get_ref_index else {}
+            if path not in ref_index:
+                raise
+
+            ref_contents = ref_index[path]
 
-        digest_obj = digest_filename(
-            object_path,
-            algorithm=self._HASH_ALGORITHM,
+        object_path = os.path.join(
+            self._base_path or "",
+            "objects",
+            ref_contents[:2],
+            f"{ref_contents[2:]}.commit",
         )
 
-        return {self._HASH_ALGORITHM: digest_obj.hexdigest()}
+        return {
+            self._HASH_ALGORITHM: _digest_commit(
+                os.path.abspath(object_path), self._HASH_ALGORITHM
+            )
+        }
 
     def hash_artifacts(self, uris):
         hashes = {}
 
+        # NOTE: Paths are joined with base path instead of changing the working
+        # directory (see FileResolver.hash_artifacts).
         if self._base_path:
-            original_cwd = os.getcwd()
-            os.chdir(self._base_path)
+            _check_base_path(self._base_path)
+
+        # Build ref index only if needed, and only once per call
+        get_ref_index = None
+        if self._index_refs:
+            get_ref_index = lru_cache(maxsize=None)(self._build_ref_index)
 
         for path in uris:
             # Remove scheme prefix, but preserver to re-add later
             path = self._strip_scheme_prefix(path)
-            hashes[self._add_scheme_prefix(path)] = self._hash(path)
-
-        # Change back to original current working dir
-        if self._base_path:
-            os.chdir(original_cwd)
+            hashes[self._add_scheme_prefix(path)] = self._hash(
+                path, get_ref_index
+            )
 
         return hashes
 
@@ -278,11 +596,25 @@ class DirectoryResolver(Resolver):
 
     `exclude_patterns` are not applied on the directory paths passed to
     `hash_artifacts`, but on the files inside the directory. Similarly,
-    `follow_symlink_dirs` and `normalize_line_endings` are used on
-    subdirectories and files inside the directories passed to `hash_artifacts`.
+    `follow_symlink_dirs`, `normalize_line_endings`, `hash_workers`,
+    `hash_executor` and `hash_cache` are used on subdirectories and files inside
+    the directories passed to `hash_artifacts`.
+
+    For each of `hash_algorithms`, the directory hash is computed as above,
+    with the corresponding algorithm in place of sha256.
+
+    If `hash_cache` is passed, directory hashes are also cached incrementally,
+    like a Merkle tree: Files are grouped by their parent directory, and the
+    file hashes of each group are cached under a digest of the stat signatures
+    of its files. The directory hash is cached under a digest of all group
+    digests. Thus, an unchanged directory is not hashed again, and only groups
+    with changed files are hashed again. The resulting directory hash is the
+    same as without cache.
 
     """
 
+    # pylint: disable=too-many-instance-attributes
+
     SCHEME = "dir"
 
     def __init__(
@@ -291,10 +623,17 @@ class DirectoryResolver(Resolver):
         follow_symlink_dirs=False,
         normalize_line_endings=False,
         lstrip_paths=None,
+        hash_workers=1,
+        hash_executor="thread",
+        hash_cache=None,
+        hash_algorithms=None,
     ):
         if not exclude_patterns:
             exclude_patterns = []
 
+        if hash_algorithms is None:
+            hash_algorithms = [_HASH_ALGORITHM]
+
         if not lstrip_paths:
             lstrip_paths = []
 
@@ -302,6 +641,10 @@ class DirectoryResolver(Resolver):
         self._follow_symlink_dirs = follow_symlink_dirs
         self._normalize_line_endings = normalize_line_endings
         self._lstrip_paths = lstrip_paths
+        self._hash_workers = hash_workers
+        self._hash_executor = hash_executor
+        self._hash_cache = hash_cache
+        self._hash_algorithms = _check_hash_algorithms(hash_algorithms)
 
     def _strip_scheme_prefix(self, path):
         """Helper to strip file resolver scheme prefix from path."""
@@ -335,23 +678,126 @@ class DirectoryResolver(Resolver):
         return path
 
     def _hash(self, file_hashes):
-        """Helper to correctly sort and hash every element."""
+        """Helper to correctly sort and hash every element.
+
+        Names are sorted by code point, which is the same as the byte order of
+        their UTF-8 encoding, i.e. ``LC_ALL=C sort``. Lines are fed into the
+        digests in batches, to not build the whole text in memory.
+        """
+        keys = sorted(file_hashes)
+        digest_objs = [digest(algorithm) for algorithm in self._hash_algorithms]
+
+        for start in range(0, len(keys), _DIGEST_BATCH_SIZE):
+            batch = keys[start : start + _DIGEST_BATCH_SIZE]
+            for algorithm, digest_obj in zip(
+                self._hash_algorithms, digest_objs
+            ):
+                text_repr = "".join(
+                    f"{file_hashes[k][algorithm]}  {k}\n" for k in batch
+                )
+                digest_obj.update(text_repr.encode("utf-8"))
+
+        return {
+            algorithm: digest_obj.hexdigest()
+            for algorithm, digest_obj in zip(self._hash_algorithms, digest_objs)
+        }
+
+    def _tree_key(self, *parts):
+        """Helper to return digest of passed JSON-serializable parts and the
+        configuration, which affects the directory hash."""
+        config = [
+            self._exclude_patterns,
+            self._follow_symlink_dirs,
+            self._normalize_line_endings,
+            self._hash_algorithms,
+        ]
+        digest_obj = digest(_HASH_ALGORITHM)
+        digest_obj.update(json.dumps([config, parts]).encode("utf-8"))
+        return digest_obj.hexdigest()
+
+    def _group(self, names, stat_results):
+        """Helper to group file indices by parent directory.
+
+        Returns dictionaries of parent directory to file indices, and to digest
+        of the stat signatures of the files.
+        """
+        groups = {}
+        for idx, name in enumerate(names):
+            groups.setdefault(posixpath.dirname(name), []).append(idx)
+
+        group_keys = {}
+        for dirname, idxs in groups.items():
+            group_keys[dirname] = self._tree_key(
+                dirname,
+                sorted(
+                    [
+                        names[idx],
+                        stat_results[idx].st_dev,
+                        stat_results[idx].st_ino,
+                        stat_results[idx].st_size,
+                        stat_results[idx].st_mtime_ns,
+                        stat_results[idx].st_ctime_ns,
+                    ]
+                    for idx in idxs
+                ),
+            )
 
-        text_repr = ""
-        keys = list(file_hashes.keys())
-        if keys:
-            locale.setlocale(locale.LC_ALL, "C")
-            keys.sort(key=cmp_to_key(locale.strcoll))
+        return groups, group_keys
+
+    def _hash_incremental(self, file_resolver):
+        """Helper to hash directory of file resolver using tree cache entries.
+
+        Returns directory hash dictionary and number of files.
+        """
+        # pylint: disable=protected-access, too-many-locals
+        names, paths, stat_results = file_resolver._collect(["."])
+        groups, group_keys = self._group(names, stat_results)
+
+        root_key = self._tree_key(sorted(group_keys.values()))
+        hashes = self._hash_cache.get_tree(root_key)
+        if hashes is not None:
+            return hashes, len(names)
+
+        file_hashes = {}
+        changed = []
+        for dirname, group_key in group_keys.items():
+            group_hashes = self._hash_cache.get_tree(group_key)
+            if group_hashes is None:
+                changed.append(dirname)
+            else:
+                file_hashes.update(group_hashes)
+
+        idxs = [idx for dirname in changed for idx in groups[dirname]]
+        file_hashes.update(
+            zip(
+                [names[idx] for idx in idxs],
+                file_resolver._hash_all(
+                    [paths[idx] for idx in idxs],
+                    [stat_results[idx] for idx in idxs],
+                ),
+            )
+        )
+
+        # Don't cache groups with recently changed files (see HashCache)
+        racy = False
+        for dirname in changed:
+            if any(is_racy(stat_results[idx]) for idx in groups[dirname]):
+                racy = True
+                continue
 
-            text_repr = "\n".join(
-                [f"{file_hashes[k][_HASH_ALGORITHM]}  {k}" for k in keys]
+            self._hash_cache.put_tree(
+                group_keys[dirname],
+                {
+                    names[idx]: file_hashes[names[idx]]
+                    for idx in groups[dirname]
+                },
             )
-            text_repr += "\n"  # trailing new line
 
-        digest_obj = digest(_HASH_ALGORITHM)
-        digest_obj.update(text_repr.encode("utf-8"))
+        hashes = self._hash(file_hashes)
+        if not racy:
+            self._hash_cache.put_tree(root_key, hashes)
 
-        return {_HASH_ALGORITHM: digest_obj.hexdigest()}
+        return hashes, len(names)
 
     def hash_artifacts(self, uris):
         hashes = {}
@@ -367,15 +813,26 @@ class DirectoryResolver(Resolver):
                 exclude_patterns=self._exclude_patterns,
                 follow_symlink_dirs=self._follow_symlink_dirs,
                 normalize_line_endings=self._normalize_line_endings,
+                hash_workers=self._hash_workers,
+                hash_executor=self._hash_executor,
+                hash_cache=self._hash_cache,
+                hash_algorithms=self._hash_algorithms,
             )
 
-            file_hashes = file_resolver.hash_artifacts(["."])
-            if not file_hashes:
+            if self._hash_cache is None:
+                file_hashes = file_resolver.hash_artifacts(["."])
+                dir_hashes, file_count = self._hash(file_hashes), len(
+                    file_hashes
+                )
+            else:
+                dir_hashes, file_count = self._hash_incremental(file_resolver)
+
+            if not file_count:
                 logger.info(
                     "path: %s has no files, recording empty dir...", path
                 )
 
             name = self._mangle(path, hashes)
-            hashes[name] = self._hash(file_hashes)
+            hashes[name] = dir_hashes
 
         return hashes
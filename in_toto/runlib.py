@@ -27,16 +27,29 @@
     - Return Metadata containing a Link object which can be can be signed
       and stored to disk
 """
+import asyncio
+import codecs
+import functools
 import glob
 import io
+import locale
 import logging
 import os
+import selectors
+import shutil
 import subprocess  # nosec
 import sys
 import tempfile
+import threading
 import time
 from collections import defaultdict
 
+try:
+    import pty
+    import termios
+except ImportError:  # pragma: no cover (Windows)
+    pty = termios = None
+
 import securesystemslib.exceptions
 import securesystemslib.formats
 import securesystemslib.gpg
@@ -63,14 +76,32 @@ from in_toto.resolver import (
     RESOLVER_FOR_URI_SCHEME,
     DirectoryResolver,
     FileResolver,
+    MemoryHashCache,
     OSTreeResolver,
     Resolver,
+    SQLiteHashCache,
 )
 
 # Inherits from in_toto base logger (c.f. in_toto.log)
 LOG = logging.getLogger(__name__)
 
 
+def _open_hash_cache(hash_cache_dir):
+    """Helper to open persistent hash cache in passed or configured directory.
+
+    Returns None, if no hash cache directory is passed or configured.
+    """
+    if not hash_cache_dir:
+        hash_cache_dir = in_toto.settings.ARTIFACT_HASH_CACHE_DIR
+
+    if not hash_cache_dir:
+        return None
+
+    return SQLiteHashCache(
+        hash_cache_dir, in_toto.settings.ARTIFACT_HASH_CACHE_SIZE
+    )
+
+
 def record_artifacts_as_dict(
     artifacts,
     exclude_patterns=None,
@@ -78,6 +109,11 @@ def record_artifacts_as_dict(
     follow_symlink_dirs=False,
     normalize_line_endings=False,
     lstrip_paths=None,
+    hash_workers=None,
+    hash_cache_dir=None,
+    hash_cache=None,
+    hash_algorithms=None,
+    hash_executor=None,
 ):
     """
     <Purpose>
@@ -122,7 +158,8 @@ def record_artifacts_as_dict(
               If passed, patterns specified via settings are overriden.
 
       base_path: (optional)
-              Change to base_path and record artifacts relative from there.
+              Record artifacts relative from base_path. The current working
+              directory is not changed.
               If not passed, current working directory is used as base_path.
               NOTE: The base_path part of the recorded artifact is not included
               in the returned paths.
@@ -144,8 +181,36 @@ def record_artifacts_as_dict(
               If a prefix path is passed, the prefix is left stripped from
               the path of every artifact that contains the prefix.
 
+      hash_workers: (optional)
+              Number of workers used to hash files concurrently, using the
+              executor configured via hash_executor. If not passed,
+              ARTIFACT_HASH_WORKERS setting is used (see `in_toto.settings`).
+              A value of 1 hashes files serially.
+
+      hash_cache_dir: (optional)
+              Directory of a persistent hash cache, used to skip reading files
+              that have not changed since they were last recorded. If not
+              passed, ARTIFACT_HASH_CACHE_DIR setting is used. If neither is
+              set, no cache is used.
+
+      hash_cache: (optional)
+              A HashCache instance used instead of a cache in hash_cache_dir.
+              The caller is responsible for closing it. Pass the same instance
+              to multiple calls to only hash artifacts that were changed in
+              between.
+
+      hash_algorithms: (optional)
+              A list of hash algorithms, which are all computed in a single
+              pass over each file and recorded in the returned hash
+              dictionaries. If not passed, ARTIFACT_HASH_ALGORITHMS setting is
+              used.
+
+      hash_executor: (optional)
+              "thread" or "process" pool used, if hash_workers is greater than
+              1. If not passed, ARTIFACT_HASH_EXECUTOR setting is used.
+
     <Exceptions>
-      OSError: cannot change to base path directory.
+      OSError: base path is not an accessible directory.
       ValueError: arguments are malformed.
 
     <Side Effects>
@@ -155,6 +220,7 @@ def record_artifacts_as_dict(
       A dictionary with file paths as keys and the files' hashes as values.
 
     """
+    # pylint: disable=too-many-locals
     artifact_hashes = {}
 
     if not artifacts:
@@ -166,135 +232,533 @@ def record_artifacts_as_dict(
     if not exclude_patterns:
         exclude_patterns = in_toto.settings.ARTIFACT_EXCLUDE_PATTERNS
 
-    # Configure resolver with resolver specific arguments
-    # FIXME: This should happen closer to the user boundary, where
-    # resolver-specific config arguments are passed and global state is managed.
-    RESOLVER_FOR_URI_SCHEME[FileResolver.SCHEME] = FileResolver(
+    if hash_workers is None:
+        hash_workers = in_toto.settings.ARTIFACT_HASH_WORKERS
+
+    if not hash_algorithms:
+        hash_algorithms = in_toto.settings.ARTIFACT_HASH_ALGORITHMS
+
+    if hash_executor is None:
+        hash_executor = in_toto.settings.ARTIFACT_HASH_EXECUTOR
+
+    # Only close hash cache opened here
+    close_hash_cache = False
+    if hash_cache is None:
+        hash_cache = _open_hash_cache(hash_cache_dir)
+        close_hash_cache = hash_cache is not None
+
+    # Configure resolvers with resolver specific arguments, in a registry
+    # local to this call, so that concurrent calls don't interfere. Resolvers
+    # registered globally for other schemes are used as is.
+    resolver_for_uri_scheme = dict(RESOLVER_FOR_URI_SCHEME)
+    resolver_for_uri_scheme[FileResolver.SCHEME] = FileResolver(
         exclude_patterns,
         base_path,
         follow_symlink_dirs,
         normalize_line_endings,
         lstrip_paths,
+        hash_workers,
+        hash_executor,
+        hash_cache,
+        hash_algorithms,
     )
 
-    # Configure resolver for OSTree
-    RESOLVER_FOR_URI_SCHEME[OSTreeResolver.SCHEME] = OSTreeResolver(base_path)
+    # Configure resolver for OSTree, which resolves all refs in one batch
+    resolver_for_uri_scheme[OSTreeResolver.SCHEME] = OSTreeResolver(
+        base_path, index_refs=True
+    )
 
     # Configure resolver for hashing directories as a single entry
-    RESOLVER_FOR_URI_SCHEME[DirectoryResolver.SCHEME] = DirectoryResolver(
+    resolver_for_uri_scheme[DirectoryResolver.SCHEME] = DirectoryResolver(
         exclude_patterns=exclude_patterns,
         follow_symlink_dirs=follow_symlink_dirs,
         normalize_line_endings=normalize_line_endings,
         lstrip_paths=lstrip_paths,
+        hash_workers=hash_workers,
+        hash_executor=hash_executor,
+        hash_cache=hash_cache,
+        hash_algorithms=hash_algorithms,
     )
 
     # Aggregate artifacts per resolver
     resolver_for_uris = defaultdict(list)
     for artifact in artifacts:
-        resolver = Resolver.for_uri(artifact)
+        resolver = Resolver.for_uri(artifact, resolver_for_uri_scheme)
         resolver_for_uris[resolver].append(artifact)
 
     # Hash artifacts in a batch per resolver
     # FIXME: The behavior may change if we hash each artifact individually,
     # because the left-prefix duplicate check in FileResolver only works for the
     # artifacts hashed in one batch.
-    for resolver, uris in resolver_for_uris.items():
-        artifact_hashes.update(resolver.hash_artifacts(uris))
+    try:
+        for resolver, uris in resolver_for_uris.items():
+            artifact_hashes.update(resolver.hash_artifacts(uris))
 
-    # Clear resolvers to not preserve global state change beyond this function.
-    # FIXME: This also clears resolver registered elsewhere. For now we
-    # assume that we only modify RESOLVER_FOR_URI_SCHEME in this function.
-    RESOLVER_FOR_URI_SCHEME.clear()
+    finally:
+        if close_hash_cache:
+            hash_cache.close()
 
     return artifact_hashes
 
 
-def _subprocess_run_duplicate_streams(cmd, timeout):
+# Policies to capture standard streams of link commands as byproducts:
+# - "full": store complete streams
+# - "truncate": store only head and tail of streams, plus length and digest
+# - "digest": store only length and digest of streams
+# - "spill": store streams in sidecar files named by digest, plus length and
+#   digest
+BYPRODUCT_CAPTURE_POLICIES = ["full", "truncate", "digest", "spill"]
+
+# Filename format for streams spilled to sidecar files
+BYPRODUCT_FILENAME_FORMAT = "{digest}.byproduct"
+
+_BYPRODUCT_HASH_ALGORITHM = "sha256"
+
+
+class _StreamCapture:
+    """Helper to capture output of a link command stream per capture policy.
+
+    Memory usage is bounded by ``size`` for the "truncate" policy, and
+    constant for the "digest" and "spill" policies. Length and digest are
+    computed over the UTF-8 encoded output, i.e. they match the stream as it
+    would be stored with the "full" policy.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, policy="full", size=0, directory=None):
+        self._policy = policy
+        self._size = size
+        self._directory = directory or "."
+        self._parts = []
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._length = 0
+        self._digest_obj = securesystemslib.hash.digest(
+            _BYPRODUCT_HASH_ALGORITHM
+        )
+        self._spill_file = None
+        if policy == "spill":
+            # Write to temporary file first, because name depends on contents
+            self._spill_file = tempfile.NamedTemporaryFile(  # pylint: disable=consider-using-with
+                dir=self._directory, suffix=".tmp", delete=False
+            )
+
+    def write(self, text):
+        """Capture decoded output."""
+        if self._policy == "full":
+            self._parts.append(text)
+            return
+
+        data = text.encode("utf-8")
+        self._length += len(data)
+        self._digest_obj.update(data)
+
+        if self._policy == "truncate":
+            head_room = self._size - len(self._head)
+            if head_room > 0:
+                self._head += data[:head_room]
+                data = data[head_room:]
+
+            # Trim tail only once it has grown past twice the size, so that
+            # trimming is amortized over many writes
+            self._tail += data
+            if len(self._tail) > 2 * self._size:
+                del self._tail[: -self._size]
+
+        elif self._policy == "spill":
+            self._spill_file.write(data)
+
+    def getvalue(self):
+        """Return captured output as stored in the stream byproduct."""
+        if self._policy == "full":
+            return "".join(self._parts)
+
+        if self._policy == "truncate":
+            tail = self._tail[-self._size :]
+            truncated = self._length - len(self._head) - len(tail)
+            text = self._head.decode("utf-8", "ignore")
+            if truncated:
+                text += f"\n[... {truncated} bytes truncated ...]\n"
+            return text + tail.decode("utf-8", "ignore")
+
+        return ""
+
+    def byproducts(self, name):
+        """Return byproducts dictionary for stream with passed name.
+
+        Finishes spilling the stream to its sidecar file.
+        """
+        if self._policy == "full":
+            return {name: self.getvalue()}
+
+        digest = self._digest_obj.hexdigest()
+        byproducts = {
+            f"{name}-length": self._length,
+            f"{name}-{_BYPRODUCT_HASH_ALGORITHM}": digest,
+        }
+
+        if self._policy == "truncate":
+            byproducts[name] = self.getvalue()
+
+        elif self._policy == "spill":
+            filename = BYPRODUCT_FILENAME_FORMAT.format(digest=digest)
+            self._spill_file.close()
+            os.replace(
+                self._spill_file.name, os.path.join(self._directory, filename)
+            )
+            self._spill_file = None
+            byproducts[f"{name}-file"] = filename
+
+        return byproducts
+
+    def discard(self):
+        """Remove unfinished sidecar file, if any."""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            os.remove(self._spill_file.name)
+            self._spill_file = None
+
+
+class _DuplicatedStream:
+    """Helper to write output of a child process standard stream to a parent
+    process standard stream, and to capture it.
+
+    Output is decoded like a text mode file would do it, i.e. with the locale
+    encoding and universal newlines, and passed to a stream capture.
+    """
+
+    def __init__(self, target, capture):
+        self._target = target
+        self._decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(locale.getpreferredencoding(False))(),
+            translate=True,
+        )
+        self._capture = capture
+
+    def write(self, chunk):
+        """Duplicate chunk of bytes. An empty chunk marks the end of stream."""
+        text = self._decoder.decode(chunk, final=not chunk)
+        if text:
+            self._target.write(text)
+            self._target.flush()
+            self._capture.write(text)
+
+
+# Seconds to wait for more output after the link command exited, before
+# pipes, which stay idle, are no longer read
+_DRAIN_TIMEOUT = 0.1
+
+# Seconds between checks, if the link command exited, where its exit cannot be
+# selected
+_EXIT_POLL_INTERVAL = 0.05
+
+
+def _remaining(deadline):
+    """Helper to return seconds until deadline (None for no deadline)."""
+    if deadline is None:
+        return None
+
+    return max(0, deadline - time.monotonic())
+
+
+def _read_chunk(fd):
+    """Helper to read chunk of bytes from pipe or pseudo-terminal. Returns an
+    empty chunk at EOF."""
+    try:
+        return os.read(fd, io.DEFAULT_BUFFER_SIZE)
+
+    except OSError:
+        # Reading a pseudo-terminal, whose other end is closed, fails with EIO
+        return b""
+
+
+def _open_pidfd(pid):
+    """Helper to return file descriptor to select exit of process with pid, or
+    None, if not supported (only Linux supports it)."""
+    try:
+        return os.pidfd_open(pid)  # pylint: disable=no-member
+
+    except (AttributeError, OSError):
+        return None
+
+
+def _select_streams(selector, proc, pidfd, deadline):
+    """Helper to duplicate selected streams until the process exits and until
+    EOF, or until no stream has output for _DRAIN_TIMEOUT seconds after exit.
+    Returns False, if deadline is reached before the process exits."""
+    exited = False
+    while selector.get_map():
+        if not exited and proc.poll() is not None:
+            exited = True
+            if pidfd is not None:
+                selector.unregister(pidfd)
+                continue
+
+        if exited:
+            if _remaining(deadline) == 0:
+                break
+            remaining = _DRAIN_TIMEOUT
+
+        else:
+            remaining = _remaining(deadline)
+            if remaining == 0:
+                return False
+
+            # Check for exit regularly, if exit cannot be selected
+            if pidfd is None:
+                remaining = min(
+                    remaining or _EXIT_POLL_INTERVAL, _EXIT_POLL_INTERVAL
+                )
+
+        events = selector.select(remaining)
+        if exited and not events:
+            break
+
+        for key, _ in events:
+            # Process exited, handled above
+            if key.data is None:
+                continue
+
+            chunk = _read_chunk(key.fd)
+            if not chunk:
+                selector.unregister(key.fd)
+            key.data.write(chunk)
+
+    return True
+
+
+def _duplicate_pipes_select(proc, streams, deadline):
+    """Helper to duplicate pipes until the process exits, waiting for output or
+    exit with a selector.
+
+    Process exit is selected with a pidfd, where available, or checked every
+    _EXIT_POLL_INTERVAL seconds. After exit, output is read until EOF, or until
+    the pipes stay idle for _DRAIN_TIMEOUT seconds, because background
+    processes started by the process may keep them open.
+
+    Returns False, if deadline is reached before the process exits.
+    """
+    pidfd = _open_pidfd(proc.pid)
+    try:
+        with selectors.DefaultSelector() as selector:
+            for fd, stream in streams.items():
+                selector.register(fd, selectors.EVENT_READ, stream)
+
+            if pidfd is not None:
+                selector.register(pidfd, selectors.EVENT_READ)
+
+            exited = _select_streams(selector, proc, pidfd, deadline)
+
+            # Stop duplicating streams, which were not closed in time
+            for key in selector.get_map().values():
+                if key.data is not None:
+                    key.data.write(b"")
+
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+    return exited
+
+
+def _duplicate_pipes_threads(proc, streams, deadline):
+    """Helper to duplicate pipes until the process exits, using a thread per
+    pipe.
+
+    Used on Windows, where pipes cannot be selected. After exit, output is read
+    until EOF, or until the pipes stay idle for _DRAIN_TIMEOUT seconds (see
+    _duplicate_pipes_select).
+
+    Returns False, if deadline is reached before the process exits.
+    """
+    lock = threading.Lock()
+    stopped = threading.Event()
+    last_read = time.monotonic()
+
+    def _duplicate(fd, stream):
+        nonlocal last_read
+        while True:
+            chunk = _read_chunk(fd)
+            with lock:
+                if stopped.is_set():
+                    break
+                stream.write(chunk)
+                last_read = time.monotonic()
+
+            if not chunk:
+                break
+
+    threads = [
+        threading.Thread(target=_duplicate, args=item, daemon=True)
+        for item in streams.items()
+    ]
+    for thread in threads:
+        thread.start()
+
+    exited = False
+    try:
+        proc.wait(_remaining(deadline))
+        exited = True
+    except subprocess.TimeoutExpired:
+        pass
+
+    finally:
+        for thread in threads:
+            while exited and thread.is_alive() and _remaining(deadline) != 0:
+                with lock:
+                    idle_deadline = last_read + _DRAIN_TIMEOUT
+                if _remaining(idle_deadline) == 0:
+                    break
+                thread.join(_remaining(idle_deadline))
+
+        # Stop duplicating streams, which were not closed in time
+        with lock:
+            stopped.set()
+            for thread, stream in zip(threads, streams.values()):
+                if thread.is_alive():
+                    stream.write(b"")
+
+    return exited
+
+
+def _popen_pty(cmd):
+    """Helper to start subprocess with standard output redirected to a
+    pseudo-terminal. Returns process and master file descriptor, or None and
+    None, if pseudo-terminals are not available."""
+    if pty is None:
+        return None, None
+
+    master_fd, slave_fd = pty.openpty()
+    try:
+        # Do not translate output newlines
+        attributes = termios.tcgetattr(slave_fd)
+        attributes[1] &= ~termios.OPOST
+        termios.tcsetattr(slave_fd, termios.TCSANOW, attributes)
+
+        proc = subprocess.Popen(  # pylint: disable=consider-using-with  # nosec
+            cmd,
+            stdout=slave_fd,
+            stderr=subprocess.PIPE,
+        )
+    except BaseException:
+        os.close(master_fd)
+        raise
+
+    finally:
+        # Only the child process writes to the pseudo-terminal
+        os.close(slave_fd)
+
+    return proc, master_fd
+
+
+def _subprocess_run_duplicate_streams(
+    cmd, timeout, captures=None, use_pty=False
+):
     """Helper to run subprocess and both print and capture standards streams.
 
+    The standard streams of the child process are redirected to pipes, which
+    are read as soon as output is available, without polling. Output is
+    captured completely, or with the passed pair of stream captures.
+
+    If use_pty is True, standard output is redirected to a pseudo-terminal
+    instead of a pipe, for interactive commands, which only write to a
+    terminal, and for commands, which buffer output written to a pipe. Standard
+    error is still a separate pipe. Pseudo-terminals are not available on
+    Windows, where pipes are used regardless.
+
     Caveat:
-    * Might behave unexpectedly with interactive commands.
+    * Might behave unexpectedly with interactive commands, if their standard
+      output is not a terminal.
     * Might not duplicate output in real time, if the command buffers it (see
       e.g. `print("foo")` vs. `print("foo", flush=True)`).
-    * Possible race condition on Windows when removing temporary files.
+    * Output of background processes started by the command, which keep its
+      standard streams open, is only read after the command exits, until the
+      streams stay idle for _DRAIN_TIMEOUT seconds.
 
     """
-    # Use temporary files as targets for child process standard stream redirects
-    # They seem to work better (i.e. do not hang) than pipes, when using
-    # interactive commands like `vi`.
-    stdout_fd, stdout_name = tempfile.mkstemp()
-    stderr_fd, stderr_name = tempfile.mkstemp()
-    try:
-        with io.open(  # pylint: disable=unspecified-encoding
-            stdout_name, "r"
-        ) as stdout_reader, os.fdopen(  # pylint: disable=unspecified-encoding
-            stdout_fd, "w"
-        ) as stdout_writer, io.open(  # pylint: disable=unspecified-encoding
-            stderr_name, "r"
-        ) as stderr_reader, os.fdopen(
-            stderr_fd, "w"
-        ) as stderr_writer:
-            # Store stream results in mutable dict to update it inside nested helper
-            streams = {"out": "", "err": ""}
-
-            def _duplicate_streams():
-                """Helper to read from child process standard streams, write their
-                contents to parent process standard streams, and build up return values
-                for outer function.
-                """
-                # Read until EOF but at most `io.DEFAULT_BUFFER_SIZE` bytes per call.
-                # Reading and writing in reasonably sized chunks prevents us from
-                # subverting a timeout, due to being busy for too long or indefinitely.
-                stdout_part = stdout_reader.read(io.DEFAULT_BUFFER_SIZE)
-                stderr_part = stderr_reader.read(io.DEFAULT_BUFFER_SIZE)
-                sys.stdout.write(stdout_part)
-                sys.stderr.write(stderr_part)
-                sys.stdout.flush()
-                sys.stderr.flush()
-                streams["out"] += stdout_part
-                streams["err"] += stderr_part
-
-            # Start child process, writing its standard streams to temporary files
-            proc = subprocess.Popen(  # pylint: disable=consider-using-with  # nosec
-                cmd,
-                stdout=stdout_writer,
-                stderr=stderr_writer,
-                universal_newlines=True,
-            )
-            proc_start_time = time.time()
+    # pylint: disable=too-many-locals
+    if os.name == "nt":
+        duplicate_pipes = _duplicate_pipes_threads
+    else:
+        duplicate_pipes = _duplicate_pipes_select
+
+    deadline = None
+    if timeout is not None:
+        deadline = time.monotonic() + timeout
+
+    proc, master_fd = _popen_pty(cmd) if use_pty else (None, None)
+    if proc is None:
+        proc = subprocess.Popen(  # pylint: disable=consider-using-with  # nosec
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+    if captures is None:
+        captures = (_StreamCapture(), _StreamCapture())
 
-            # Duplicate streams until the process exits (or times out)
-            while proc.poll() is None:
-                # Time out as Python's `subprocess.run` would do it
-                if (
-                    timeout is not None
-                    and time.time() > proc_start_time + timeout
-                ):
-                    proc.kill()
-                    proc.wait()
-                    raise subprocess.TimeoutExpired(cmd, timeout)
+    stdout_capture, stderr_capture = captures
+    stdout_fd = proc.stdout.fileno() if master_fd is None else master_fd
+    streams = {
+        stdout_fd: _DuplicatedStream(sys.stdout, stdout_capture),
+        proc.stderr.fileno(): _DuplicatedStream(sys.stderr, stderr_capture),
+    }
 
-                _duplicate_streams()
+    try:
+        # Time out as Python's `subprocess.run` would do it
+        if not duplicate_pipes(proc, streams, deadline):
+            raise subprocess.TimeoutExpired(cmd, timeout)
 
-            # Read/write once more to grab everything that the process wrote between
-            # our last read in the loop and exiting, i.e. breaking the loop.
-            _duplicate_streams()
+        try:
+            proc.wait(_remaining(deadline))
+        except subprocess.TimeoutExpired as e:
+            raise subprocess.TimeoutExpired(cmd, timeout) from e
 
     finally:
-        # The work is done or was interrupted, the temp files can be removed
-        # FIXME: retry failed file removal once to maybe work around #547
-        for name in (stdout_name, stderr_name):
-            try:
-                os.remove(name)
-            except PermissionError:  # pragma: no cover
-                time.sleep(0.01)
-                os.remove(name)
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+        if master_fd is None:
+            proc.stdout.close()
+        else:
+            os.close(master_fd)
+        proc.stderr.close()
 
     # Return process exit code and captured streams
-    return proc.poll(), streams["out"], streams["err"]
+    return proc.returncode, stdout_capture.getvalue(), stderr_capture.getvalue()
+
+
+def _check_capture_args(capture_policy, capture_size):
+    """Helper to check capture arguments of execute_link, and to return them
+    with configured defaults."""
+    if capture_policy is None:
+        capture_policy = in_toto.settings.BYPRODUCT_CAPTURE
 
+    if capture_size is None:
+        capture_size = in_toto.settings.BYPRODUCT_CAPTURE_SIZE
 
-def execute_link(link_cmd_args, record_streams, timeout):
+    if capture_policy not in BYPRODUCT_CAPTURE_POLICIES:
+        raise ValueError(
+            f"'capture_policy' must be one of {BYPRODUCT_CAPTURE_POLICIES}"
+        )
+
+    if not isinstance(capture_size, int) or capture_size < 1:
+        raise ValueError("'capture_size' must be positive integer")
+
+    return capture_policy, capture_size
+
+
+def execute_link(
+    link_cmd_args,
+    record_streams,
+    timeout,
+    capture_policy=None,
+    capture_size=None,
+    capture_directory=None,
+    use_pty=False,
+):
     """
     <Purpose>
       Executes the passed command plus arguments in a subprocess and returns
@@ -307,31 +771,71 @@ def execute_link(link_cmd_args, record_streams, timeout):
               A list where the first element is a command and the remaining
               elements are arguments passed to that command.
       record_streams:
-              A bool that specifies whether to redirect standard output and
-              and standard error to a temporary file which is returned to the
-              caller (True) or not (False).
+              A bool that specifies whether to capture standard output and
+              and standard error, which are also returned to the caller
+              (True), or not (False).
+      capture_policy: (optional)
+              One of BYPRODUCT_CAPTURE_POLICIES, to specify how recorded
+              streams are stored in the returned by-products. Default is the
+              BYPRODUCT_CAPTURE setting.
+      capture_size: (optional)
+              The number of bytes kept of the head and of the tail of each
+              stream with the "truncate" policy. Default is the
+              BYPRODUCT_CAPTURE_SIZE setting.
+      capture_directory: (optional)
+              A directory path to write sidecar files to with the "spill"
+              policy. Default is the current working directory.
+      use_pty: (optional)
+              A bool that specifies whether to record standard output from a
+              pseudo-terminal instead of a pipe, e.g. for interactive
+              commands, if record_streams is True. Ignored on Windows.
 
     <Exceptions>
       OSError:
-              The given command is not present or non-executable
+              The given command is not present or non-executable, or sidecar
+              files cannot be written
 
       subprocess.TimeoutExpired:
               The execution of the given command times.
 
+      ValueError:
+              The capture policy or size is invalid.
+
     <Side Effects>
       Executes passed command in a subprocess and redirects stdout and stderr
       if specified.
+      Writes sidecar files to disk with the "spill" policy.
 
     <Returns>
       - A dictionary containing standard output and standard error of the
         executed command, called by-products.
         Note: If record_streams is False, the dict values are empty strings.
+        With other than the "full" policy, lengths and digests of the streams
+        are added, and streams are truncated ("truncate") or omitted.
       - The return value of the executed command.
     """
+    capture_policy, capture_size = _check_capture_args(
+        capture_policy, capture_size
+    )
+
     if record_streams:
-        return_code, stdout_str, stderr_str = _subprocess_run_duplicate_streams(
-            link_cmd_args, timeout=timeout
-        )
+        captures = [
+            _StreamCapture(capture_policy, capture_size, capture_directory)
+            for _ in range(2)
+        ]
+        try:
+            return_code, _, _ = _subprocess_run_duplicate_streams(
+                link_cmd_args,
+                timeout=timeout,
+                captures=captures,
+                use_pty=use_pty,
+            )
+            byproducts = captures[0].byproducts("stdout")
+            byproducts.update(captures[1].byproducts("stderr"))
+
+        finally:
+            for capture in captures:
+                capture.discard()
 
     else:
         process = subprocess.run(
@@ -341,14 +845,144 @@ def execute_link(link_cmd_args, record_streams, timeout):
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
         )
-        stdout_str = stderr_str = ""
+        byproducts = {"stdout": "", "stderr": ""}
         return_code = process.returncode
 
-    return {
-        "stdout": stdout_str,
-        "stderr": stderr_str,
-        "return-value": return_code,
-    }
+    byproducts["return-value"] = return_code
+    return byproducts
+
+
+async def _wait_for(awaitable, cmd, timeout):
+    """Helper to await with timeout, raising subprocess.TimeoutExpired."""
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError as e:
+        raise subprocess.TimeoutExpired(cmd, timeout) from e
+
+
+class _DuplicatedStreamsProtocol(asyncio.SubprocessProtocol):
+    """Subprocess protocol to duplicate the standard streams of the link
+    command as they are received, and to await its exit and their EOF.
+
+    Unlike ``Process.wait``, exit can be awaited without waiting until the
+    streams are closed, which background processes started by the command may
+    keep open.
+    """
+
+    def __init__(self, streams):
+        loop = asyncio.get_running_loop()
+        self._streams = streams
+        self._received = 0
+        self.exited = loop.create_future()
+        self.closed = {fd: loop.create_future() for fd in streams}
+
+    def pipe_data_received(self, fd, data):
+        self._received += len(data)
+        self._streams[fd].write(data)
+
+    def pipe_connection_lost(self, fd, exc):
+        if fd in self._streams:
+            self._streams[fd].write(b"")
+            self.closed[fd].set_result(None)
+
+    def process_exited(self):
+        self.exited.set_result(None)
+
+    async def drain(self, deadline):
+        """Await EOF of streams, or until no stream has output for
+        _DRAIN_TIMEOUT seconds, or until deadline."""
+        while _remaining(deadline) != 0:
+            pending = [fut for fut in self.closed.values() if not fut.done()]
+            if not pending:
+                break
+
+            received = self._received
+            done, _ = await asyncio.wait(pending, timeout=_DRAIN_TIMEOUT)
+            if not done and self._received == received:
+                break
+
+
+async def execute_link_async(
+    link_cmd_args,
+    record_streams,
+    timeout,
+    capture_policy=None,
+    capture_size=None,
+    capture_directory=None,
+):
+    """Executes link command in a subprocess, asynchronously.
+
+    Like ``execute_link``, but runs the command with the event loop's
+    ``subprocess_exec`` and awaits its output and exit, so that the event loop
+    is not blocked while the command runs.
+
+    See ``execute_link`` for arguments, exceptions, side effects and return
+    value.
+
+    """
+    capture_policy, capture_size = _check_capture_args(
+        capture_policy, capture_size
+    )
+
+    captures = []
+    streams = {}
+    if record_streams:
+        captures = [
+            _StreamCapture(capture_policy, capture_size, capture_directory)
+            for _ in range(2)
+        ]
+        # Duplicate streams by their file descriptor in the subprocess
+        streams = {
+            1: _DuplicatedStream(sys.stdout, captures[0]),
+            2: _DuplicatedStream(sys.stderr, captures[1]),
+        }
+        target = subprocess.PIPE
+    else:
+        target = subprocess.DEVNULL
+
+    deadline = None
+    if timeout is not None:
+        deadline = time.monotonic() + timeout
+
+    try:
+        transport, protocol = await asyncio.get_running_loop().subprocess_exec(
+            lambda: _DuplicatedStreamsProtocol(streams),
+            *link_cmd_args,
+            stdin=None,
+            stdout=target,
+            stderr=target,
+        )
+        try:
+            # Shield exit, to still await it after killing the command
+            await _wait_for(
+                asyncio.shield(protocol.exited), link_cmd_args, timeout
+            )
+
+            # Read remaining output after exit, but stop at streams, which
+            # background processes started by the command keep open (see
+            # _duplicate_pipes_select)
+            await protocol.drain(deadline)
+
+        finally:
+            if transport.get_returncode() is None:
+                transport.kill()
+                await protocol.exited
+
+            # Stop duplicating streams, which were not closed in time
+            transport.close()
+            await asyncio.gather(*protocol.closed.values())
+
+        byproducts = {"stdout": "", "stderr": ""}
+        if record_streams:
+            byproducts = captures[0].byproducts("stdout")
+            byproducts.update(captures[1].byproducts("stderr"))
+
+    finally:
+        for capture in captures:
+            capture.discard()
+
+    byproducts["return-value"] = transport.get_returncode()
+    return byproducts
 
 
 def in_toto_mock(name, link_cmd_args, use_dsse=False):
@@ -415,6 +1049,139 @@ def _require_signing_arg(signer, signing_key, gpg_keyid, gpg_use_default):
         )
 
 
+def _check_run_args(
+    signer,
+    signing_key,
+    gpg_keyid,
+    exclude_patterns,
+    base_path,
+    hash_algorithms,
+    metadata_directory,
+):
+    """Helper to check formats of in_toto_run arguments to fail early."""
+    if signer:
+        _check_signer(signer)
+
+    if signing_key:
+        _check_signing_key(signing_key)
+
+    if gpg_keyid:
+        _check_hex(gpg_keyid)
+
+    if exclude_patterns:
+        _check_str_list(exclude_patterns)
+
+    if base_path:
+        _check_str(base_path)
+
+    if hash_algorithms:
+        _check_str_list(hash_algorithms)
+
+    if metadata_directory:
+        _check_str(metadata_directory)
+
+
+def _make_spill_directory(record_streams, capture_policy, capture_size):
+    """Helper to return temporary directory for sidecar files of spilled
+    streams, or None, if streams are not spilled.
+
+    Sidecar files are only moved to the metadata directory after products are
+    recorded, so that they are not recorded as products.
+    """
+    capture_policy, _ = _check_capture_args(capture_policy, capture_size)
+    if record_streams and capture_policy == "spill":
+        return tempfile.mkdtemp()
+
+    return None
+
+
+def _move_sidecar_files(byproducts, spill_directory, metadata_directory):
+    """Helper to move sidecar files of spilled streams from temporary spill
+    directory to metadata directory (default is current working directory).
+
+    Existing sidecar files are kept, because their names are the digests of
+    their contents.
+    """
+    for key, filename in byproducts.items():
+        if not key.endswith("-file"):
+            continue
+
+        path = os.path.join(metadata_directory or ".", filename)
+        if not os.path.exists(path):
+            shutil.move(os.path.join(spill_directory, filename), path)
+
+
+def _create_link_metadata(
+    name,
+    materials_dict,
+    products_dict,
+    link_cmd_args,
+    byproducts,
+    record_environment,
+    use_dsse,
+    compact_json,
+    signer,
+    signing_key,
+    gpg_keyid,
+    gpg_use_default,
+    gpg_home,
+    metadata_directory,
+):
+    """Helper to create link metadata for in_toto_run, and to sign and write
+    it to disk, if any key argument is passed."""
+    # pylint: disable=too-many-locals
+    LOG.info("Creating link metadata...")
+    environment = {}
+    if record_environment:
+        environment["workdir"] = os.getcwd().replace("\\", "/")
+
+    link = in_toto.models.link.Link(
+        name=name,
+        materials=materials_dict,
+        products=products_dict,
+        command=link_cmd_args,
+        byproducts=byproducts,
+        environment=environment,
+    )
+
+    if use_dsse:
+        LOG.info("Generating link metadata using DSSE...")
+        link_metadata = Envelope.from_signable(link)
+    else:
+        LOG.info("Generating link metadata using Metablock...")
+        link_metadata = Metablock(signed=link, compact_json=compact_json)
+
+    if signer:
+        LOG.info("Signing link metadata using passed signer...")
+
+    elif signing_key:
+        LOG.info("Signing link metadata using passed key...")
+        signer = SSlibSigner(signing_key)
+
+    elif gpg_keyid:
+        LOG.info("Signing link metadata using passed GPG keyid...")
+        signer = GPGSigner(keyid=gpg_keyid, homedir=gpg_home)
+
+    elif gpg_use_default:
+        LOG.info("Signing link metadata using default GPG key ...")
+        signer = GPGSigner(keyid=None, homedir=gpg_home)
+
+    # We need the signature's keyid to write the link to keyid infix'ed filename
+    if signer:
+        signature = link_metadata.create_signature(signer)
+        signing_keyid = signature.keyid
+
+        filename = FILENAME_FORMAT.format(step_name=name, keyid=signing_keyid)
+
+        if metadata_directory is not None:
+            filename = os.path.join(metadata_directory, filename)
+
+        LOG.info("Storing link metadata to '%s'...", filename)
+        link_metadata.dump(filename)
+
+    return link_metadata
+
+
 def in_toto_run(
     name,
     material_list,
@@ -435,6 +1202,12 @@ def in_toto_run(
     use_dsse=False,
     timeout=in_toto.settings.LINK_CMD_EXEC_TIMEOUT,
     signer=None,
+    hash_workers=None,
+    hash_cache_dir=None,
+    hash_algorithms=None,
+    byproduct_capture=None,
+    byproduct_capture_size=None,
+    hash_executor=None,
 ):
     """Performs a supply chain step or inspection generating link metadata.
 
@@ -507,10 +1280,38 @@ def in_toto_run(
     signer (optional): A securesystemslib Signer instance used to
         sign the resulting link metadata.
 
+    hash_workers (optional): An integer indicating the number of workers used
+        to hash artifacts concurrently. Default is the ARTIFACT_HASH_WORKERS
+        setting.
+
+    hash_cache_dir (optional): A directory path of a persistent cache for
+        artifact hashes, used to skip reading unchanged artifacts. Default is
+        the ARTIFACT_HASH_CACHE_DIR setting.
+
+    hash_algorithms (optional): A list of hash algorithms used to hash
+        artifacts in a single pass. Default is the ARTIFACT_HASH_ALGORITHMS
+        setting.
+
+    hash_executor (optional): "thread" or "process" pool used to hash
+        artifacts, if hash_workers is greater than 1. Default is the
+        ARTIFACT_HASH_EXECUTOR setting.
+
+    byproduct_capture (optional): One of BYPRODUCT_CAPTURE_POLICIES, to
+        specify how recorded standard streams are stored in the link metadata.
+        With "spill", streams are written to sidecar files in the metadata
+        directory, which are not recorded as products. Default is the
+        BYPRODUCT_CAPTURE setting.
+
+    byproduct_capture_size (optional): An integer indicating the number of
+        bytes kept of the head and of the tail of each recorded stream with
+        the "truncate" policy. Default is the BYPRODUCT_CAPTURE_SIZE setting.
+
   Raises:
     securesystemslib.exceptions.FormatError: Passed arguments are malformed.
 
-    OSError: Cannot change to base path directory.
+    ValueError: Byproduct capture policy or size is invalid.
+
+    OSError: Base path is not an accessible directory.
 
     securesystemslib.exceptions.StorageError: Cannot hash artifacts.
 
@@ -532,6 +1333,7 @@ def in_toto_run(
   Side Effects:
     Reads artifact files from disk.
     Runs link command in subprocess.
+    Writes recorded standard streams to sidecar files, if configured.
     Calls system gpg in a subprocess, if a gpg key argument is passed.
     Writes link metadata file to disk, if any key argument is passed.
 
@@ -543,107 +1345,265 @@ def in_toto_run(
 
     LOG.info("Running '%s'...", name)
 
-    # Check key formats to fail early
-    if signer:
-        _check_signer(signer)
+    _check_run_args(
+        signer,
+        signing_key,
+        gpg_keyid,
+        exclude_patterns,
+        base_path,
+        hash_algorithms,
+        metadata_directory,
+    )
 
-    if signing_key:
-        _check_signing_key(signing_key)
+    # Share hash cache between recording materials and products, to only hash
+    # products that were created or modified by the link command
+    hash_cache = _open_hash_cache(hash_cache_dir)
+    if hash_cache is None:
+        hash_cache = MemoryHashCache()
 
-    if gpg_keyid:
-        _check_hex(gpg_keyid)
+    spill_directory = None
+    try:
+        spill_directory = _make_spill_directory(
+            record_streams and bool(link_cmd_args),
+            byproduct_capture,
+            byproduct_capture_size,
+        )
 
-    if exclude_patterns:
-        _check_str_list(exclude_patterns)
+        if material_list:
+            LOG.info("Recording materials '%s'...", ", ".join(material_list))
+
+        materials_dict = record_artifacts_as_dict(
+            material_list,
+            exclude_patterns=exclude_patterns,
+            base_path=base_path,
+            follow_symlink_dirs=True,
+            normalize_line_endings=normalize_line_endings,
+            lstrip_paths=lstrip_paths,
+            hash_workers=hash_workers,
+            hash_executor=hash_executor,
+            hash_cache=hash_cache,
+            hash_algorithms=hash_algorithms,
+        )
 
-    if base_path:
-        _check_str(base_path)
+        if link_cmd_args:
+            _check_str_list(link_cmd_args)
+            LOG.info("Running command '%s'...", " ".join(link_cmd_args))
+            byproducts = execute_link(
+                link_cmd_args,
+                record_streams,
+                timeout,
+                capture_policy=byproduct_capture,
+                capture_size=byproduct_capture_size,
+                capture_directory=spill_directory,
+            )
+        else:
+            byproducts = {}
+
+        if product_list:
+            _check_str_list(product_list)
+            LOG.info("Recording products '%s'...", ", ".join(product_list))
+
+        products_dict = record_artifacts_as_dict(
+            product_list,
+            exclude_patterns=exclude_patterns,
+            base_path=base_path,
+            follow_symlink_dirs=True,
+            normalize_line_endings=normalize_line_endings,
+            lstrip_paths=lstrip_paths,
+            hash_workers=hash_workers,
+            hash_executor=hash_executor,
+            hash_cache=hash_cache,
+            hash_algorithms=hash_algorithms,
+        )
 
-    if metadata_directory:
-        _check_str(metadata_directory)
+        if spill_directory is not None:
+            _move_sidecar_files(byproducts, spill_directory, metadata_directory)
 
-    if material_list:
-        LOG.info("Recording materials '%s'...", ", ".join(material_list))
+    finally:
+        hash_cache.close()
+        if spill_directory is not None:
+            shutil.rmtree(spill_directory, ignore_errors=True)
 
-    materials_dict = record_artifacts_as_dict(
-        material_list,
-        exclude_patterns=exclude_patterns,
-        base_path=base_path,
-        follow_symlink_dirs=True,
-        normalize_line_endings=normalize_line_endings,
-        lstrip_paths=lstrip_paths,
+    return _create_link_metadata(
+        name,
+        materials_dict,
+        products_dict,
+        link_cmd_args,
+        byproducts,
+        record_environment,
+        use_dsse,
+        compact_json,
+        signer,
+        signing_key,
+        gpg_keyid,
+        gpg_use_default,
+        gpg_home,
+        metadata_directory,
     )
 
-    if link_cmd_args:
-        _check_str_list(link_cmd_args)
-        LOG.info("Running command '%s'...", " ".join(link_cmd_args))
-        byproducts = execute_link(link_cmd_args, record_streams, timeout)
-    else:
-        byproducts = {}
 
-    if product_list:
-        _check_str_list(product_list)
-        LOG.info("Recording products '%s'...", ", ".join(product_list))
+async def in_toto_run_async(
+    name,
+    material_list,
+    product_list,
+    link_cmd_args,
+    record_streams=False,
+    signing_key=None,
+    gpg_keyid=None,
+    gpg_use_default=False,
+    gpg_home=None,
+    exclude_patterns=None,
+    base_path=None,
+    compact_json=False,
+    record_environment=False,
+    normalize_line_endings=False,
+    lstrip_paths=None,
+    metadata_directory=None,
+    use_dsse=False,
+    timeout=in_toto.settings.LINK_CMD_EXEC_TIMEOUT,
+    signer=None,
+    hash_workers=None,
+    hash_cache_dir=None,
+    hash_algorithms=None,
+    byproduct_capture=None,
+    byproduct_capture_size=None,
+    executor=None,
+    hash_executor=None,
+):
+    """Performs a supply chain step or inspection generating link metadata,
+      asynchronously.
 
-    products_dict = record_artifacts_as_dict(
-        product_list,
+    Like ``in_toto_run``, but runs the link command as asyncio subprocess (see
+    ``execute_link_async``), and records artifacts, and signs and writes link
+    metadata in an executor, so that the event loop is not blocked. Use a
+    bounded executor, e.g. a ``ThreadPoolExecutor`` with few workers, to limit
+    concurrent hashing, when running many steps from one event loop.
+
+    Arguments:
+      executor (optional): A ``concurrent.futures.Executor`` used to record
+          artifacts, and to sign and write link metadata. Default is the default
+          executor of the running event loop.
+
+      See ``in_toto_run`` for other arguments.
+
+    Raises:
+      See ``in_toto_run``.
+
+    Side Effects:
+      See ``in_toto_run``.
+
+    Returns:
+      A Metadata object that contains the resulting link object.
+
+    """
+    # pylint: disable=too-many-locals
+
+    LOG.info("Running '%s'...", name)
+
+    _check_run_args(
+        signer,
+        signing_key,
+        gpg_keyid,
+        exclude_patterns,
+        base_path,
+        hash_algorithms,
+        metadata_directory,
+    )
+
+    loop = asyncio.get_running_loop()
+
+    # Share hash cache between recording materials and products (see
+    # in_toto_run)
+    hash_cache = await loop.run_in_executor(
+        executor, _open_hash_cache, hash_cache_dir
+    )
+    if hash_cache is None:
+        hash_cache = MemoryHashCache()
+
+    record = functools.partial(
+        record_artifacts_as_dict,
         exclude_patterns=exclude_patterns,
         base_path=base_path,
         follow_symlink_dirs=True,
         normalize_line_endings=normalize_line_endings,
         lstrip_paths=lstrip_paths,
+        hash_workers=hash_workers,
+        hash_executor=hash_executor,
+        hash_cache=hash_cache,
+        hash_algorithms=hash_algorithms,
     )
 
-    LOG.info("Creating link metadata...")
-    environment = {}
-    if record_environment:
-        environment["workdir"] = os.getcwd().replace("\\", "/")
-
-    link = in_toto.models.link.Link(
-        name=name,
-        materials=materials_dict,
-        products=products_dict,
-        command=link_cmd_args,
-        byproducts=byproducts,
-        environment=environment,
-    )
-
-    if use_dsse:
-        LOG.info("Generating link metadata using DSSE...")
-        link_metadata = Envelope.from_signable(link)
-    else:
-        LOG.info("Generating link metadata using Metablock...")
-        link_metadata = Metablock(signed=link, compact_json=compact_json)
-
-    if signer:
-        LOG.info("Signing link metadata using passed signer...")
+    spill_directory = None
+    try:
+        spill_directory = _make_spill_directory(
+            record_streams and bool(link_cmd_args),
+            byproduct_capture,
+            byproduct_capture_size,
+        )
 
-    elif signing_key:
-        LOG.info("Signing link metadata using passed key...")
-        signer = SSlibSigner(signing_key)
+        if material_list:
+            LOG.info("Recording materials '%s'...", ", ".join(material_list))
 
-    elif gpg_keyid:
-        LOG.info("Signing link metadata using passed GPG keyid...")
-        signer = GPGSigner(keyid=gpg_keyid, homedir=gpg_home)
+        materials_dict = await loop.run_in_executor(
+            executor, record, material_list
+        )
 
-    elif gpg_use_default:
-        LOG.info("Signing link metadata using default GPG key ...")
-        signer = GPGSigner(keyid=None, homedir=gpg_home)
+        if link_cmd_args:
+            _check_str_list(link_cmd_args)
+            LOG.info("Running command '%s'...", " ".join(link_cmd_args))
+            byproducts = await execute_link_async(
+                link_cmd_args,
+                record_streams,
+                timeout,
+                capture_policy=byproduct_capture,
+                capture_size=byproduct_capture_size,
+                capture_directory=spill_directory,
+            )
+        else:
+            byproducts = {}
 
-    # We need the signature's keyid to write the link to keyid infix'ed filename
-    if signer:
-        signature = link_metadata.create_signature(signer)
-        signing_keyid = signature.keyid
+        if product_list:
+            _check_str_list(product_list)
+            LOG.info("Recording products '%s'...", ", ".join(product_list))
 
-        filename = FILENAME_FORMAT.format(step_name=name, keyid=signing_keyid)
+        products_dict = await loop.run_in_executor(
+            executor, record, product_list
+        )
 
-        if metadata_directory is not None:
-            filename = os.path.join(metadata_directory, filename)
+        if spill_directory is not None:
+            await loop.run_in_executor(
+                executor,
+                _move_sidecar_files,
+                byproducts,
+                spill_directory,
+                metadata_directory,
+            )
 
-        LOG.info("Storing link metadata to '%s'...", filename)
-        link_metadata.dump(filename)
+    finally:
+        await loop.run_in_executor(executor, hash_cache.close)
+        if spill_directory is not None:
+            await loop.run_in_executor(
+                executor, shutil.rmtree, spill_directory, True
+            )
 
-    return link_metadata
+    return await loop.run_in_executor(
+        executor,
+        _create_link_metadata,
+        name,
+        materials_dict,
+        products_dict,
+        link_cmd_args,
+        byproducts,
+        record_environment,
+        use_dsse,
+        compact_json,
+        signer,
+        signing_key,
+        gpg_keyid,
+        gpg_use_default,
+        gpg_home,
+        metadata_directory,
+    )
 
 
 def in_toto_record_start(
@@ -660,6 +1620,10 @@ def in_toto_record_start(
     lstrip_paths=None,
     use_dsse=False,
     signer=None,
+    hash_workers=None,
+    hash_cache_dir=None,
+    hash_algorithms=None,
+    hash_executor=None,
 ):
     """Generates preliminary link metadata.
 
@@ -716,6 +1680,22 @@ def in_toto_record_start(
     signer (optional): A securesystemslib Signer instance used to
         sign the resulting link metadata.
 
+    hash_workers (optional): An integer indicating the number of workers used
+        to hash artifacts concurrently. Default is the ARTIFACT_HASH_WORKERS
+        setting.
+
+    hash_cache_dir (optional): A directory path of a persistent cache for
+        artifact hashes, used to skip reading unchanged artifacts. Default is
+        the ARTIFACT_HASH_CACHE_DIR setting.
+
+    hash_algorithms (optional): A list of hash algorithms used to hash
+        artifacts in a single pass. Default is the ARTIFACT_HASH_ALGORITHMS
+        setting.
+
+    hash_executor (optional): "thread" or "process" pool used to hash
+        artifacts, if hash_workers is greater than 1. Default is the
+        ARTIFACT_HASH_EXECUTOR setting.
+
   Raises:
     securesystemslib.exceptions.FormatError: Passed arguments are malformed.
 
@@ -768,6 +1748,9 @@ def in_toto_record_start(
     if base_path:
         _check_str(base_path)
 
+    if hash_algorithms:
+        _check_str_list(hash_algorithms)
+
     if material_list:
         LOG.info("Recording materials '%s'...", ", ".join(material_list))
 
@@ -778,6 +1761,10 @@ def in_toto_record_start(
         follow_symlink_dirs=True,
         normalize_line_endings=normalize_line_endings,
         lstrip_paths=lstrip_paths,
+        hash_workers=hash_workers,
+        hash_executor=hash_executor,
+        hash_cache_dir=hash_cache_dir,
+        hash_algorithms=hash_algorithms,
     )
 
     LOG.info("Creating preliminary link metadata...")
@@ -844,6 +1831,10 @@ def in_toto_record_stop(
     byproducts=None,
     environment=None,
     signer=None,
+    hash_workers=None,
+    hash_cache_dir=None,
+    hash_algorithms=None,
+    hash_executor=None,
 ):
     """Finalizes preliminary link metadata generated with in_toto_record_start.
 
@@ -915,6 +1906,22 @@ def in_toto_record_stop(
     signer (optional): A securesystemslib Signer instance used to
         sign the resulting link metadata.
 
+    hash_workers (optional): An integer indicating the number of workers used
+        to hash artifacts concurrently. Default is the ARTIFACT_HASH_WORKERS
+        setting.
+
+    hash_cache_dir (optional): A directory path of a persistent cache for
+        artifact hashes, used to skip reading unchanged artifacts. Default is
+        the ARTIFACT_HASH_CACHE_DIR setting.
+
+    hash_algorithms (optional): A list of hash algorithms used to hash
+        artifacts in a single pass. Default is the ARTIFACT_HASH_ALGORITHMS
+        setting.
+
+    hash_executor (optional): "thread" or "process" pool used to hash
+        artifacts, if hash_workers is greater than 1. Default is the
+        ARTIFACT_HASH_EXECUTOR setting.
+
   Raises:
     securesystemslib.exceptions.FormatError: Passed arguments are malformed.
 
@@ -969,6 +1976,9 @@ def in_toto_record_stop(
     if base_path:
         _check_str(base_path)
 
+    if hash_algorithms:
+        _check_str_list(hash_algorithms)
+
     if metadata_directory:
         _check_str(metadata_directory)
 
@@ -1074,6 +2084,10 @@ def in_toto_record_stop(
         follow_symlink_dirs=True,
         normalize_line_endings=normalize_line_endings,
         lstrip_paths=lstrip_paths,
+        hash_workers=hash_workers,
+        hash_executor=hash_executor,
+        hash_cache_dir=hash_cache_dir,
+        hash_algorithms=hash_algorithms,
     )
 
     if command:
@@ -1122,6 +2136,37 @@ def in_toto_record_stop(
     os.remove(unfinished_fn)
 
 
+async def in_toto_record_start_async(*args, executor=None, **kwargs):
+    """Generates preliminary link metadata, asynchronously.
+
+    Like ``in_toto_record_start``, which is called with the passed arguments
+    in ``executor``, so that recording materials, and signing and writing
+    link metadata do not block the event loop. Default is the default
+    executor of the running event loop.
+
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, functools.partial(in_toto_record_start, *args, **kwargs)
+    )
+
+
+async def in_toto_record_stop_async(*args, executor=None, **kwargs):
+    """Finalizes preliminary link metadata generated with in_toto_record_start,
+    asynchronously.
+
+    Like ``in_toto_record_stop``, which is called with the passed arguments
+    in ``executor``, so that recording products, and signing and writing
+    link metadata do not block the event loop. Default is the default
+    executor of the running event loop.
+
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, functools.partial(in_toto_record_stop, *args, **kwargs)
+    )
+
+
 def in_toto_match_products(
     link, paths=None, exclude_patterns=None, lstrip_paths=None
 ):
@@ -1139,13 +2184,22 @@ def in_toto_match_products(
       A 3-tuple with artifact names that are
       - only in products,
       - not in products,
-      - have different hashes.
+      - have different hashes, i.e. different digests for any hash algorithm
+        of the product, or no digest for it at all.
     """
     if paths is None:
         paths = ["."]
 
+    # Record local artifacts with the hash algorithms of the link products
+    hash_algorithms = sorted(
+        {algorithm for hashes in link.products.values() for algorithm in hashes}
+    )
+
     artifacts = record_artifacts_as_dict(
-        paths, exclude_patterns=exclude_patterns, lstrip_paths=lstrip_paths
+        paths,
+        exclude_patterns=exclude_patterns,
+        lstrip_paths=lstrip_paths,
+        hash_algorithms=hash_algorithms or None,
     )
 
     artifact_names = artifacts.keys()
@@ -1153,10 +2207,14 @@ def in_toto_match_products(
 
     only_products = product_names - artifact_names
     not_in_products = artifact_names - product_names
-    differ = {
-        name
-        for name in product_names & artifact_names
-        if link.products[name] != artifacts[name]
-    }
+    differ = set()
+    for name in product_names & artifact_names:
+        hashes = link.products[name]
+        # Local artifacts were recorded with all hash algorithms of products
+        local_hashes = {
+            algorithm: artifacts[name].get(algorithm) for algorithm in hashes
+        }
+        if not hashes or hashes != local_hashes:
+            differ.add(name)
 
     return only_products, not_in_products, differ
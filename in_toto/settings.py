@@ -40,3 +40,60 @@ ARTIFACT_BASE_PATH = None
 
 # Max timeout for the in-toto-run command
 LINK_CMD_EXEC_TIMEOUT = 10
+
+# Policy to store standard streams of the in-toto-run command, if recorded, in
+# the link metadata. One of "full", "truncate" (head and tail only), "digest"
+# (length and digest only) or "spill" (sidecar file referenced by digest).
+BYPRODUCT_CAPTURE = "full"
+
+# Number of bytes kept of the head and of the tail of each recorded stream,
+# if BYPRODUCT_CAPTURE is "truncate".
+BYPRODUCT_CAPTURE_SIZE = 65536
+
+# Number of workers used to hash artifacts when recording materials and
+# products. The default of 1 hashes artifacts serially, one after another.
+ARTIFACT_HASH_WORKERS = 1
+
+# Executor used to hash artifacts, if ARTIFACT_HASH_WORKERS is greater than 1.
+# Use "thread" for I/O-bound trees with many small files, and "process" for
+# CPU-bound hashing of few large files.
+ARTIFACT_HASH_EXECUTOR = "thread"
+
+# Directory of a persistent cache for artifact hashes. If set, files whose
+# device, inode, size, modification and change time are unchanged since they
+# were last recorded are not read again. If not set, no cache is used.
+ARTIFACT_HASH_CACHE_DIR = None
+
+# Max number of entries in the artifact hash cache. Least recently used
+# entries are evicted first.
+ARTIFACT_HASH_CACHE_SIZE = 1000000
+
+# Hash algorithms used to hash artifacts when recording materials and products.
+# All algorithms are computed in a single pass over each artifact, and recorded
+# in the artifact hash dictionaries of the resulting link metadata.
+ARTIFACT_HASH_ALGORITHMS = ["sha256"]
+
+# JSON library used to load and dump metadata. One of "json" (standard
+# library) or "orjson" (optional, faster). If not set, "orjson" is used if it
+# is installed. Dumped metadata is byte-for-byte the same with either library.
+JSON_BACKEND = None
+
+# Number of threads used to load and parse link metadata files of a layout
+# during verification, e.g. to hide latency of network filesystems.
+LINK_LOAD_WORKERS = 8
+
+# Number of workers used to verify link signatures during verification. The
+# default of 1 verifies signatures serially, one after another.
+SIGNATURE_VERIFICATION_WORKERS = 1
+
+# Executor used to verify link signatures, if SIGNATURE_VERIFICATION_WORKERS
+# is greater than 1. Use "process" to scale public key cryptography and
+# canonical JSON encoding of large links with cores.
+SIGNATURE_VERIFICATION_EXECUTOR = "thread"
+
+# Number of layout inspections run concurrently during verification. The
+# default of 1 runs inspections one after another, in layout order. Inspections,
+# which MATCH artifacts from each other, always run in layout order. Other
+# inspections may run concurrently in the same working directory, and should
+# hence not depend on files written by each other.
+INSPECTION_WORKERS = 1
@@ -26,9 +26,14 @@
 """
 
 import datetime
-import fnmatch
 import logging
 import os
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 
 import iso8601
 import securesystemslib.exceptions
@@ -42,6 +47,7 @@ import in_toto.models.link
 import in_toto.rulelib
 import in_toto.runlib
 import in_toto.settings
+from in_toto._rule_engine import ArtifactQueue, filter_artifacts
 from in_toto.exceptions import (
     BadReturnValueError,
     LayoutExpiredError,
@@ -50,12 +56,16 @@ from in_toto.exceptions import (
     ThresholdVerificationError,
 )
 from in_toto.formats import _check_parameter_dict, _check_public_keys
-from in_toto.models.metadata import Metadata
+from in_toto.models.metadata import Metablock, Metadata
+from in_toto.resolver import MemoryHashCache
 
 # Inherits from in_toto base logger (c.f. in_toto.log)
 LOG = logging.getLogger(__name__)
 
-RULE_TRACE = {}
+_VERIFICATION_EXECUTORS = {
+    "thread": ThreadPoolExecutor,
+    "process": ProcessPoolExecutor,
+}
 
 
 def _raise_on_bad_retval(return_value, command=None):
@@ -97,6 +107,17 @@ def _raise_on_bad_retval(return_value, command=None):
         raise BadReturnValueError(msg.format(what="zero"))
 
 
+def _load_link(path):
+    """Helper to load link (or sublayout) metadata, or to return None, if it
+    cannot be read."""
+    # FIXME: Should we really pass on IOError, or just skip inexistent links?
+    try:
+        return Metadata.load(path)
+
+    except IOError:
+        return None
+
+
 def load_links_for_layout(layout, link_dir_path):
     """
     <Purpose>
@@ -115,7 +136,8 @@ def load_links_for_layout(layout, link_dir_path):
 
 
     <Side Effects>
-      Calls function to read files from disk
+      Lists link directory and reads existing link files from disk, using up
+      to `in_toto.settings.LINK_LOAD_WORKERS` threads
 
     <Exceptions>
       in_toto.exceptions.LinkNotFoundError,
@@ -135,58 +157,155 @@ def load_links_for_layout(layout, link_dir_path):
 
 
     """
-    steps_metadata = {}
+    # Index existing files with a single directory listing, to only load links
+    # that exist, instead of trying to open a link for every authorized key
+    try:
+        with os.scandir(link_dir_path) as entries:
+            existing_filenames = {entry.name for entry in entries}
 
-    # Iterate over all the steps in the layout
-    for step in layout.steps:
-        links_per_step = {}
-
-        # We try to load a link for every authorized functionary, but don't fail
-        # if the file does not exist (authorized != required)
-        # FIXME: Should we really pass on IOError, or just skip inexistent links?
-        for authorized_keyid in step.pubkeys:
-            # Iterate over the authorized key and if present over subkeys
-            for keyid in [authorized_keyid] + list(
-                layout.keys.get(authorized_keyid, {}).get("subkeys", {}).keys()
-            ):
-                filename = in_toto.models.link.FILENAME_FORMAT.format(
-                    step_name=step.name, keyid=keyid
-                )
-                filepath = os.path.join(link_dir_path, filename)
+    except OSError:
+        existing_filenames = set()
 
-                try:
-                    metadata = Metadata.load(filepath)
+    steps_metadata = {}
+    with ThreadPoolExecutor(
+        max_workers=in_toto.settings.LINK_LOAD_WORKERS
+    ) as executor:
+        # Load and parse existing links of all steps concurrently
+        futures_per_step = []
+        for step in layout.steps:
+            futures = {}
+
+            # We load a link for every authorized functionary, but don't fail
+            # if it does not exist (authorized != required)
+            for authorized_keyid in step.pubkeys:
+                # Iterate over the authorized key and if present over subkeys
+                for keyid in [authorized_keyid] + list(
+                    layout.keys.get(authorized_keyid, {})
+                    .get("subkeys", {})
+                    .keys()
+                ):
+                    filename = in_toto.models.link.FILENAME_FORMAT.format(
+                        step_name=step.name, keyid=keyid
+                    )
+                    if filename in existing_filenames:
+                        futures[keyid] = executor.submit(
+                            _load_link, os.path.join(link_dir_path, filename)
+                        )
+
+            futures_per_step.append((step, futures))
+
+        # Iterate over all the steps in the layout
+        for step, futures in futures_per_step:
+            links_per_step = {}
+            for keyid, future in futures.items():
+                metadata = future.result()
+                if metadata is not None:
                     links_per_step[keyid] = metadata
 
-                except IOError:
-                    pass
-
-        # This is only a preliminary threshold check, based on (authorized)
-        # filenames, to fail early. A more thorough signature-based threshold
-        # check is indispensable.
-        if len(links_per_step) < step.threshold:
-            raise in_toto.exceptions.LinkNotFoundError(
-                "Step '{0}' requires '{1}'"
-                " link metadata file(s), found '{2}'.".format(
-                    step.name, step.threshold, len(links_per_step)
+            # This is only a preliminary threshold check, based on (authorized)
+            # filenames, to fail early. A more thorough signature-based
+            # threshold check is indispensable.
+            if len(links_per_step) < step.threshold:
+                raise in_toto.exceptions.LinkNotFoundError(
+                    "Step '{0}' requires '{1}'"
+                    " link metadata file(s), found '{2}'.".format(
+                        step.name, step.threshold, len(links_per_step)
+                    )
                 )
-            )
 
-        steps_metadata[step.name] = links_per_step
+            steps_metadata[step.name] = links_per_step
 
     return steps_metadata
 
 
+def _record_inspection_artifacts(paths, hash_cache):
+    """Helper to record artifacts at paths relative to the working directory,
+    regardless of the ARTIFACT_BASE_PATH setting."""
+    return in_toto.runlib.record_artifacts_as_dict(
+        paths,
+        base_path=os.curdir,
+        follow_symlink_dirs=True,
+        hash_cache=hash_cache,
+    )
+
+
+def _run_inspection(inspection, materials, hash_cache, timeout):
+    """Helper to run inspection command and return Metablock with the
+    resulting link.
+
+    Artifacts in the working directory are recorded as products, and as
+    materials, unless a snapshot of the working directory is passed.
+    """
+    LOG.info("Executing command for inspection '%s'...", inspection.name)
+
+    if materials is None:
+        materials = _record_inspection_artifacts(["."], hash_cache)
+
+    byproducts = {}
+    if inspection.run:
+        byproducts = in_toto.runlib.execute_link(inspection.run, False, timeout)
+
+    products = _record_inspection_artifacts(["."], hash_cache)
+
+    return Metablock(
+        signed=in_toto.models.link.Link(
+            name=inspection.name,
+            materials=materials,
+            products=products,
+            command=inspection.run,
+            byproducts=byproducts,
+        )
+    )
+
+
+def _get_inspection_dependencies(inspections):
+    """Helper to return list of sets of indices of the inspections, which each
+    inspection must run after.
+
+    If an inspection MATCHes artifacts from another inspection, the one that
+    comes later in the layout runs after the other one.
+    """
+    index_for_name = {
+        inspection.name: idx for idx, inspection in enumerate(inspections)
+    }
+    dependencies = [set() for _ in inspections]
+
+    for idx, inspection in enumerate(inspections):
+        for rule in (
+            inspection.expected_materials + inspection.expected_products
+        ):
+            rule_data = in_toto.rulelib.unpack_rule(rule)
+            if rule_data["rule_type"] != "match":
+                continue
+
+            other_idx = index_for_name.get(rule_data["dest_name"])
+            if other_idx is None or other_idx == idx:
+                continue
+
+            dependencies[max(idx, other_idx)].add(min(idx, other_idx))
+
+    return dependencies
+
+
 def run_all_inspections(
     layout,
     persist_inspection_links,
     timeout=in_toto.settings.LINK_CMD_EXEC_TIMEOUT,
+    inspection_workers=None,
 ):
     """
     <Purpose>
       Extracts all inspections from a passed Layout's inspect field and
-      iteratively runs each command defined in the Inspection's `run` field using
-      `runlib.in_toto_run`, which returns a Link object.
+      runs each command defined in the Inspection's `run` field, recording
+      artifacts in the current working directory before and after in a Link
+      object.
+
+      Inspections run in layout order, or concurrently, if inspection_workers
+      is greater than 1. Inspections, which MATCH artifacts from each other,
+      always run in layout order. The working directory is recorded once before
+      all inspections, and again only after inspections that changed it, i.e.
+      an inspection's materials are the products of the preceding inspection,
+      if no other inspection ran in the meantime.
 
       If a link command returns non-zero the verification is aborted.
 
@@ -202,10 +321,17 @@ def run_all_inspections(
               Integer that is the amount of seconds that the inspection run will
               fail after.
 
+      inspection_workers: (optional)
+              Number of inspections run concurrently. Default is
+              `in_toto.settings.INSPECTION_WORKERS`.
+
     <Exceptions>
       Calls function that raises BadReturnValueError if an inspection returned
       non-int or non-zero.
 
+      ValueError
+              If inspection_workers is invalid.
+
     <Returns>
       A dictionary of metadata about the executed inspections, e.g.:
 
@@ -217,44 +343,98 @@ def run_all_inspections(
       }
 
     """
+    # pylint: disable=too-many-locals
+    if inspection_workers is None:
+        inspection_workers = in_toto.settings.INSPECTION_WORKERS
+
+    if (
+        not isinstance(inspection_workers, int)
+        or isinstance(inspection_workers, bool)
+        or inspection_workers < 1
+    ):
+        raise ValueError("'inspection_workers' must be positive integer")
+
     inspection_links_dict = {}
-    for inspection in layout.inspect:
-        LOG.info("Executing command for inspection '%s'...", inspection.name)
-
-        # FIXME: We don't want to use the base path for runlib so we patch this
-        # for now. This will not stay!
-        base_path_backup = in_toto.settings.ARTIFACT_BASE_PATH
-        in_toto.settings.ARTIFACT_BASE_PATH = None
-
-        # FIXME: What should we record as material/product?
-        # Is the current directory a sensible default? In general?
-        # If so, we should probably make it a default in run_link
-        # We could use artifact rule paths.
-        material_list = product_list = ["."]
-        link = in_toto.runlib.in_toto_run(
-            inspection.name,
-            material_list,
-            product_list,
-            inspection.run,
-            timeout=timeout,
-        )
+    inspections = layout.inspect
+    if not inspections:
+        return inspection_links_dict
+
+    dependencies = _get_inspection_dependencies(inspections)
+    pending = list(range(len(inspections)))
+    finished = set()
+
+    # Share hash cache between all inspections, to only hash artifacts that
+    # were created or modified by an inspection command, and share a snapshot
+    # of the working directory as materials for inspections that start before
+    # any inspection command runs.
+    hash_cache = MemoryHashCache()
+    snapshot = _record_inspection_artifacts(["."], hash_cache)
+
+    # Map futures of running inspections to their index, and to whether no
+    # other inspection ran concurrently
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=inspection_workers) as executor:
+        while pending or running:
+            # Start inspections, whose dependencies finished, in layout order
+            for idx in list(pending):
+                if len(running) >= inspection_workers:
+                    break
 
-        _raise_on_bad_retval(
-            link.signed.byproducts.get("return-value"), inspection.run
-        )
+                if not dependencies[idx] <= finished:
+                    continue
 
-        inspection_links_dict[inspection.name] = link.signed
+                for running_inspection in running.values():
+                    running_inspection[1] = False
 
-        # If client requests persistent inspection links,
-        # Dump the inspection link file for auditing
-        # Keep in mind that this pollutes the verifier's (client's) filesystem.
-        if persist_inspection_links:
-            filename = in_toto.models.link.FILENAME_FORMAT_SHORT.format(
-                step_name=inspection.name
-            )
-            link.dump(filename)
+                future = executor.submit(
+                    _run_inspection,
+                    inspections[idx],
+                    snapshot,
+                    hash_cache,
+                    timeout,
+                )
+                running[future] = [idx, not running]
+                pending.remove(idx)
+
+            # Snapshot is stale, once an inspection command may have run
+            snapshot = None
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda future: running[future][0]):
+                idx, exclusive = running.pop(future)
+                inspection = inspections[idx]
+                link = future.result()
+
+                _raise_on_bad_retval(
+                    link.signed.byproducts.get("return-value"), inspection.run
+                )
+
+                inspection_links_dict[inspection.name] = link.signed
+                finished.add(idx)
+
+                # Products of an inspection that ran alone are a snapshot of
+                # the working directory for the next inspection
+                if exclusive and not running:
+                    snapshot = link.signed.products
+
+                # If client requests persistent inspection links,
+                # Dump the inspection link file for auditing
+                # Keep in mind that this pollutes the verifier's (client's)
+                # filesystem.
+                if persist_inspection_links:
+                    filename = in_toto.models.link.FILENAME_FORMAT_SHORT.format(
+                        step_name=inspection.name
+                    )
+                    link.dump(filename)
 
-        in_toto.settings.ARTIFACT_BASE_PATH = base_path_backup
+                    # Add link file to snapshot, as if it was recorded after
+                    if snapshot is not None:
+                        snapshot = dict(snapshot)
+                        snapshot.pop(filename, None)
+                        snapshot.update(
+                            _record_inspection_artifacts([filename], hash_cache)
+                        )
 
     return inspection_links_dict
 
@@ -400,7 +580,108 @@ def verify_metadata_signatures(metadata, keys_dict):
         metadata.verify_signature(verify_key)
 
 
-def verify_link_signature_thresholds(layout, steps_metadata):
+def _verify_link_signature(link, verification_key):
+    """Helper to verify link signature in a worker.
+
+    Returns a tuple of a boolean, which is True, if the signature is valid, and
+    the expired key, if the verification key is expired, or None.
+    """
+    try:
+        link.verify_signature(verification_key)
+
+    except SignatureVerificationError:
+        return False, None
+
+    # NOTE: KeyExpirationError cannot be unpickled, i.e. passed between
+    # processes. Return its key to re-create it.
+    except KeyExpirationError as e:
+        return False, e.key
+
+    return True, None
+
+
+def _verify_thresholds(authorized_links_per_step, results):
+    """Helper to count links with valid signatures per step, using results of
+    _verify_link_signature in the order of authorized links, and to check the
+    step thresholds. Returns valid and authorized links per step."""
+    # Dict for valid and authorized links of all steps of the layout
+    verified_steps_metadata = {}
+
+    # For each step of the layout check the signatures of corresponding links.
+    # Consider only links where the signature is valid and keys are authorized,
+    # and discard others.
+    # Only count one of multiple links signed with different subkeys of a main
+    # key towards link threshold.
+    # Only proceed with final product verification if threshold requirements are
+    # fulfilled.
+    for step, authorized_links in authorized_links_per_step:
+        # Dict for valid and authorized links of a given step
+        verified_key_link_dict = {}
+        # List of used keyids
+        used_main_keyids = []
+
+        # Do per step link threshold verification
+        for link_keyid, link, verification_key in authorized_links:
+            valid, expired_key = next(results)
+
+            # Skip invalidly signed links
+            if expired_key:
+                LOG.info("Skipping link. %s", KeyExpirationError(expired_key))
+                continue
+
+            if not valid:
+                LOG.info(
+                    "Skipping link. Broken link signature with keyid '%s'"
+                    " for step '%s'",
+                    link_keyid,
+                    step.name,
+                )
+                continue
+
+            # Warn if there are links signed by different subkeys of same main key
+            if verification_key["keyid"] in used_main_keyids:
+                LOG.warning(
+                    "Found links signed by different subkeys of the same main"
+                    " key '%s' for step '%s'. Only one of them is counted towards the"
+                    " step threshold.",
+                    verification_key["keyid"],
+                    step.name,
+                )
+
+            used_main_keyids.append(verification_key["keyid"])
+
+            # Keep only links with valid and authorized signature
+            verified_key_link_dict[link_keyid] = link
+
+        # For each step, verify that we have enough validly signed links from
+        # distinct authorized functionaries. Links signed by different subkeys of
+        # the same main key are counted only once towards the threshold.
+        valid_authorized_links_cnt = len(set(used_main_keyids))
+        # TODO: To guarantee that links are signed by different functionaries
+        # we rely on the layout to not carry duplicate verification keys under
+        # different dictionary keys, e.g. {keyid1: KEY1, keyid2: KEY1}
+        # Maybe we should add such a check to the layout validation? Or here?
+        if valid_authorized_links_cnt < step.threshold:
+            raise ThresholdVerificationError(
+                "Step '{}' requires at least '{}' links"
+                " validly signed by different authorized functionaries. Only"
+                " found '{}'".format(
+                    step.name, step.threshold, valid_authorized_links_cnt
+                )
+            )
+
+        # Add all good links of this step to the dictionary of links of all steps
+        verified_steps_metadata[step.name] = verified_key_link_dict
+
+    return verified_steps_metadata
+
+
+def verify_link_signature_thresholds(
+    layout,
+    steps_metadata,
+    verification_workers=None,
+    verification_executor=None,
+):
     """
     <Purpose>
       Verify that for each step of the layout there are at least `threshold`
@@ -428,18 +709,48 @@ def verify_link_signature_thresholds(layout, steps_metadata):
                 }, ...
               }
 
+      verification_workers: (optional)
+              Number of workers used to verify link signatures concurrently.
+              Default is `in_toto.settings.SIGNATURE_VERIFICATION_WORKERS`.
+
+      verification_executor: (optional)
+              "thread" or "process" pool used, if verification_workers is
+              greater than 1. Default is
+              `in_toto.settings.SIGNATURE_VERIFICATION_EXECUTOR`.
+
     <Exceptions>
       ThresholdVerificationError
               If any of the steps of the passed layout does not have enough
               (`step.threshold`) links signed by different authorized
               functionaries.
 
+      ValueError
+              If verification_workers or verification_executor is invalid.
+
     <Returns>
       A steps_metadata containing only links with valid signatures created by
       authorized functionaries.
 
     """
     # pylint: disable=too-many-branches, too-many-locals
+    if verification_workers is None:
+        verification_workers = in_toto.settings.SIGNATURE_VERIFICATION_WORKERS
+
+    if verification_executor is None:
+        verification_executor = in_toto.settings.SIGNATURE_VERIFICATION_EXECUTOR
+
+    if (
+        not isinstance(verification_workers, int)
+        or isinstance(verification_workers, bool)
+        or verification_workers < 1
+    ):
+        raise ValueError("'verification_workers' must be positive integer")
+
+    if verification_executor not in _VERIFICATION_EXECUTORS:
+        raise ValueError(
+            "'verification_executor' must be one of "
+            f"{', '.join(repr(name) for name in _VERIFICATION_EXECUTORS)}"
+        )
 
     # Create an inverse keys-subkeys dictionary, with subkey keyids as
     # dictionary keys and main keys as dictionary values. This will be
@@ -451,23 +762,11 @@ def verify_link_signature_thresholds(layout, steps_metadata):
         for sub_keyid in main_key.get("subkeys", []):
             main_keys_for_subkeys[sub_keyid] = main_key
 
-    # Dict for valid and authorized links of all steps of the layout
-    verified_steps_metadata = {}
-
-    # For each step of the layout check the signatures of corresponding links.
-    # Consider only links where the signature is valid and keys are authorized,
-    # and discard others.
-    # Only count one of multiple links signed with different subkeys of a main
-    # key towards link threshold.
-    # Only proceed with final product verification if threshold requirements are
-    # fulfilled.
+    # Find verification keys of links of all steps, in order, and skip links
+    # whose keyid is not authorized to sign links for the step.
+    authorized_links_per_step = []
     for step in layout.steps:
-        # Dict for valid and authorized links of a given step
-        verified_key_link_dict = {}
-        # List of used keyids
-        used_main_keyids = []
-
-        # Do per step link threshold verification
+        authorized_links = []
         for link_keyid, link in steps_metadata.get(step.name, {}).items():
             # Iterate over authorized keyids to find a key or subkey corresponding
             # to the given link and check if the link's keyid is authorized.
@@ -505,57 +804,44 @@ def verify_link_signature_thresholds(layout, steps_metadata):
                 )
                 continue
 
-            # Verify signature and skip invalidly signed links
-            try:
-                link.verify_signature(verification_key)
-
-            except SignatureVerificationError:
-                LOG.info(
-                    "Skipping link. Broken link signature with keyid '%s'"
-                    " for step '%s'",
-                    link_keyid,
-                    step.name,
-                )
-                continue
-
-            except KeyExpirationError as e:
-                LOG.info("Skipping link. %s", e)
-                continue
-
-            # Warn if there are links signed by different subkeys of same main key
-            if verification_key["keyid"] in used_main_keyids:
-                LOG.warning(
-                    "Found links signed by different subkeys of the same main"
-                    " key '%s' for step '%s'. Only one of them is counted towards the"
-                    " step threshold.",
-                    verification_key["keyid"],
-                    step.name,
-                )
-
-            used_main_keyids.append(verification_key["keyid"])
-
-            # Keep only links with valid and authorized signature
-            verified_key_link_dict[link_keyid] = link
+            authorized_links.append((link_keyid, link, verification_key))
+
+        authorized_links_per_step.append((step, authorized_links))
+
+    links = []
+    verification_keys = []
+    for _, authorized_links in authorized_links_per_step:
+        for _, link, verification_key in authorized_links:
+            links.append(link)
+            verification_keys.append(verification_key)
+
+    # Verify signatures of all authorized links, serially or in a worker pool.
+    # Results are consumed in order, so that errors are raised in the same
+    # order as with serial verification.
+    executor = None
+    futures = []
+    if verification_workers > 1 and len(links) > 1:
+        executor_cls = _VERIFICATION_EXECUTORS[verification_executor]
+        executor = executor_cls(max_workers=verification_workers)
+        futures = [
+            executor.submit(_verify_link_signature, link, verification_key)
+            for link, verification_key in zip(links, verification_keys)
+        ]
+        results = (future.result() for future in futures)
+    else:
+        results = map(_verify_link_signature, links, verification_keys)
 
-        # For each step, verify that we have enough validly signed links from
-        # distinct authorized functionaries. Links signed by different subkeys of
-        # the same main key are counted only once towards the threshold.
-        valid_authorized_links_cnt = len(set(used_main_keyids))
-        # TODO: To guarantee that links are signed by different functionaries
-        # we rely on the layout to not carry duplicate verification keys under
-        # different dictionary keys, e.g. {keyid1: KEY1, keyid2: KEY1}
-        # Maybe we should add such a check to the layout validation? Or here?
-        if valid_authorized_links_cnt < step.threshold:
-            raise ThresholdVerificationError(
-                "Step '{}' requires at least '{}' links"
-                " validly signed by different authorized functionaries. Only"
-                " found '{}'".format(
-                    step.name, step.threshold, valid_authorized_links_cnt
-                )
-            )
+    try:
+        verified_steps_metadata = _verify_thresholds(
+            authorized_links_per_step, results
+        )
 
-        # Add all good links of this step to the dictionary of links of all steps
-        verified_steps_metadata[step.name] = verified_key_link_dict
+    finally:
+        if executor:
+            # Don't verify remaining links, if threshold verification failed
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
 
     # Threshold verification succeeded, return valid and authorized links for
     # further verification
@@ -701,54 +987,29 @@ def verify_match_rule(rule_data, artifacts_queue, source_artifacts, links):
     # Extract destination artifacts from destination link
     dest_artifacts = getattr(dest_link, rule_data["dest_type"])
 
-    # Filter part 1 - Filter artifacts using optional source prefix, and subtract
-    # prefix before filtering with rule pattern (see filter part 2) to prevent
-    # globbing in the prefix.
-    if rule_data["source_prefix"]:
-        filtered_source_paths = []
-        # Add trailing slash to source prefix if it does not exist
-        normalized_source_prefix = os.path.join(
-            rule_data["source_prefix"], ""
-        ).replace("\\", "/")
-
-        for artifact_path in artifacts_queue:
-            if artifact_path.startswith(normalized_source_prefix):
-                filtered_source_paths.append(
-                    artifact_path[len(normalized_source_prefix) :]
-                )
+    # Add trailing slash to optional source and destination prefixes, if they
+    # do not have one
+    source_prefix = rule_data["source_prefix"]
+    if source_prefix:
+        source_prefix = os.path.join(source_prefix, "").replace("\\", "/")
 
-    else:
-        filtered_source_paths = artifacts_queue
+    dest_prefix = rule_data["dest_prefix"]
+    if dest_prefix:
+        dest_prefix = os.path.join(dest_prefix, "").replace("\\", "/")
 
-    # Filter part 2 - glob above filtered artifact paths
-    filtered_source_paths = fnmatch.filter(
-        filtered_source_paths, rule_data["pattern"]
+    # Filter artifacts using optional source prefix, and the rule pattern on the
+    # remaining path, to prevent globbing in the prefix.
+    filtered_source_paths = filter_artifacts(
+        artifacts_queue, rule_data["pattern"], source_prefix
     )
 
     # Iterate over filtered source paths and try to match the corresponding
     # source artifact hash with the corresponding destination artifact hash
-    for path in filtered_source_paths:
-        # If a source prefix was specified, we subtracted the prefix above before
-        # globbing. We have to re-prepend the prefix in order to retrieve the
-        # corresponding source artifact below.
-        if rule_data["source_prefix"]:
-            full_source_path = os.path.join(
-                rule_data["source_prefix"], path
-            ).replace("\\", "/")
-
-        else:
-            full_source_path = path
-
+    for full_source_path in filtered_source_paths:
         # If a destination prefix was specified, the destination artifact should
-        # be queried with the full destination path, i.e. the prefix joined with
-        # the globbed path.
-        if rule_data["dest_prefix"]:
-            full_dest_path = os.path.join(
-                rule_data["dest_prefix"], path
-            ).replace("\\", "/")
-
-        else:
-            full_dest_path = path
+        # be queried with the full destination path, i.e. the source path with
+        # the source prefix replaced by the destination prefix.
+        full_dest_path = dest_prefix + full_source_path[len(source_prefix) :]
 
         # Extract source artifact hash dict
         # We know the source artifact is available, it is also in the queue
@@ -801,10 +1062,14 @@ def verify_create_rule(rule_pattern, artifacts_queue, materials, products):
 
     """
     # Filter queued artifacts using the rule pattern
-    filtered_artifacts = fnmatch.filter(artifacts_queue, rule_pattern)
+    filtered_artifacts = filter_artifacts(artifacts_queue, rule_pattern)
 
     # Consume filtered artifacts that are products but not materials
-    consumed = set(filtered_artifacts) & (products - materials)
+    consumed = {
+        path
+        for path in filtered_artifacts
+        if path in products and path not in materials
+    }
 
     return consumed
 
@@ -840,10 +1105,14 @@ def verify_delete_rule(rule_pattern, artifacts_queue, materials, products):
 
     """
     # Filter queued artifacts using the rule pattern
-    filtered_artifacts = fnmatch.filter(artifacts_queue, rule_pattern)
+    filtered_artifacts = filter_artifacts(artifacts_queue, rule_pattern)
 
     # Consume filtered artifacts that are materials but not products
-    consumed = set(filtered_artifacts) & (materials - products)
+    consumed = {
+        path
+        for path in filtered_artifacts
+        if path in materials and path not in products
+    }
 
     return consumed
 
@@ -879,12 +1148,14 @@ def verify_modify_rule(rule_pattern, artifacts_queue, materials, products):
 
     """
     # Filter queued artifacts using the rule pattern
-    filtered_artifacts = fnmatch.filter(artifacts_queue, rule_pattern)
+    filtered_artifacts = filter_artifacts(artifacts_queue, rule_pattern)
 
     # Filter filtered artifacts that are materials and products
-    filtered_artifacts = (
-        set(filtered_artifacts) & set(materials.keys()) & set(products.keys())
-    )
+    filtered_artifacts = [
+        path
+        for path in filtered_artifacts
+        if path in materials and path in products
+    ]
 
     # Consume filtered artifacts that have different hashes
     consumed = set()
@@ -918,13 +1189,13 @@ def verify_allow_rule(rule_pattern, artifacts_queue):
 
     """
     # Filter queued artifacts using the rule pattern
-    filtered_artifacts = fnmatch.filter(artifacts_queue, rule_pattern)
+    filtered_artifacts = filter_artifacts(artifacts_queue, rule_pattern)
 
     # Consume all filtered artifacts
     return set(filtered_artifacts)
 
 
-def verify_disallow_rule(rule_pattern, artifacts_queue):
+def verify_disallow_rule(rule_pattern, artifacts_queue, rule_trace=None):
     """
     <Purpose>
       Raises RuleVerificationError if rule pattern applies to any artifacts in
@@ -941,6 +1212,10 @@ def verify_disallow_rule(rule_pattern, artifacts_queue):
       artifacts_queue:
               Not yet consumed artifacts (paths only).
 
+      rule_trace: (optional)
+              A trace of the previously applied rules of the item, which is
+              added to the error message (see verify_item_rules).
+
     <Exceptions>
       RuleVerificationError
           if the rule pattern filters artifacts in the artifact queue.
@@ -952,18 +1227,18 @@ def verify_disallow_rule(rule_pattern, artifacts_queue):
       None.
 
     """
-    filtered_artifacts = fnmatch.filter(artifacts_queue, rule_pattern)
+    filtered_artifacts = filter_artifacts(artifacts_queue, rule_pattern)
 
     if filtered_artifacts:
         raise RuleVerificationError(
             "'DISALLOW {}' matched the following "
             "artifacts: {}\n{}".format(
-                rule_pattern, filtered_artifacts, _get_artifact_rule_traceback()
+                rule_pattern, filtered_artifacts, rule_trace or ""
             )
         )
 
 
-def verify_require_rule(filename, artifacts_queue):
+def verify_require_rule(filename, artifacts_queue, rule_trace=None):
     """
     <Purpose>
       Raises RuleVerificationError if the filename provided does not exist in the
@@ -978,6 +1253,10 @@ def verify_require_rule(filename, artifacts_queue):
       artifacts_queue:
               Not yet consumed artifacts (paths only).
 
+      rule_trace: (optional)
+              A trace of the previously applied rules of the item, which is
+              added to the error message (see verify_item_rules).
+
     <Exceptions>
       RuleVerificationError:
         if the filename is not present in the artifacts queue
@@ -995,36 +1274,51 @@ def verify_require_rule(filename, artifacts_queue):
             "in: {queue}\n{traceback}".format(
                 filename=filename,
                 queue=artifacts_queue,
-                traceback=_get_artifact_rule_traceback(),
+                traceback=rule_trace or "",
             )
         )
 
 
-def _get_artifact_rule_traceback():
-    """Build and return string form global `RULE_TRACE` which may be used as
-    error message for RuleVerificationError.
+class _RuleTrace:
+    """Trace of the artifact rules applied to the materials or products of an
+    item, which is formatted as error message for RuleVerificationError.
+
+    Only the artifacts consumed by each rule are recorded. The queue after each
+    rule is rebuilt from the item's artifacts, when the trace is formatted.
 
     """
-    traceback_str = "Full trace for 'expected_{0}' of item '{1}':\n".format(
-        RULE_TRACE["source_type"], RULE_TRACE["source_name"]
-    )
 
-    # Show all materials and products available in the beginning and
-    # label the one that is used to generate a queue.
-    for source_type in ["materials", "products"]:
-        traceback_str += "Available {}{}:\n{}\n".format(
-            source_type,
-            [" (used for queue)", ""][RULE_TRACE["source_type"] != source_type],
-            RULE_TRACE[source_type],
-        )
+    def __init__(self, source_name, source_type, link):
+        self.source_name = source_name
+        self.source_type = source_type
+        self.link = link
+        self.entries = []
 
-    for trace_entry in RULE_TRACE["trace"]:
-        traceback_str += "Queue after '{0}':\n".format(
-            " ".join(trace_entry["rule"])
+    def append(self, rule, consumed):
+        """Record rule and the artifacts it consumed."""
+        self.entries.append((rule, consumed))
+
+    def __str__(self):
+        traceback_str = "Full trace for 'expected_{0}' of item '{1}':\n".format(
+            self.source_type, self.source_name
         )
-        traceback_str += "{}\n".format(trace_entry["queue"])
 
-    return traceback_str
+        # Show all materials and products available in the beginning and
+        # label the one that is used to generate a queue.
+        for source_type in ["materials", "products"]:
+            traceback_str += "Available {}{}:\n{}\n".format(
+                source_type,
+                [" (used for queue)", ""][self.source_type != source_type],
+                list(getattr(self.link, source_type)),
+            )
+
+        artifacts_queue = set(getattr(self.link, self.source_type))
+        for rule, consumed in self.entries:
+            artifacts_queue -= consumed
+            traceback_str += "Queue after '{0}':\n".format(" ".join(rule))
+            traceback_str += "{}\n".format(sorted(artifacts_queue))
+
+        return traceback_str
 
 
 def verify_item_rules(source_name, source_type, rules, links):
@@ -1080,7 +1374,7 @@ def verify_item_rules(source_name, source_type, rules, links):
           if a REQUIRE rule does not find a required artifact.
 
     <Side Effects>
-      Clears and populates the global RULE_TRACE data structure.
+      None.
 
     """
     if source_type not in ["materials", "products"]:
@@ -1090,27 +1384,19 @@ def verify_item_rules(source_name, source_type, rules, links):
         )
 
     # Create shortcuts to item's materials and products (including hashes),
-    # required to verify "modify" and "match" rules.
+    # required to verify "modify" and "match" rules. All other rules only
+    # require their paths, i.e. the dict keys.
     materials_dict = links[source_name].materials
     products_dict = links[source_name].products
 
-    # All other rules only require materials or products paths (without hashes)
-    materials_paths = set(materials_dict.keys())
-    products_paths = set(products_dict.keys())
-
     # Depending on the source type we create the artifact queue from the item's
     # materials or products and use it to keep track of (not) consumed artifacts.
     # The queue also only contains aritfact keys (without hashes)
     artifacts = getattr(links[source_name], source_type)
-    artifacts_queue = set(artifacts.keys())
+    artifacts_queue = ArtifactQueue(artifacts.keys())
 
-    # Reset and re-populate rule traceback info dict for a rich error message
-    RULE_TRACE.clear()
-    RULE_TRACE["source_name"] = source_name
-    RULE_TRACE["source_type"] = source_type
-    RULE_TRACE["materials"] = list(materials_dict)
-    RULE_TRACE["products"] = list(products_dict)
-    RULE_TRACE["trace"] = []
+    # Record applied rules for a rich error message
+    rule_trace = _RuleTrace(source_name, source_type, links[source_name])
 
     # Process rules and remove consumed items from queue in each iteration
     for rule in rules:
@@ -1132,12 +1418,18 @@ def verify_item_rules(source_name, source_type, rules, links):
 
         elif _type == "create":
             consumed = verify_create_rule(
-                pattern, artifacts_queue, materials_paths, products_paths
+                pattern,
+                artifacts_queue,
+                materials_dict.keys(),
+                products_dict.keys(),
             )
 
         elif _type == "delete":
             consumed = verify_delete_rule(
-                pattern, artifacts_queue, materials_paths, products_paths
+                pattern,
+                artifacts_queue,
+                materials_dict.keys(),
+                products_dict.keys(),
             )
 
         elif _type == "modify":
@@ -1151,10 +1443,10 @@ def verify_item_rules(source_name, source_type, rules, links):
         # It's up to the "disallow" and "require" rule to raise an error if
         # artifacts were not consumed as intended
         elif _type == "disallow":
-            verify_disallow_rule(pattern, artifacts_queue)
+            verify_disallow_rule(pattern, artifacts_queue, rule_trace)
 
         elif _type == "require":
-            verify_require_rule(pattern, artifacts_queue)
+            verify_require_rule(pattern, artifacts_queue, rule_trace)
 
         else:  # pragma: no cover (unreachable)
             raise securesystemslib.exceptions.FormatError(
@@ -1163,10 +1455,7 @@ def verify_item_rules(source_name, source_type, rules, links):
 
         artifacts_queue -= consumed
 
-        # Append rule and copy of queue to global info for a rich error message
-        RULE_TRACE["trace"].append(
-            {"rule": rule, "queue": list(artifacts_queue)}
-        )
+        rule_trace.append(rule, consumed)
 
 
 def verify_all_item_rules(items, links):
@@ -1342,7 +1631,12 @@ def reduce_chain_links(chain_link_dict):
 
 
 def verify_sublayouts(
-    layout, steps_metadata, superlayout_link_dir_path, inspect_timeout
+    layout,
+    steps_metadata,
+    superlayout_link_dir_path,
+    inspect_timeout,
+    verification_workers=None,
+    inspection_workers=None,
 ):
     """
     <Purpose>
@@ -1376,6 +1670,14 @@ def verify_sublayouts(
               Integer value that is the number of seconds to pass to the run
               command to timeout the subprocess within.
 
+      verification_workers: (optional)
+              Number of workers used to verify link signatures of sublayouts
+              concurrently (see `verify_link_signature_thresholds`).
+
+      inspection_workers: (optional)
+              Number of inspections of sublayouts run concurrently (see
+              `run_all_inspections`).
+
     <Exceptions>
       raises an Exception if verification of the delegated step fails.
 
@@ -1394,6 +1696,7 @@ def verify_sublayouts(
       }
 
     """
+    # pylint: disable=too-many-locals
     chain_link_dict = {}
 
     for step_name, metadata_dict in steps_metadata.items():
@@ -1431,6 +1734,8 @@ def verify_sublayouts(
                     link_dir_path=sublayout_link_dir_path,
                     step_name=step_name,
                     inspect_timeout=inspect_timeout,
+                    verification_workers=verification_workers,
+                    inspection_workers=inspection_workers,
                 )
 
                 # Replace the layout object with the link object returned
@@ -1507,6 +1812,8 @@ def in_toto_verify(
     step_name="",
     persist_inspection_links=True,
     inspect_timeout=in_toto.settings.LINK_CMD_EXEC_TIMEOUT,
+    verification_workers=None,
+    inspection_workers=None,
 ):
     """Performs complete in-toto supply chain verification for a final product.
 
@@ -1565,6 +1872,14 @@ def in_toto_verify(
           in_toto.settings.LINK_CMD_EXEC_TIMEOUT in seconds which ends up timing
           out the run command subprocess if it runs over.
 
+      verification_workers (optional): An integer indicating the number of
+          workers used to verify link signatures concurrently, also of
+          sublayouts. Default is the SIGNATURE_VERIFICATION_WORKERS setting.
+
+      inspection_workers (optional): An integer indicating the number of
+          inspections run concurrently, also of sublayouts. Default is the
+          INSPECTION_WORKERS setting.
+
     Raises:
       securesystemslib.exceptions.FormatError: Passed parameters are malformed.
 
@@ -1619,11 +1934,18 @@ def in_toto_verify(
     steps_metadata = load_links_for_layout(layout, link_dir_path)
 
     LOG.info("Verifying link metadata signatures...")
-    steps_metadata = verify_link_signature_thresholds(layout, steps_metadata)
+    steps_metadata = verify_link_signature_thresholds(
+        layout, steps_metadata, verification_workers=verification_workers
+    )
 
     LOG.info("Verifying sublayouts...")
     chain_link_dict = verify_sublayouts(
-        layout, steps_metadata, link_dir_path, inspect_timeout
+        layout,
+        steps_metadata,
+        link_dir_path,
+        inspect_timeout,
+        verification_workers=verification_workers,
+        inspection_workers=inspection_workers,
     )
 
     LOG.info("Verifying alignment of reported commands...")
@@ -1641,7 +1963,10 @@ def in_toto_verify(
 
     LOG.info("Executing Inspection commands...")
     inspection_link_dict = run_all_inspections(
-        layout, persist_inspection_links, inspect_timeout
+        layout,
+        persist_inspection_links,
+        inspect_timeout,
+        inspection_workers=inspection_workers,
     )
 
     LOG.info("Verifying Inspection rules...")
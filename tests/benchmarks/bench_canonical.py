@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+# Copyright New York University and the in-toto contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+<Program Name>
+  bench_canonical.py
+
+<Purpose>
+  Compare canonical JSON encoding of links with different numbers of
+  artifacts in in-toto with securesystemslib's `encode_canonical`.
+
+  Run from the project root, e.g.:
+  `python -m tests.benchmarks.bench_canonical --artifacts 10000 100000 1000000`
+
+"""
+
+import argparse
+import time
+
+import attr
+from securesystemslib.formats import encode_canonical
+
+from in_toto.models._canonical import encode_canonical as fast_encode_canonical
+from in_toto.models.link import Link
+
+
+def _create_link(count):
+    """Return link with count materials and count products."""
+    artifacts = {
+        f"src/module{i // 100}/file{i}.py": {"sha256": f"{i:064x}"}
+        for i in range(count)
+    }
+    return Link(name="bench", materials=artifacts, products=dict(artifacts))
+
+
+def _measure(encode_func, link):
+    """Return seconds to encode link with encode_func and the result."""
+    start = time.perf_counter()
+    result = encode_func(link)
+    return time.perf_counter() - start, result
+
+
+def main():
+    """Run benchmark and print results as table."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--artifacts",
+        nargs="+",
+        type=int,
+        default=[10000, 100000, 1000000],
+        help="numbers of materials and of products per link",
+    )
+    args = parser.parse_args()
+
+    print(f"{'artifacts':>10} {'sslib s':>9} {'in-toto s':>10} {'speedup':>8}")
+    for count in args.artifacts:
+        link = _create_link(count)
+
+        baseline, expected = _measure(
+            lambda link: encode_canonical(attr.asdict(link)).encode("UTF-8"),
+            link,
+        )
+        optimized, result = _measure(fast_encode_canonical, link)
+        assert result == expected
+
+        print(
+            f"{count:>10} {baseline:>9.3f} {optimized:>10.3f} "
+            f"{baseline / optimized:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+# Copyright New York University and the in-toto contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+<Program Name>
+  bench_hashing.py
+
+<Purpose>
+  Compare throughput of artifact file hashing in the in-toto resolver with
+  securesystemslib's `digest_filename`, for files of different sizes.
+
+  Run from the project root, e.g.:
+  `python -m tests.benchmarks.bench_hashing --sizes 1KB 1MB 4GB`
+
+  NOTE: Large files are likely served from the page cache after they are
+  written. Drop caches between runs to measure cold reads.
+
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from securesystemslib.hash import digest_filename
+
+from in_toto.resolver._hashing import digest_file
+
+_UNITS = {"KB": 1024, "MB": 1024**2, "GB": 1024**3}
+
+# Repeat hashing until at least this many bytes are read per measurement
+_MIN_TOTAL_SIZE = 256 * 1024**2
+
+
+def _parse_size(size):
+    """Return number of bytes for size string, e.g. '4GB'."""
+    return int(size[:-2]) * _UNITS[size[-2:].upper()]
+
+
+def _write_file(path, size):
+    """Write file with pseudo-random content of passed size."""
+    block = os.urandom(min(size, 1024**2))
+    with open(path, "wb") as fp:
+        remaining = size
+        while remaining:
+            remaining -= fp.write(block[:remaining])
+
+
+def _measure(hash_func, path, size):
+    """Return throughput of hash_func for file at path in MB/s."""
+    rounds = max(1, _MIN_TOTAL_SIZE // size)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        hash_func(path, "sha256").hexdigest()
+
+    return rounds * size / (time.perf_counter() - start) / 1024**2
+
+
+def main():
+    """Run benchmark and print results as table."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=["1KB", "1MB", "4GB"],
+        help="file sizes to benchmark, e.g. '1KB 1MB 4GB'",
+    )
+    parser.add_argument(
+        "--dir",
+        default=None,
+        help="directory to write benchmark files to (default: temp dir)",
+    )
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'sslib MB/s':>12} {'in-toto MB/s':>14} {'speedup':>8}")
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp_dir:
+        for size_str in args.sizes:
+            size = _parse_size(size_str)
+            path = os.path.join(tmp_dir, size_str)
+            _write_file(path, size)
+
+            baseline = _measure(digest_filename, path, size)
+            optimized = _measure(
+                lambda path, algorithm: digest_file(path, [algorithm])[0],
+                path,
+                size,
+            )
+            print(
+                f"{size_str:>8} {baseline:>12.1f} {optimized:>14.1f} "
+                f"{optimized / baseline:>7.2f}x"
+            )
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
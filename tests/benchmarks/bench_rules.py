@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+# Copyright New York University and the in-toto contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+<Program Name>
+  bench_rules.py
+
+<Purpose>
+  Compare artifact rule verification of items with different numbers of
+  artifacts using indexed rule pattern evaluation with `fnmatch.filter` scans
+  of the whole artifact queue (or of the artifacts with a MATCH rule prefix).
+
+  Run from the project root, e.g.:
+  `python -m tests.benchmarks.bench_rules --artifacts 1000 10000 100000`
+
+"""
+
+import argparse
+import fnmatch
+import time
+from unittest.mock import patch
+
+from in_toto.models.link import Link
+from in_toto.verifylib import verify_item_rules
+
+_MODULES = 30
+
+
+def _create_links(count):
+    """Return links dict with link of step with count products, and link of
+    build step with the same products in a different directory."""
+    products = {
+        f"module{i % _MODULES}/file{i}.py": {"sha256": f"{i:064x}"}
+        for i in range(count)
+    }
+    return {
+        "bench": Link(
+            name="bench",
+            products={
+                f"src/{path}": hashes for path, hashes in products.items()
+            },
+        ),
+        "build": Link(
+            name="build",
+            products={
+                f"build/{path}": hashes for path, hashes in products.items()
+            },
+        ),
+    }
+
+
+def _create_rules():
+    """Return product rules with literal, prefix, suffix and regex patterns,
+    and MATCH rules with prefixes."""
+    rules = [["REQUIRE", "src/module0/file0.py"]]
+    for i in range(1, _MODULES):
+        if i % 2:
+            rules.append(["CREATE", f"src/module{i}/*"])
+        else:
+            rules.append(
+                [
+                    "MATCH",
+                    "*",
+                    "IN",
+                    f"src/module{i}",
+                    "WITH",
+                    "PRODUCTS",
+                    "IN",
+                    f"build/module{i}",
+                    "FROM",
+                    "build",
+                ]
+            )
+
+    rules += [
+        ["ALLOW", "src/module0/file0.py"],
+        ["CREATE", "*.py"],
+        ["DISALLOW", "src/module?/*"],
+        ["DISALLOW", "*"],
+    ]
+    return rules
+
+
+def _scan_filter(artifacts, pattern, prefix=""):
+    """Return full paths of artifacts with prefix, whose remainder is matched
+    by pattern, using a scan of all artifacts."""
+    return [
+        prefix + path
+        for path in fnmatch.filter(
+            [
+                path[len(prefix) :]
+                for path in artifacts
+                if path.startswith(prefix)
+            ],
+            pattern,
+        )
+    ]
+
+
+def _measure(links, rules):
+    """Return seconds to verify rules."""
+    start = time.perf_counter()
+    verify_item_rules("bench", "products", rules, links)
+    return time.perf_counter() - start
+
+
+def main():
+    """Run benchmark and print results as table."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--artifacts",
+        nargs="+",
+        type=int,
+        default=[1000, 10000, 100000],
+        help="numbers of products per link",
+    )
+    args = parser.parse_args()
+    rules = _create_rules()
+
+    print(
+        f"{'artifacts':>10} {'fnmatch s':>10} {'indexed s':>10} {'speedup':>8}"
+    )
+    for count in args.artifacts:
+        links = _create_links(count)
+
+        with patch("in_toto.verifylib.ArtifactQueue", set), patch(
+            "in_toto.verifylib.filter_artifacts", _scan_filter
+        ):
+            baseline = _measure(links, rules)
+
+        optimized = _measure(links, rules)
+
+        print(
+            f"{count:>10} {baseline:>10.3f} {optimized:>10.3f} "
+            f"{baseline / optimized:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
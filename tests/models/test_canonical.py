@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+# Copyright New York University and the in-toto contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Test in_toto.models._canonical.encode_canonical."""
+
+import unittest
+from pathlib import Path
+
+import attr
+import securesystemslib.formats
+from securesystemslib.exceptions import FormatError
+
+from in_toto.models._canonical import encode_canonical
+from in_toto.models.layout import Inspection, Layout, Step
+from in_toto.models.link import Link
+from in_toto.models.metadata import Metablock
+
+DEMO_FILES = Path(__file__).parent.parent / "demo_files"
+
+
+class TestEncodeCanonical(unittest.TestCase):
+    """Test encode_canonical returns the same as securesystemslib."""
+
+    def _assert_same(self, obj):
+        self.assertEqual(
+            encode_canonical(obj),
+            securesystemslib.formats.encode_canonical(attr.asdict(obj)).encode(
+                "UTF-8"
+            ),
+        )
+
+    def test_link(self):
+        artifacts = {
+            "b": {"sha256": "a" * 64},
+            'a/"quoted"\\path': {"sha512": "b" * 128, "sha256": "c" * 64},
+            "ä/\U0001f600": {},
+        }
+        self._assert_same(Link())
+        self._assert_same(
+            Link(
+                name="foo",
+                materials=artifacts,
+                products={"c": {"sha256": "d" * 64}},
+                byproducts={"stdout": 'out"\n', "return-value": 0},
+                command=["echo", "\\"],
+                environment={"workdir": "/tmp", "flag": True, "none": None},
+            )
+        )
+
+        # Not an artifact dict on last item
+        self._assert_same(Link(environment={"a": {"b": "c"}, "d": {"e": 1}}))
+        self._assert_same(Link(environment={"a": {"b": "c", "d": [1]}}))
+
+    def test_layout(self):
+        self._assert_same(Layout())
+        self._assert_same(
+            Layout(
+                steps=[
+                    Step(
+                        name="foo",
+                        expected_materials=[["ALLOW", "*"]],
+                        expected_command=["make"],
+                    )
+                ],
+                inspect=[Inspection(name="bar", run=["ls"])],
+                readme="readme",
+            )
+        )
+
+        layout = Metablock.load(str(DEMO_FILES / "demo.layout.template"))
+        self._assert_same(layout.signed)
+
+    def test_fallback(self):
+        # Values not handled by the fast encoder
+        link = Link()
+        link.command = ("a", "b")
+        self._assert_same(link)
+
+        link.environment = {"set": frozenset()}
+        self._assert_same(link)
+
+        # Errors are raised by securesystemslib
+        for environment, error in [
+            ({"float": 1.0}, FormatError),
+            ({1: "non-str key"}, AttributeError),
+            ({1: 1, "a": 1}, FormatError),
+        ]:
+            link.environment = environment
+            with self.assertRaises(error):
+                encode_canonical(link)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -25,6 +25,8 @@ import json
 import unittest
 
 from in_toto.models.common import Signable
+from in_toto.models.layout import Layout, Step
+from in_toto.models.link import Link
 
 
 class TestSignable(unittest.TestCase):
@@ -34,6 +36,37 @@ class TestSignable(unittest.TestCase):
         """Test load string returned by `Signable.repr` as JSON"""
         json.loads(repr(Signable()))
 
+    def test_signable_bytes_cache(self):
+        """Test cached signable bytes are updated on any change."""
+
+        def _assert_fresh(signable):
+            cached = signable.signable_bytes
+            del signable._signable_bytes_cache
+            self.assertEqual(cached, signable.signable_bytes)
+
+        link = Link(name="foo", byproducts={"return-value": 1})
+        link_bytes = link.signable_bytes
+        self.assertIs(link.signable_bytes, link_bytes)
+
+        link.name = "bar"
+        _assert_fresh(link)
+        link.materials["foo"] = {"sha256": "a" * 64}
+        _assert_fresh(link)
+        link.materials["foo"]["sha256"] = "b" * 64
+        _assert_fresh(link)
+        # Equal, but differently encoded value
+        link.byproducts["return-value"] = True
+        _assert_fresh(link)
+        self.assertNotEqual(link.signable_bytes, link_bytes)
+
+        layout = Layout(steps=[Step(name="foo")])
+        layout_bytes = layout.signable_bytes
+        self.assertIs(layout.signable_bytes, layout_bytes)
+
+        layout.steps[0].expected_command.append("bar")
+        _assert_fresh(layout)
+        self.assertNotEqual(layout.signable_bytes, layout_bytes)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+
+# Copyright New York University and the in-toto contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Test in_toto.models._json backends."""
+
+# pylint: disable=protected-access
+
+import json
+import os
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from in_toto.models import _json
+from in_toto.models.link import Link
+from in_toto.models.metadata import Envelope, Metablock, Metadata
+from tests.common import SignerStore, TmpDirMixin
+
+DEMO_FILES = Path(__file__).parent.parent / "demo_files"
+
+
+class TestJson(unittest.TestCase):
+    """Test that all backends load and dump the same."""
+
+    objects = [
+        {},
+        [],
+        {"b": [1, -2, {"x": 'a\x00\x1f"\\/\b\f\n\r\t'}], "a": {}, "c": []},
+        {"d": None, "e": True, "f": False, "g": [[]], "h": {"k": {"l": [{}]}}},
+        {"non-ascii": "\x7fä\U0001f600"},
+        {"float": [1.0, 1e16, -0.5e-7]},
+        {"big": [2**64, 2**70, -(2**63) - 1, 2**63 - 1, -(2**63)]},
+        {"not: 12345678901234567890": "big int in string"},
+        {"not: [1.5]": "float in string"},
+        json.loads((DEMO_FILES / "demo.layout.template").read_text()),
+    ]
+
+    def test_dumps(self):
+        for backend in _json.JSON_BACKENDS:
+            with patch("in_toto.settings.JSON_BACKEND", backend):
+                for obj in self.objects:
+                    self.assertEqual(
+                        _json.dumps(obj),
+                        json.dumps(obj, sort_keys=True).encode(),
+                    )
+                    self.assertEqual(
+                        _json.dumps(obj, indent=1),
+                        json.dumps(obj, sort_keys=True, indent=1).encode(),
+                    )
+                    self.assertEqual(
+                        _json.dumps(obj, compact=True),
+                        json.dumps(
+                            obj, sort_keys=True, separators=(",", ":")
+                        ).encode(),
+                    )
+
+    def test_loads(self):
+        for backend in _json.JSON_BACKENDS:
+            with patch("in_toto.settings.JSON_BACKEND", backend):
+                for obj in self.objects:
+                    for data in [
+                        json.dumps(obj, indent=1).encode(),
+                        json.dumps(obj, separators=(",", ":")).encode(),
+                    ]:
+                        # Compare repr, because e.g. 2**64 == float(2**64)
+                        self.assertEqual(
+                            repr(_json.loads(data)), repr(json.loads(data))
+                        )
+
+                self.assertEqual(_json.loads(b"%d" % 2**70), 2**70)
+
+                with self.assertRaises(json.JSONDecodeError):
+                    _json.loads(b"{")
+
+                with self.assertRaises(UnicodeDecodeError):
+                    _json.loads(b'"\xff"')
+
+    def test_bad_args(self):
+        with self.assertRaises(ValueError):
+            _json.dumps({}, indent=2)
+
+        with patch("in_toto.settings.JSON_BACKEND", "foo"):
+            with self.assertRaises(ValueError):
+                _json.dumps({})
+
+        with patch("in_toto.settings.JSON_BACKEND", "orjson"), patch(
+            "in_toto.models._json.orjson", None
+        ):
+            with self.assertRaises(ValueError):
+                _json.dumps({})
+
+    def test_default_backend(self):
+        with patch("in_toto.settings.JSON_BACKEND", None):
+            self.assertEqual(_json._get_backend(), "orjson")
+
+            with patch("in_toto.models._json.orjson", None):
+                self.assertEqual(_json._get_backend(), "json")
+
+
+class TestMetadataJson(unittest.TestCase, TmpDirMixin):
+    """Test that all backends dump the same metadata bytes."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.set_up_test_dir()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tear_down_test_dir()
+
+    def test_dump(self):
+        link = Link(
+            name="foo",
+            materials={"ä": {"sha256": "a" * 64}},
+            products={f"p{i}": {"sha256": "b" * 64} for i in range(100)},
+        )
+        metadata = [
+            Metablock(signed=link),
+            Metablock(signed=link, compact_json=True),
+            Envelope.from_signable(link),
+            Metadata.load(str(DEMO_FILES / "demo.layout.template")),
+        ]
+
+        for idx, metadatum in enumerate(metadata):
+            dumped = []
+            for backend in _json.JSON_BACKENDS:
+                with patch("in_toto.settings.JSON_BACKEND", backend):
+                    path = f"{idx}.{backend}"
+                    metadatum.dump(path)
+                    dumped.append(Path(path).read_bytes())
+
+                    loaded = Metadata.load(path)
+                    self.assertEqual(loaded.to_dict(), metadatum.to_dict())
+                    os.remove(path)
+
+            self.assertEqual(dumped[0], dumped[1])
+
+    def test_big_int(self):
+        link = Link(name="foo", byproducts={"return-value": 2**70})
+        metadata = [Metablock(signed=link), Envelope.from_signable(link)]
+        for idx, metadatum in enumerate(metadata):
+            metadatum.create_signature(SignerStore.ecdsa)
+            for backend in _json.JSON_BACKENDS:
+                with patch("in_toto.settings.JSON_BACKEND", backend):
+                    path = f"big.{idx}.{backend}"
+                    metadatum.dump(path)
+
+                    loaded = Metadata.load(path)
+                    loaded.verify_signature(SignerStore.ecdsa_pub)
+                    self.assertEqual(
+                        loaded.get_payload().byproducts["return-value"], 2**70
+                    )
+                    os.remove(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+# Copyright New York University and the in-toto contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Test in_toto.models._keys verification key cache."""
+
+# pylint does not detect the signature of the lru_cache wrapper's cache_info
+# pylint: disable=no-value-for-parameter
+
+import copy
+import unittest
+from unittest.mock import patch
+
+from securesystemslib.signer import Key, SSlibKey
+
+from in_toto.models._keys import _load_key, get_cached_key, get_key
+from in_toto.models.link import Link
+from in_toto.models.metadata import Envelope, Metablock
+from tests.common import SignerStore
+
+
+class TestKeyCache(unittest.TestCase):
+    """Test parsed keys are cached by their verification values."""
+
+    def test_get_key(self):
+        rsa_pub = copy.deepcopy(SignerStore.rsa_pub)
+        key = get_key(rsa_pub)
+
+        # Key dict is preserved, and equal key dicts share cached key
+        self.assertDictEqual(rsa_pub, SignerStore.rsa_pub)
+        self.assertIsInstance(key, SSlibKey)
+        self.assertIs(get_key(copy.deepcopy(rsa_pub)), key)
+
+        # Different public key with same keyid does not share cached key
+        rsa_pub["keyval"]["public"] = SignerStore.ecdsa_pub["keyval"]["public"]
+        self.assertIsNot(get_key(rsa_pub), key)
+
+    def test_not_cached(self):
+        # No str public key value, e.g. GPG keys
+        self.assertIsNone(get_cached_key({"keyid": "a", "keyval": {}}))
+        self.assertIsNone(
+            get_cached_key(
+                {
+                    "keyid": "a",
+                    "keytype": "rsa",
+                    "scheme": "rsassa-pss-sha256",
+                    "keyval": {"public": {}},
+                }
+            )
+        )
+        # Invalid scheme
+        self.assertIsNone(
+            get_cached_key(
+                {
+                    "keyid": "a",
+                    "keytype": "rsa",
+                    "scheme": "foo",
+                    "keyval": {"public": "bar"},
+                }
+            )
+        )
+
+    def test_parse_once(self):
+        """Verify multiple signatures, parsing key dict only once."""
+        link = Link(name="foo")
+        metablock = Metablock(signed=link)
+        metablock.create_signature(SignerStore.ecdsa)
+        envelope = Envelope.from_signable(link)
+        envelope.create_signature(SignerStore.ecdsa)
+
+        # Change public key value to create new cache entry
+        key_dict = copy.deepcopy(SignerStore.ecdsa_pub)
+        key_dict["keyval"]["public"] += "\n"
+        cache_info = _load_key.cache_info()
+        with patch.object(Key, "from_dict", wraps=Key.from_dict) as from_dict:
+            for _ in range(3):
+                metablock.verify_signature(key_dict)
+                envelope.verify_signature(key_dict)
+
+        # Parsed once on cache miss, and reused for all other verifications
+        self.assertEqual(from_dict.call_count, 1)
+        self.assertEqual(_load_key.cache_info().misses - cache_info.misses, 1)
+        self.assertGreaterEqual(
+            _load_key.cache_info().hits - cache_info.hits, 5
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
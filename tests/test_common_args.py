@@ -22,8 +22,11 @@
 
 import argparse
 import unittest
+from unittest.mock import patch
 
 from in_toto.common_args import (
+    HASH_WORKERS_ARGS,
+    HASH_WORKERS_KWARGS,
     KEY_PASSWORD_ARGS,
     KEY_PASSWORD_KWARGS,
     OPTS_TITLE,
@@ -54,6 +57,18 @@ class TestCommonArgs(unittest.TestCase):
             result = parse_password_and_prompt_args(parser.parse_args(params))
             self.assertTupleEqual(result, expected, "(row {})".format(idx))
 
+    def test_positive_int(self):
+        """Test positive integer args, e.g. --hash-workers."""
+        parser = argparse.ArgumentParser()
+        parser.add_argument(*HASH_WORKERS_ARGS, **HASH_WORKERS_KWARGS)
+        self.assertEqual(
+            parser.parse_args(["--hash-workers", "2"]).hash_workers, 2
+        )
+
+        for value in ["0", "-1", "two", "1.5"]:
+            with self.assertRaises(SystemExit, msg=value), patch("sys.stderr"):
+                parser.parse_args(["--hash-workers", value])
+
 
 class TestArgparseActionGroupHelpers(unittest.TestCase):
     """Test functions to hack cli output."""
@@ -7,10 +7,12 @@
 # SPDX-License-Identifier: Apache-2.0
 
 
+import hashlib
 import os
 import tempfile
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
 from in_toto.exceptions import PrefixError
 from in_toto.resolver import DirectoryResolver
@@ -40,6 +42,25 @@ class TestDirectoryResolver(unittest.TestCase):
         artifact_dict = resolver.hash_artifacts([uri])
         self.assertEqual(artifact_dict, expected_artifact_dict)
 
+    def test_regular_directory_multiple_algorithms(self):
+        path = str(Path(__file__).parent / "resolver" / "dir_resolver")
+
+        resolver = DirectoryResolver(hash_algorithms=["sha256", "sha512"])
+        uri = f"dir:{path}"
+
+        # Expected hashes calculated using:
+        # find . -type f | cut -c3- | LC_ALL=C sort | xargs -r sha256sum | sha256sum | cut -f1 -d' '
+        # find . -type f | cut -c3- | LC_ALL=C sort | xargs -r sha512sum | sha512sum | cut -f1 -d' '
+        expected_artifact_dict = {
+            self._mangle_path(uri): {
+                "sha256": "ecdbcdc6bd5d2966ad1f7595874fcd6f505abd3feaa97e27bae74bcb78c38e54",
+                "sha512": "fd2f9e88b3153ab7dbe490fe753d0301270a5feb2d7223aa1e748c704969bbac666ba055bbdca7727a5e8ecd17b6d472d608e4ee8b2304983a6c101c86d5da22",
+            }
+        }
+
+        artifact_dict = resolver.hash_artifacts([uri])
+        self.assertEqual(artifact_dict, expected_artifact_dict)
+
     def test_regular_directory_with_lstrip(self):
         lstrip_path = (
             f"{self._mangle_path(str(Path(__file__).parent))}/resolver/"
@@ -155,6 +176,35 @@ class TestDirectoryResolver(unittest.TestCase):
             artifact_dict = resolver.hash_artifacts([uri])
             self.assertEqual(artifact_dict, expected_artifact_dict)
 
+    def test_c_locale_byte_order(self):
+        """Test sorting like 'LC_ALL=C sort' and hashing lines in batches."""
+        names = ["B", "a", "a b", "Z", "\u00e4", "\u00e9", "\U0001f600", "_"]
+        with tempfile.TemporaryDirectory(dir=os.getcwd()) as tmp_dir:
+            for name in names:
+                Path(tmp_dir, name).write_text(name, encoding="utf-8")
+
+            # Sort by UTF-8 bytes, like 'LC_ALL=C sort'
+            manifest = "".join(
+                f"{hashlib.sha256(name.encode('utf-8')).hexdigest()}  {name}\n"
+                for name in sorted(names, key=lambda name: name.encode("utf-8"))
+            ).encode("utf-8")
+            expected = hashlib.sha256(manifest).hexdigest()
+
+            for batch_size in [1, 3, 4096]:
+                with patch(
+                    "in_toto.resolver._resolver._DIGEST_BATCH_SIZE", batch_size
+                ), patch("locale.setlocale") as setlocale:
+                    artifact_dict = DirectoryResolver().hash_artifacts(
+                        [f"dir:{tmp_dir}"]
+                    )
+                    setlocale.assert_not_called()
+
+                self.assertEqual(
+                    artifact_dict[self._mangle_path(f"dir:{tmp_dir}")],
+                    {"sha256": expected},
+                    f"batch_size={batch_size}",
+                )
+
 
 if __name__ == "__main__":
     unittest.main()
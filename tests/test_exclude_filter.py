@@ -0,0 +1,85 @@
+"""Test cases for compiled exclude pattern matcher."""
+
+from itertools import product
+from unittest import TestCase, main
+
+from pathspec import GitIgnoreSpec
+
+from in_toto.resolver._exclude import ExcludeFilter
+
+PATTERNS = [
+    "*.link*",
+    ".git",
+    "*.pyc",
+    "*~",
+    "build*",
+    "build/",
+    "/top",
+    "a/b",
+    "**/x",
+    "foo/**",
+    "#comment",
+    "sp\\ ace",
+    "a?c",
+    "[ab]c",
+    "x*y",
+    "*",
+]
+
+COMPONENTS = ["a", "b", "x", ".git", "f.pyc", "f~", "build", "c.link2", "xyz"]
+
+
+class TestExcludeFilter(TestCase):
+    """Test that ExcludeFilter matches like GitIgnoreSpec."""
+
+    def _assert_match_like_spec(self, patterns):
+        """Assert same results as GitIgnoreSpec for paths of two components."""
+        spec = GitIgnoreSpec.from_lines("gitwildmatch", patterns)
+        exclude_filter = ExcludeFilter(patterns)
+
+        for parts in product(COMPONENTS, repeat=2):
+            parent, name = parts
+            for path in [name, "/".join(parts), "./" + "/".join(parts)]:
+                self.assertEqual(
+                    exclude_filter.match(path),
+                    spec.match_file(path),
+                    f"patterns={patterns}, path={path}",
+                )
+
+            # Only match child name, if parent directory is not excluded
+            if not spec.match_file(parent):
+                path = "/".join(parts)
+                self.assertEqual(
+                    exclude_filter.match_child(path, name),
+                    spec.match_file(path),
+                    f"patterns={patterns}, path={path}",
+                )
+
+    def test_match(self):
+        """Test single and pairs of patterns."""
+        for pattern in PATTERNS:
+            self._assert_match_like_spec([pattern])
+
+        for patterns in product(PATTERNS, repeat=2):
+            self._assert_match_like_spec(list(patterns))
+
+    def test_match_negated(self):
+        """Test fallback for negated patterns."""
+        self._assert_match_like_spec(["*.pyc", "!a.pyc"])
+        self._assert_match_like_spec(["!.git", "a"])
+
+    def test_match_special_paths(self):
+        """Test fallback for paths not matched like path components."""
+        for patterns in [[".git"], ["*.pyc"], ["a/b"]]:
+            exclude_filter = ExcludeFilter(patterns)
+            spec = GitIgnoreSpec.from_lines("gitwildmatch", patterns)
+            for path in ["//.git", "a\n/.git", "/a.pyc", "a/b\n"]:
+                self.assertEqual(
+                    exclude_filter.match(path),
+                    spec.match_file(path),
+                    f"patterns={patterns}, path={path}",
+                )
+
+
+if __name__ == "__main__":
+    main()
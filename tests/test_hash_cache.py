@@ -0,0 +1,221 @@
+"""Test cases for artifact hash caches."""
+
+import os
+from pathlib import Path
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from in_toto.resolver import (
+    DirectoryResolver,
+    FileResolver,
+    MemoryHashCache,
+    SQLiteHashCache,
+)
+from in_toto.runlib import record_artifacts_as_dict
+from tests.common import TmpDirMixin
+
+# Treat freshly written test files as cacheable
+_NO_RACY_INTERVAL = patch("in_toto.resolver._hash_cache._RACY_INTERVAL_NS", 0)
+
+
+class TestSQLiteHashCache(TmpDirMixin, TestCase):
+    """Test SQLite hash cache."""
+
+    def setUp(self):
+        self.set_up_test_dir()
+        Path("foo").write_text("foo", encoding="utf8")
+        Path("bar").write_text("bar", encoding="utf8")
+
+    def tearDown(self):
+        self.tear_down_test_dir()
+
+    def test_get_put(self):
+        """Test cache hits and misses across instances."""
+        stat_result = os.stat("foo")
+        hashes = {"sha256": "abcd"}
+
+        with _NO_RACY_INTERVAL:
+            cache = SQLiteHashCache("cache")
+            self.assertIsNone(cache.get(stat_result, ["sha256"], False))
+            cache.put(stat_result, ["sha256"], False, hashes)
+            self.assertEqual(cache.get(stat_result, ["sha256"], False), hashes)
+            cache.close()
+
+        cache = SQLiteHashCache("cache")
+        self.assertEqual(cache.get(stat_result, ["sha256"], False), hashes)
+
+        # Entries are separate per algorithms and normalization flag
+        self.assertIsNone(cache.get(stat_result, ["sha256"], True))
+        self.assertIsNone(cache.get(stat_result, ["sha512"], False))
+
+        # Changed files are not found
+        Path("foo").write_text("changed", encoding="utf8")
+        self.assertIsNone(cache.get(os.stat("foo"), ["sha256"], False))
+        cache.close()
+
+    def test_racy_entries(self):
+        """Test that recently changed files are not cached."""
+        stat_result = os.stat("foo")
+        cache = SQLiteHashCache("cache")
+        cache.put(stat_result, ["sha256"], False, {"sha256": "abcd"})
+        self.assertIsNone(cache.get(stat_result, ["sha256"], False))
+        cache.close()
+
+    def test_eviction(self):
+        """Test that least recently used entries are evicted on close."""
+        foo_stat, bar_stat = os.stat("foo"), os.stat("bar")
+        with _NO_RACY_INTERVAL:
+            cache = SQLiteHashCache("cache", max_entries=1)
+            cache.put(foo_stat, ["sha256"], False, {"sha256": "abcd"})
+            cache.close()
+
+            cache = SQLiteHashCache("cache", max_entries=1)
+            cache.put(bar_stat, ["sha256"], False, {"sha256": "ef01"})
+            cache.close()
+
+        cache = SQLiteHashCache("cache", max_entries=1)
+        self.assertIsNone(cache.get(foo_stat, ["sha256"], False))
+        self.assertIsNotNone(cache.get(bar_stat, ["sha256"], False))
+        cache.close()
+
+    def test_concurrent_caches(self):
+        """Test caches in same directory can be used at the same time."""
+        foo_stat, bar_stat = os.stat("foo"), os.stat("bar")
+        with _NO_RACY_INTERVAL:
+            cache1 = SQLiteHashCache("cache")
+            cache2 = SQLiteHashCache("cache")
+            cache1.put(foo_stat, ["sha256"], False, {"sha256": "abcd"})
+            cache2.put(bar_stat, ["sha256"], False, {"sha256": "ef01"})
+            cache1.put_tree("tree", {"foo": {"sha256": "abcd"}})
+
+            # Entries are visible to other caches once added
+            self.assertIsNotNone(cache1.get(bar_stat, ["sha256"], False))
+            self.assertIsNotNone(cache2.get(foo_stat, ["sha256"], False))
+            self.assertIsNotNone(cache2.get_tree("tree"))
+            cache1.close()
+            cache2.close()
+
+        cache = SQLiteHashCache("cache")
+        self.assertIsNotNone(cache.get(foo_stat, ["sha256"], False))
+        self.assertIsNotNone(cache.get(bar_stat, ["sha256"], False))
+        cache.close()
+
+    def test_bad_args(self):
+        """Test invalid cache config."""
+        for args in [(None,), ("cache", 0), ("cache", "1")]:
+            with self.assertRaises(ValueError, msg=f"args={args}"):
+                SQLiteHashCache(*args)
+
+        with self.assertRaises(ValueError):
+            FileResolver(hash_cache="cache")
+
+    def test_record_with_cache(self):
+        """Test that cached files are not read again."""
+        # Store cache in excluded subdirectory, to not record the cache itself
+        os.mkdir("cache")
+        os.chdir("cache")
+        kwargs = {"base_path": "..", "exclude_patterns": ["cache"]}
+        expected = record_artifacts_as_dict(["."], **kwargs)
+        kwargs["hash_cache_dir"] = "."
+
+        with _NO_RACY_INTERVAL:
+            self.assertEqual(
+                record_artifacts_as_dict(["."], **kwargs), expected
+            )
+
+        with patch("in_toto.resolver._resolver._hash_file") as hash_file:
+            self.assertEqual(
+                record_artifacts_as_dict(["."], **kwargs), expected
+            )
+            hash_file.assert_not_called()
+
+            # Only the changed file is read again
+            Path("../foo").write_text("changed", encoding="utf8")
+            hash_file.return_value = {"sha256": "abcd"}
+            result = record_artifacts_as_dict(["."], **kwargs)
+            hash_file.assert_called_once()
+            self.assertEqual(result["foo"], {"sha256": "abcd"})
+            self.assertEqual(result["bar"], expected["bar"])
+
+
+class TestDirectoryTreeCache(TmpDirMixin, TestCase):
+    """Test incremental directory hashing with tree cache entries."""
+
+    def setUp(self):
+        self.set_up_test_dir()
+        for name in ["a", "b"]:
+            os.makedirs(os.path.join("tree", name))
+            Path("tree", name, "foo").write_text(name, encoding="utf8")
+            Path("tree", name, "bar").write_text(name, encoding="utf8")
+        Path("tree", "foo").write_text("foo", encoding="utf8")
+
+    def tearDown(self):
+        self.tear_down_test_dir()
+
+    def _assert_incremental(self, cache):
+        """Assert equal hashes and that only changed groups are read."""
+        resolver = DirectoryResolver(
+            hash_cache=cache, hash_algorithms=["sha256", "sha512"]
+        )
+        uncached = DirectoryResolver(hash_algorithms=["sha256", "sha512"])
+        expected = uncached.hash_artifacts(["dir:tree"])
+
+        with _NO_RACY_INTERVAL:
+            self.assertEqual(resolver.hash_artifacts(["dir:tree"]), expected)
+
+        # Unchanged directory is not walked for file cache lookups
+        with patch.object(cache, "get", wraps=cache.get) as get:
+            self.assertEqual(resolver.hash_artifacts(["dir:tree"]), expected)
+            get.assert_not_called()
+
+        # Only files in the group of the changed file are looked up again
+        Path("tree", "a", "foo").write_text("changed", encoding="utf8")
+        expected = uncached.hash_artifacts(["dir:tree"])
+        with patch.object(cache, "get", wraps=cache.get) as get:
+            self.assertEqual(resolver.hash_artifacts(["dir:tree"]), expected)
+            self.assertEqual(get.call_count, 2)
+
+    def test_memory_cache(self):
+        """Test incremental hashing with memory cache."""
+        self._assert_incremental(MemoryHashCache())
+
+    def test_sqlite_cache(self):
+        """Test incremental hashing with SQLite cache across instances."""
+        cache = SQLiteHashCache("cache")
+        self._assert_incremental(cache)
+        cache.close()
+
+        cache = SQLiteHashCache("cache")
+        resolver = DirectoryResolver(hash_cache=cache)
+        expected = DirectoryResolver().hash_artifacts(["dir:tree"])
+        with _NO_RACY_INTERVAL:
+            resolver.hash_artifacts(["dir:tree"])
+        cache.close()
+
+        cache = SQLiteHashCache("cache")
+        resolver = DirectoryResolver(hash_cache=cache)
+        with patch("in_toto.resolver._resolver._hash_file") as hash_file:
+            self.assertEqual(resolver.hash_artifacts(["dir:tree"]), expected)
+            hash_file.assert_not_called()
+        cache.close()
+
+    def test_racy_trees(self):
+        """Test that trees with recently changed files are not cached."""
+        cache = MemoryHashCache()
+        resolver = DirectoryResolver(hash_cache=cache)
+        with patch.object(cache, "put_tree") as put_tree:
+            resolver.hash_artifacts(["dir:tree"])
+            put_tree.assert_not_called()
+
+    def test_empty_dir(self):
+        """Test incremental hashing of empty directory."""
+        os.mkdir(os.path.join("tree", "empty"))
+        resolver = DirectoryResolver(hash_cache=MemoryHashCache())
+        self.assertEqual(
+            resolver.hash_artifacts(["dir:tree/empty"]),
+            DirectoryResolver().hash_artifacts(["dir:tree/empty"]),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Test cases for artifact file hashing helpers."""
+
+import threading
+from pathlib import Path
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from securesystemslib.exceptions import StorageError
+from securesystemslib.hash import digest_filename
+
+from in_toto.resolver._hashing import digest_file, normalize_line_endings
+from tests.common import TmpDirMixin
+
+
+class TestDigestFile(TmpDirMixin, TestCase):
+    """Test reading and hashing files."""
+
+    def setUp(self):
+        self.set_up_test_dir()
+
+    def tearDown(self):
+        self.tear_down_test_dir()
+
+    def test_digest_file(self):
+        """Test digest equality with securesystemslib for all read paths."""
+        # Use small chunks to read files in one call, and in one or more chunks
+        with patch("in_toto.resolver._hashing.CHUNK_SIZE", 4):
+            for content in [b"", b"foo", b"food", b"foodbar", b"foodbarbazz"]:
+                Path("foo").write_bytes(content)
+                algorithms = ["sha256", "sha512", "blake2b"]
+                digest_objs = digest_file("foo", algorithms)
+                for algorithm, digest_obj in zip(algorithms, digest_objs):
+                    self.assertEqual(
+                        digest_obj.hexdigest(),
+                        digest_filename("foo", algorithm).hexdigest(),
+                        f"content={content}, algorithm={algorithm}",
+                    )
+
+    def test_reuse_buffer(self):
+        """Test buffer for large files is allocated once per thread."""
+        Path("foo").write_bytes(b"foodbarbazz")
+        with patch("in_toto.resolver._hashing.CHUNK_SIZE", 4), patch(
+            "in_toto.resolver._hashing._local", threading.local()
+        ), patch(
+            "in_toto.resolver._hashing.bytearray", wraps=bytearray, create=True
+        ) as alloc:
+            for _ in range(3):
+                digest_file("foo", ["sha256"])
+            self.assertEqual(alloc.call_count, 1)
+
+            thread = threading.Thread(
+                target=digest_file, args=("foo", ["sha256"])
+            )
+            thread.start()
+            thread.join()
+            self.assertEqual(alloc.call_count, 2)
+
+    def test_digest_file_normalize(self):
+        """Test digest equality with securesystemslib line ending normalization."""
+        contents = [b"", b"\r", b"a\r\nb\rc\n", b"\r\r\n\n\r", b"ab\r\ncd\r"]
+        for chunk_size in [1, 2, 3, 4, 1024]:
+            with patch("in_toto.resolver._hashing.CHUNK_SIZE", chunk_size):
+                for content in contents:
+                    Path("foo").write_bytes(content)
+                    (digest_obj,) = digest_file("foo", ["sha256"], True)
+                    expected = digest_filename(
+                        "foo", "sha256", normalize_line_endings=True
+                    )
+                    self.assertEqual(
+                        digest_obj.hexdigest(),
+                        expected.hexdigest(),
+                        f"content={content}, chunk_size={chunk_size}",
+                    )
+
+    def test_digest_file_error(self):
+        """Test error for files that cannot be read."""
+        for path in ["missing", "."]:
+            with self.assertRaises(StorageError, msg=f"path={path}"):
+                digest_file(path, ["sha256"])
+
+
+class TestNormalizeLineEndings(TestCase):
+    """Test streaming line ending normalization."""
+
+    def test_normalize_line_endings(self):
+        """Test equality with normalizing whole contents for all chunkings."""
+        line_endings = [b"\r\n", b"\r", b"\n", b"\n\r", b"\r\r\n"]
+        contents = [b""] + [b"a" + ending + b"b" for ending in line_endings]
+        contents.append(b"".join(line_endings) * 2 + b"\r")
+
+        for content in contents:
+            expected = content.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+            for size in range(1, len(content) + 1):
+                chunks = [
+                    content[i : i + size] for i in range(0, len(content), size)
+                ]
+                self.assertEqual(
+                    b"".join(normalize_line_endings(chunks)),
+                    expected,
+                    f"content={content}, chunk size={size}",
+                )
+
+
+if __name__ == "__main__":
+    main()
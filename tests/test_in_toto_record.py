@@ -144,6 +144,23 @@ class TestInTotoRecordTool(
             0,
         )
 
+        # Start/stop with hashing multiple artifacts in parallel
+        args = ["--step-name", "test3.1", "--key", self.rsa_key_path]
+        self.assert_cli_sys_exit(
+            ["start"]
+            + args
+            + ["--materials", self.test_artifact1, self.test_artifact2]
+            + ["--hash-workers", "2"],
+            0,
+        )
+        self.assert_cli_sys_exit(
+            ["stop"]
+            + args
+            + ["--products", self.test_artifact1, self.test_artifact2]
+            + ["--hash-workers", "2"],
+            0,
+        )
+
         # Start/stop recording using ed25519 key
         args = [
             "--step-name",
@@ -142,6 +142,48 @@ class TestInTotoRunTool(CliTestCase, TmpDirMixin, GPGKeysMixin, GenKeysMixin):
             list(link_metadata.signed.products.keys()), [self.test_artifact]
         )
 
+        # Test with parallel hashing
+        args_workers = named_args + ["--hash-workers", "2"] + positional_args
+        self.assert_cli_sys_exit(args_workers, 0)
+        link_metadata = Metablock.load(self.test_link_rsa)
+        self.assertListEqual(
+            list(link_metadata.signed.products.keys()), [self.test_artifact]
+        )
+
+        # Test with multiple hash algorithms
+        args_algorithms = (
+            named_args
+            + ["--hash-algorithms", "sha256", "sha512"]
+            + positional_args
+        )
+        self.assert_cli_sys_exit(args_algorithms, 0)
+        link_metadata = Metablock.load(self.test_link_rsa)
+        for artifacts in [
+            link_metadata.signed.materials,
+            link_metadata.signed.products,
+        ]:
+            self.assertListEqual(
+                sorted(artifacts[self.test_artifact]), ["sha256", "sha512"]
+            )
+
+        # Test with digest-only byproducts
+        args_capture = (
+            named_args + ["--byproduct-capture", "digest"] + positional_args
+        )
+        self.assert_cli_sys_exit(args_capture, 0)
+        link_metadata = Metablock.load(self.test_link_rsa)
+        self.assertNotIn("stdout", link_metadata.signed.byproducts)
+        self.assertIn("stdout-sha256", link_metadata.signed.byproducts)
+
+        # Test with bad byproduct capture size
+        args_capture_size = (
+            named_args
+            + ["--byproduct-capture", "truncate"]
+            + ["--byproduct-capture-size", "0"]
+            + positional_args
+        )
+        self.assert_cli_sys_exit(args_capture_size, 2)
+
         # Test with bogus base path
         args4 = named_args + ["--base-path", "bogus/path"] + positional_args
         self.assert_cli_sys_exit(args4, 1)
@@ -152,6 +152,18 @@ class TestInTotoVerifyTool(CliTestCase, TmpDirMixin):
         args = ["-l", "not-a-path-to-a-layout", "-k", self.alice_path]
         self.assert_cli_sys_exit(args, 1)
 
+    def test_main_inspection_workers(self):
+        """Test in-toto-verify CLI tool with inspection workers."""
+        args = [
+            "--layout",
+            self.layout_single_signed_path,
+            "--layout-keys",
+            self.alice_path,
+            "--inspection-workers",
+        ]
+        self.assert_cli_sys_exit(args + ["2"], 0)
+        self.assert_cli_sys_exit(args + ["0"], 2)
+
     def test_main_link_dir(self):
         """Test in-toto-verify CLI tool with explicit link dir."""
 
@@ -23,10 +23,21 @@
 """
 
 import os
+import shutil
+import tempfile
 import unittest
 from pathlib import Path
+from unittest.mock import patch
+
+from securesystemslib.hash import digest_filename
 
 from in_toto.resolver import OSTreeResolver
+from in_toto.resolver._resolver import _digest_commit
+from in_toto.runlib import record_artifacts_as_dict
+
+# pylint: disable=protected-access
+
+_COMMIT = "cf3e103a6aed64aec261e2161d1026aa26349d422d238b1ad9e2e2a7eeed8591"
 
 
 class TestOSTreeResolver(unittest.TestCase):
@@ -92,5 +103,86 @@ class TestOSTreeResolver(unittest.TestCase):
             resolver.hash_artifacts(["ostree:some-ref"])
 
 
+class TestOSTreeResolverRefIndex(unittest.TestCase):
+    """Test OSTree resolver with ref index."""
+
+    def setUp(self):
+        self.repo = os.path.join(tempfile.mkdtemp(), "ostree_repo")
+        shutil.copytree(
+            Path(__file__).parent / "resolver" / "ostree_repo", self.repo
+        )
+        for ref in ["remotes/origin/test-branch", "mirrors/org.example/a/b"]:
+            ref_path = os.path.join(self.repo, "refs", *ref.split("/"))
+            os.makedirs(os.path.dirname(ref_path))
+            Path(ref_path).write_text(f"{_COMMIT}\n", encoding="utf-8")
+
+        _digest_commit.cache_clear()
+
+    def tearDown(self):
+        shutil.rmtree(os.path.dirname(self.repo))
+
+    def test_hash_refs(self):
+        """Verify hashes of local, remote and collection refs in one batch."""
+        resolver = OSTreeResolver(base_path=self.repo, index_refs=True)
+        uris = [
+            "ostree:test-branch",
+            "ostree:origin:test-branch",
+            "ostree:org.example:a/b",
+        ]
+        with patch.object(
+            resolver, "_build_ref_index", wraps=resolver._build_ref_index
+        ) as build_ref_index, patch(
+            "in_toto.resolver._resolver.digest_filename", wraps=digest_filename
+        ) as digest_commit:
+            artifact_dict = resolver.hash_artifacts(uris)
+            artifact_dict.update(resolver.hash_artifacts(uris))
+
+        self.assertEqual(
+            artifact_dict, {uri: {"sha256": _COMMIT} for uri in uris}
+        )
+
+        # Ref index is built once per call, and the commit is hashed only once
+        self.assertEqual(build_ref_index.call_count, 2)
+        digest_commit.assert_called_once()
+
+    def test_hash_local_refs(self):
+        """Verify that local refs are resolved without ref index."""
+        resolver = OSTreeResolver(base_path=self.repo, index_refs=True)
+        with patch.object(resolver, "_build_ref_index") as build_ref_index:
+            self.assertEqual(
+                resolver.hash_artifacts(["ostree:test-branch"]),
+                {"ostree:test-branch": {"sha256": _COMMIT}},
+            )
+
+        build_ref_index.assert_not_called()
+
+    def test_ref_precedence(self):
+        """Verify that local refs take precedence over others."""
+        ref_path = os.path.join(self.repo, "refs", "remotes", "test-branch")
+        Path(ref_path).write_text("invalid", encoding="utf-8")
+
+        resolver = OSTreeResolver(base_path=self.repo, index_refs=True)
+        self.assertEqual(
+            resolver.hash_artifacts(["ostree:test-branch"]),
+            {"ostree:test-branch": {"sha256": _COMMIT}},
+        )
+
+    def test_non_existent_ref(self):
+        """Verify expected exception for non existent ref."""
+        resolver = OSTreeResolver(base_path=self.repo, index_refs=True)
+        for uri in ["ostree:invalid", "ostree:origin", "ostree:origin:invalid"]:
+            with self.assertRaises(FileNotFoundError, msg=f"uri={uri}"):
+                resolver.hash_artifacts([uri])
+
+    def test_record_refs(self):
+        """Verify recording remote ref."""
+        self.assertEqual(
+            record_artifacts_as_dict(
+                ["ostree:origin:test-branch"], base_path=self.repo
+            ),
+            {"ostree:origin:test-branch": {"sha256": _COMMIT}},
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
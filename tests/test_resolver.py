@@ -1,8 +1,11 @@
 """Test cases for resolver.py."""
 
+import os
 from pathlib import Path
 from unittest import TestCase, main
+from unittest.mock import patch
 
+from in_toto.exceptions import PrefixError
 from in_toto.resolver import RESOLVER_FOR_URI_SCHEME, FileResolver, Resolver
 from tests.common import TmpDirMixin
 
@@ -83,6 +86,77 @@ class TestFileResolver(TmpDirMixin, TestCase):
             result = resolver.hash_artifacts(uris)
             self.assertEqual(result.keys(), expected_keys)
 
+    def test_hash_artifacts_workers(self):
+        """Assert parallel hashing returns the same as serial hashing."""
+        uris = ["foo", "bar"]
+        expected = FileResolver().hash_artifacts(uris)
+
+        for executor in ["thread", "process"]:
+            resolver = FileResolver(hash_workers=2, hash_executor=executor)
+            result = resolver.hash_artifacts(uris)
+            self.assertEqual(result, expected, f"executor={executor}")
+            self.assertListEqual(list(result), list(expected))
+
+        # Duplicates from left-stripping are detected as in serial mode
+        resolver = FileResolver(lstrip_paths=["bar/"], hash_workers=2)
+        with self.assertRaises(PrefixError):
+            resolver.hash_artifacts(["foo", "bar/foo"])
+
+    def test_hash_artifacts_stat_calls(self):
+        """Assert that walked files are not stat'ed again."""
+        with patch("os.stat", wraps=os.stat) as stat:
+            result = FileResolver().hash_artifacts(["bar"])
+
+        self.assertEqual(sorted(result), ["bar/baz", "bar/foo"])
+        stat.assert_called_once_with("bar")
+
+        # Except on Windows, where walked files lack device and inode numbers
+        with patch("os.stat", wraps=os.stat) as stat, patch(
+            "in_toto.resolver._resolver.os.name", "nt"
+        ):
+            FileResolver().hash_artifacts(["bar"])
+
+        self.assertEqual(stat.call_count, 3)
+
+    def test_hash_artifacts_algorithms(self):
+        """Assert hashes for multiple algorithms equal single algorithm hashes."""
+        uris = ["foo", "bar"]
+        expected = {}
+        for algorithm in ["sha256", "sha512"]:
+            for name, hashes in (
+                FileResolver(hash_algorithms=[algorithm])
+                .hash_artifacts(uris)
+                .items()
+            ):
+                expected.setdefault(name, {}).update(hashes)
+
+        for kwargs in [
+            {},
+            {"hash_workers": 2},
+            {"normalize_line_endings": True},
+        ]:
+            resolver = FileResolver(
+                hash_algorithms=["sha512", "sha256", "sha512"], **kwargs
+            )
+            result = resolver.hash_artifacts(uris)
+            self.assertEqual(result, expected, f"kwargs={kwargs}")
+
+    def test_bad_hash_workers_config(self):
+        """Assert invalid hash worker config raises ValueError."""
+        for kwargs in [
+            {"hash_workers": 0},
+            {"hash_workers": "2"},
+            {"hash_workers": True},
+            {"hash_executor": "fork"},
+            {"hash_algorithms": []},
+            {"hash_algorithms": "sha256"},
+            {"hash_algorithms": ["sha256", 1]},
+            {"hash_algorithms": ["md6"]},
+            {"hash_algorithms": ["shake_128"]},
+        ]:
+            with self.assertRaises(ValueError, msg=f"kwargs={kwargs}"):
+                FileResolver(**kwargs)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+# Copyright New York University and the in-toto contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Test in_toto._rule_engine artifact rule pattern evaluation."""
+
+import fnmatch
+import unittest
+
+from in_toto._rule_engine import (
+    ArtifactQueue,
+    compile_pattern,
+    filter_artifacts,
+)
+
+PATHS = [
+    "foo",
+    "foo.py",
+    "foo/bar.py",
+    "foo/bar/baz.py",
+    "foo/bar.pyc",
+    "foobar",
+    "bar/foo.py",
+    "a*b",
+    "[ab]",
+    "",
+    "ä/\U0001f600.py",
+    "\U0010ffff",
+    "\U0010ffff/foo",
+]
+
+PATTERNS = [
+    "*",
+    "**",
+    "",
+    "foo",
+    "foo/",
+    "fo",
+    "foo*",
+    "foo/*",
+    "foo/**",
+    "*.py",
+    "**.py",
+    "*py",
+    "foo/*.py",
+    "foo*foo",
+    "*/*",
+    "*bar*",
+    "foo?py",
+    "[ab]*",
+    "[[]ab]",
+    "a[*]b",
+    "[!f]*",
+    "ä/*",
+    "*.pyc",
+    "nomatch*",
+    "*nomatch",
+    "\U0010ffff*",
+]
+
+
+class TestPattern(unittest.TestCase):
+    """Test compiled patterns match the same paths as fnmatch."""
+
+    def test_matches_like_fnmatch(self):
+        for pattern in PATTERNS:
+            expected = fnmatch.filter(PATHS, pattern)
+            self.assertListEqual(
+                compile_pattern(pattern).filter(PATHS), expected, pattern
+            )
+            self.assertListEqual(
+                filter_artifacts(PATHS, pattern), expected, pattern
+            )
+
+    def test_fast_paths(self):
+        self.assertEqual(compile_pattern("foo").literal, "foo")
+        self.assertEqual(compile_pattern("foo/**.py").prefix, "foo/")
+        self.assertEqual(compile_pattern("foo/**.py").suffix, ".py")
+        self.assertIsNone(compile_pattern("foo/*/*.py").prefix)
+        self.assertIs(compile_pattern("foo"), compile_pattern("foo"))
+
+
+class TestArtifactQueue(unittest.TestCase):
+    """Test indexed artifact queue."""
+
+    def test_filter_like_fnmatch(self):
+        queue = ArtifactQueue(PATHS)
+        for pattern in PATTERNS:
+            self.assertListEqual(
+                queue.filter(pattern),
+                sorted(fnmatch.filter(PATHS, pattern)),
+                pattern,
+            )
+
+    def test_filter_prefix(self):
+        """Test filter with prefix matches pattern on remaining path."""
+        queue = ArtifactQueue(PATHS)
+        for prefix in ["", "foo", "foo/", "foo/bar/", "\U0010ffff", "nomatch/"]:
+            for pattern in PATTERNS:
+                expected = [
+                    prefix + path
+                    for path in fnmatch.filter(
+                        [
+                            path[len(prefix) :]
+                            for path in PATHS
+                            if path.startswith(prefix)
+                        ],
+                        pattern,
+                    )
+                ]
+                self.assertListEqual(
+                    filter_artifacts(PATHS, pattern, prefix), expected
+                )
+                self.assertListEqual(
+                    filter_artifacts(queue, pattern, prefix), sorted(expected)
+                )
+
+    def test_filter_consumed(self):
+        """Test filter results reflect consumed and added paths."""
+        queue = ArtifactQueue(PATHS)
+        expected = set(PATHS)
+        for pattern in ["foo/*", "*.py", "fo?", "foo*", "[[]ab]"]:
+            # Create or re-use index, before consuming paths
+            for lookup_pattern in PATTERNS:
+                self.assertListEqual(
+                    filter_artifacts(queue, lookup_pattern),
+                    sorted(fnmatch.filter(expected, lookup_pattern)),
+                )
+
+            consumed = set(filter_artifacts(queue, pattern))
+            self.assertTrue(consumed)
+            queue -= consumed
+            expected -= consumed
+            self.assertIsInstance(queue, ArtifactQueue)
+            self.assertSetEqual(queue, expected)
+
+        queue.add("foo/new.py")
+        queue |= {"new.py"}
+        self.assertListEqual(queue.filter("*.py"), ["foo/new.py", "new.py"])
+        self.assertListEqual(queue.filter("foo/*"), ["foo/new.py"])
+
+    def test_repr(self):
+        self.assertEqual(repr(ArtifactQueue(["foo"])), "{'foo'}")
+        self.assertEqual(repr(ArtifactQueue()), "set()")
+
+
+if __name__ == "__main__":
+    unittest.main()
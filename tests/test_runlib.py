@@ -23,14 +23,19 @@
 """
 # pylint: disable=protected-access
 
+import asyncio
+import hashlib
 import os
 import shutil
 import stat
 import subprocess
 import sys
 import tempfile
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from unittest.mock import patch
 
 import securesystemslib.exceptions
 import securesystemslib.formats
@@ -53,13 +58,18 @@ from in_toto.models.link import (
     Link,
 )
 from in_toto.models.metadata import Envelope, Metablock
-from in_toto.resolver import FileResolver
+from in_toto.resolver import RESOLVER_FOR_URI_SCHEME, FileResolver
+from in_toto.resolver._resolver import _hash_file
 from in_toto.runlib import (
     _subprocess_run_duplicate_streams,
+    execute_link_async,
     in_toto_match_products,
     in_toto_record_start,
+    in_toto_record_start_async,
     in_toto_record_stop,
+    in_toto_record_stop_async,
     in_toto_run,
+    in_toto_run_async,
     record_artifacts_as_dict,
 )
 from tests.common import TmpDirMixin
@@ -189,6 +199,21 @@ class TestRecordArtifactsAsDict(unittest.TestCase, TmpDirMixin):
             with self.assertRaises((OSError, ValueError)):
                 record_artifacts_as_dict(["."], base_path=base_path)
 
+    def test_hash_workers_and_executor(self):
+        """Test hashing in worker pools, and invalid pool arguments."""
+        expected = record_artifacts_as_dict(["."])
+        for hash_executor in ["thread", "process"]:
+            self.assertDictEqual(
+                record_artifacts_as_dict(
+                    ["."], hash_workers=2, hash_executor=hash_executor
+                ),
+                expected,
+            )
+
+        for kwargs in [{"hash_workers": 0}, {"hash_executor": "fork"}]:
+            with self.assertRaises(ValueError, msg=f"kwargs={kwargs}"):
+                record_artifacts_as_dict(["."], **kwargs)
+
     def test_base_path_is_child_dir(self):
         """Test path of recorded artifacts and cd back with child as base."""
         base_path = "subdir"
@@ -230,6 +255,30 @@ class TestRecordArtifactsAsDict(unittest.TestCase, TmpDirMixin):
 
         os.chdir(self.test_dir)
 
+    def test_base_path_concurrent(self):
+        """Test recording with different base paths in concurrent threads."""
+        base_paths = [None, "subdir", "subdir/subsubdir"] * 4
+        expected = [
+            record_artifacts_as_dict(["."], base_path=base_path)
+            for base_path in base_paths
+        ]
+
+        # Neither the working directory nor global resolvers are changed
+        with patch("os.chdir", side_effect=AssertionError), ThreadPoolExecutor(
+            max_workers=len(base_paths)
+        ) as executor:
+            results = list(
+                executor.map(
+                    lambda base_path: record_artifacts_as_dict(
+                        ["."], base_path=base_path
+                    ),
+                    base_paths,
+                )
+            )
+
+        self.assertListEqual(results, expected)
+        self.assertFalse(RESOLVER_FOR_URI_SCHEME)
+
     def test_lstrip_paths_valid_prefix_directory(self):
         lstrip_paths = ["subdir/subsubdir/"]
         expected_artifacts = sorted(
@@ -647,6 +696,181 @@ class TestLinkCmdExecTimeout(unittest.TestCase):
             )
 
 
+class TestByproductCapture(unittest.TestCase, TmpDirMixin):
+    """Test capture policies for recorded standard streams."""
+
+    def setUp(self):
+        self.set_up_test_dir()
+        # Command that prints 1000 bytes to stdout and nothing to stderr
+        self.cmd = [
+            sys.executable,
+            "-c",
+            "import sys; sys.stdout.write('a' * 500 + 'b' * 500)",
+        ]
+        self.stdout = "a" * 500 + "b" * 500
+        self.stdout_sha256 = hashlib.sha256(self.stdout.encode()).hexdigest()
+        self.empty_sha256 = hashlib.sha256(b"").hexdigest()
+
+    def tearDown(self):
+        self.tear_down_test_dir()
+
+    def test_full(self):
+        """Test default policy stores complete streams."""
+        with patch("sys.stdout"):
+            byproducts = in_toto.runlib.execute_link(self.cmd, True, 10)
+        self.assertDictEqual(
+            byproducts,
+            {"stdout": self.stdout, "stderr": "", "return-value": 0},
+        )
+
+    def test_truncate(self):
+        """Test head and tail of streams, with length and digest."""
+        for size, expected in [
+            (10, "a" * 10 + "\n[... 980 bytes truncated ...]\n" + "b" * 10),
+            (500, self.stdout),
+            (1000, self.stdout),
+        ]:
+            with patch("sys.stdout"):
+                byproducts = in_toto.runlib.execute_link(
+                    self.cmd,
+                    True,
+                    10,
+                    capture_policy="truncate",
+                    capture_size=size,
+                )
+            self.assertDictEqual(
+                byproducts,
+                {
+                    "stdout": expected,
+                    "stdout-length": 1000,
+                    "stdout-sha256": self.stdout_sha256,
+                    "stderr": "",
+                    "stderr-length": 0,
+                    "stderr-sha256": self.empty_sha256,
+                    "return-value": 0,
+                },
+                f"size={size}",
+            )
+
+    def test_digest(self):
+        """Test only length and digest of streams."""
+        with patch("sys.stdout"):
+            byproducts = in_toto.runlib.execute_link(
+                self.cmd, True, 10, capture_policy="digest"
+            )
+        self.assertDictEqual(
+            byproducts,
+            {
+                "stdout-length": 1000,
+                "stdout-sha256": self.stdout_sha256,
+                "stderr-length": 0,
+                "stderr-sha256": self.empty_sha256,
+                "return-value": 0,
+            },
+        )
+
+    def test_spill(self):
+        """Test streams in sidecar files referenced by digest."""
+        os.mkdir("metadata")
+        with patch("sys.stdout"):
+            byproducts = in_toto.runlib.execute_link(
+                self.cmd,
+                True,
+                10,
+                capture_policy="spill",
+                capture_directory="metadata",
+            )
+        self.assertEqual(byproducts["stdout-sha256"], self.stdout_sha256)
+        self.assertEqual(
+            byproducts["stdout-file"], f"{self.stdout_sha256}.byproduct"
+        )
+        self.assertEqual(
+            Path("metadata", byproducts["stdout-file"]).read_text(
+                encoding="utf-8"
+            ),
+            self.stdout,
+        )
+        self.assertEqual(
+            sorted(os.listdir("metadata")),
+            sorted(
+                [
+                    f"{self.stdout_sha256}.byproduct",
+                    f"{self.empty_sha256}.byproduct",
+                ]
+            ),
+        )
+
+        # Unfinished sidecar files are removed
+        with self.assertRaises(subprocess.TimeoutExpired):
+            in_toto.runlib.execute_link(
+                self.cmd,
+                True,
+                -1,
+                capture_policy="spill",
+                capture_directory="metadata",
+            )
+        self.assertEqual(len(os.listdir("metadata")), 2)
+
+    def test_in_toto_run(self):
+        """Test capture policy and sidecar directory in in_toto_run."""
+        os.mkdir("metadata")
+        with patch("sys.stdout"):
+            link = in_toto_run(
+                "step",
+                [],
+                [],
+                self.cmd,
+                record_streams=True,
+                metadata_directory="metadata",
+                byproduct_capture="spill",
+            )
+        self.assertTrue(
+            os.path.exists(
+                os.path.join("metadata", link.signed.byproducts["stdout-file"])
+            )
+        )
+
+    def test_in_toto_run_products(self):
+        """Test sidecar files are not recorded as products."""
+        Path("foo").write_text("foo", encoding="utf-8")
+        kwargs = {"record_streams": True, "byproduct_capture": "spill"}
+        for run in [
+            lambda: in_toto_run("step", [], ["."], self.cmd, **kwargs),
+            lambda: in_toto_run(
+                "step", [], ["."], self.cmd, metadata_directory=".", **kwargs
+            ),
+            lambda: asyncio.run(
+                in_toto_run_async("step", [], ["."], self.cmd, **kwargs)
+            ),
+        ]:
+            with patch("sys.stdout"):
+                link = run()
+
+            self.assertListEqual(list(link.signed.products), ["foo"])
+            self.assertListEqual(
+                sorted(os.listdir(".")),
+                sorted(
+                    [
+                        "foo",
+                        f"{self.stdout_sha256}.byproduct",
+                        f"{self.empty_sha256}.byproduct",
+                    ]
+                ),
+            )
+            os.remove(link.signed.byproducts["stdout-file"])
+            os.remove(link.signed.byproducts["stderr-file"])
+
+    def test_bad_args(self):
+        """Test invalid capture policy and size."""
+        for kwargs in [
+            {"capture_policy": "head"},
+            {"capture_size": 0},
+            {"capture_size": "1"},
+        ]:
+            with self.assertRaises(ValueError, msg=f"kwargs={kwargs}"):
+                in_toto.runlib.execute_link(self.cmd, True, 10, **kwargs)
+
+
 class TestSubprocess(unittest.TestCase):
     """Test subprocess standard stream duplication."""
 
@@ -712,6 +936,251 @@ class TestSubprocess(unittest.TestCase):
         with self.assertRaises(subprocess.TimeoutExpired):
             _subprocess_run_duplicate_streams(cmd, timeout=-1)
 
+    def test_run_duplicate_streams_large_output(self):
+        """Test large interleaved output and newline translation."""
+        cmd = [
+            sys.executable,
+            "-c",
+            "import sys\n"
+            "for i in range(20000):\n"
+            "    sys.stdout.write('foo\\r\\n')\n"
+            "    sys.stderr.write('bar\\r')\n",
+        ]
+        for os_name in ["posix", "nt"]:
+            with patch("in_toto.runlib.os.name", os_name), patch(
+                "sys.stdout"
+            ), patch("sys.stderr"):
+                ret_code, ret_out, ret_err = _subprocess_run_duplicate_streams(
+                    cmd, 10
+                )
+
+            self.assertEqual(ret_code, 0)
+            self.assertEqual(ret_out, "foo\n" * 20000, f"os_name={os_name}")
+            self.assertEqual(ret_err, "bar\n" * 20000, f"os_name={os_name}")
+
+    def test_run_duplicate_streams_timeout_threads(self):
+        """Test timeout with thread per stream."""
+        cmd = [sys.executable, "-c", "import time; time.sleep(10)"]
+        with patch("in_toto.runlib.os.name", "nt"):
+            with self.assertRaises(subprocess.TimeoutExpired):
+                _subprocess_run_duplicate_streams(cmd, timeout=0.1)
+
+    def test_run_duplicate_streams_no_busy_wait(self):
+        """Test that waiting for output does not consume CPU time."""
+        cmd = [sys.executable, "-c", "import time; time.sleep(1)"]
+        start = time.process_time()
+        _subprocess_run_duplicate_streams(cmd, 10)
+        self.assertLess(time.process_time() - start, 0.5)
+
+    def test_run_duplicate_streams_background_child(self):
+        """Test return on exit, if a background child keeps streams open."""
+        cmd = [
+            sys.executable,
+            "-c",
+            "import subprocess, sys; "
+            "subprocess.Popen([sys.executable, '-c', "
+            "'import time; time.sleep(5)']); "
+            "print('foo')",
+        ]
+        open_pidfd = in_toto.runlib._open_pidfd
+        for os_name, pidfd_opener in [
+            ("posix", open_pidfd),
+            ("posix", lambda pid: None),
+            ("nt", open_pidfd),
+        ]:
+            with patch("in_toto.runlib.os.name", os_name), patch(
+                "in_toto.runlib._open_pidfd", pidfd_opener
+            ), patch("sys.stdout"), patch("sys.stderr"):
+                start = time.monotonic()
+                ret_code, ret_out, _ = _subprocess_run_duplicate_streams(cmd, 3)
+
+            self.assertLess(time.monotonic() - start, 3, os_name)
+            self.assertEqual(ret_code, 0)
+            self.assertEqual(ret_out, "foo\n")
+
+    def test_run_duplicate_streams_output_before_exit(self):
+        """Test output still in pipes after exit is read completely."""
+        # Output exceeds the pipe buffer, and is duplicated slowly, so that
+        # reading it takes longer than _DRAIN_TIMEOUT after exit
+        cmd = [
+            sys.executable,
+            "-c",
+            "import sys; sys.stdout.write('x' * 128 * 1024)",
+        ]
+        for os_name in ["posix", "nt"]:
+            with patch("in_toto.runlib.os.name", os_name), patch(
+                "sys.stdout"
+            ) as stdout, patch("sys.stderr"):
+                stdout.write.side_effect = lambda text: time.sleep(0.02)
+                ret_code, ret_out, _ = _subprocess_run_duplicate_streams(
+                    cmd, 10
+                )
+
+            self.assertEqual(ret_code, 0)
+            self.assertEqual(ret_out, "x" * 128 * 1024, f"os_name={os_name}")
+
+    @unittest.skipIf(os.name == "nt", "no pseudo-terminal on Windows")
+    def test_run_duplicate_streams_pty(self):
+        """Test standard output from pseudo-terminal."""
+        cmd = [
+            sys.executable,
+            "-c",
+            "import sys; print(sys.stdout.isatty()); "
+            "print(sys.stderr.isatty(), file=sys.stderr)",
+        ]
+        with patch("sys.stdout"), patch("sys.stderr"):
+            ret_code, ret_out, ret_err = _subprocess_run_duplicate_streams(
+                cmd, 10, use_pty=True
+            )
+
+        self.assertEqual(ret_code, 0)
+        self.assertEqual(ret_out, "True\n")
+        self.assertEqual(ret_err, "False\n")
+
+
+class TestAsync(unittest.TestCase, TmpDirMixin):
+    """Test async counterparts of execute_link, in_toto_run and
+    in_toto_record_start/stop."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.set_up_test_dir()
+        cls.key_path = "test_key"
+        generate_and_write_unencrypted_rsa_keypair(cls.key_path)
+        cls.key = import_rsa_privatekey_from_file(cls.key_path)
+        cls.key_pub = import_rsa_publickey_from_file(cls.key_path + ".pub")
+
+        cls.test_artifact = "test_artifact"
+        Path(cls.test_artifact).write_text("foo", encoding="utf-8")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tear_down_test_dir()
+
+    def test_execute_link_async(self):
+        """Compare async with sync execution of link command."""
+        cmd = [
+            sys.executable,
+            "-c",
+            "import sys; print('out'); print('err', file=sys.stderr); "
+            "sys.exit(3)",
+        ]
+        with patch("sys.stdout"), patch("sys.stderr"):
+            byproducts = asyncio.run(execute_link_async(cmd, True, 10))
+
+        self.assertEqual(
+            byproducts,
+            {"stdout": "out\n", "stderr": "err\n", "return-value": 3},
+        )
+
+        byproducts = asyncio.run(execute_link_async(cmd, False, 10))
+        self.assertEqual(
+            byproducts, {"stdout": "", "stderr": "", "return-value": 3}
+        )
+
+    def test_execute_link_async_timeout(self):
+        """Kill link command on timeout."""
+        cmd = [sys.executable, "-c", "import time; time.sleep(10)"]
+        with self.assertRaises(subprocess.TimeoutExpired):
+            asyncio.run(execute_link_async(cmd, True, 0.1))
+
+    def test_execute_link_async_background_child(self):
+        """Return on exit, if a background child keeps streams open."""
+        cmd = [
+            sys.executable,
+            "-c",
+            "import subprocess, sys; "
+            "subprocess.Popen([sys.executable, '-c', "
+            "'import time; time.sleep(5)']); "
+            "print('foo')",
+        ]
+        with patch("sys.stdout"), patch("sys.stderr"):
+            start = time.monotonic()
+            byproducts = asyncio.run(execute_link_async(cmd, True, 3))
+
+        self.assertLess(time.monotonic() - start, 3)
+        self.assertEqual(
+            byproducts, {"stdout": "foo\n", "stderr": "", "return-value": 0}
+        )
+
+    def test_execute_link_async_output_after_exit(self):
+        """Read output after exit, while it is written."""
+        # Background child writes output in bursts for longer than
+        # _DRAIN_TIMEOUT after the command exited
+        child = (
+            "import time\n"
+            "for _ in range(20):\n"
+            "    time.sleep(0.02)\n"
+            "    print('x', flush=True)\n"
+        )
+        cmd = [
+            sys.executable,
+            "-c",
+            "import subprocess, sys; "
+            f"subprocess.Popen([sys.executable, '-c', {child!r}])",
+        ]
+        with patch("sys.stdout"), patch("sys.stderr"):
+            byproducts = asyncio.run(execute_link_async(cmd, True, 10))
+
+        self.assertEqual(byproducts["stdout"], "x\n" * 20)
+
+    def test_in_toto_run_async(self):
+        """Run concurrent steps from one event loop with a bounded executor,
+        and compare with sync run."""
+        cmd = [sys.executable, "-c", "pass"]
+
+        async def run_all():
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                return await asyncio.gather(
+                    *[
+                        in_toto_run_async(
+                            f"step{i}",
+                            [self.test_artifact],
+                            [self.test_artifact],
+                            cmd,
+                            signing_key=self.key,
+                            executor=executor,
+                        )
+                        for i in range(5)
+                    ]
+                )
+
+        links = asyncio.run(run_all())
+        expected = in_toto_run("step", [self.test_artifact], None, cmd)
+
+        for i, link in enumerate(links):
+            link.verify_signature(self.key_pub)
+            self.assertEqual(link.signed.materials, expected.signed.materials)
+            self.assertEqual(link.signed.products, expected.signed.materials)
+            self.assertEqual(link.signed.byproducts, expected.signed.byproducts)
+            self.assertTrue(
+                os.path.exists(
+                    FILENAME_FORMAT.format(
+                        step_name=f"step{i}", keyid=self.key["keyid"]
+                    )
+                )
+            )
+
+    def test_in_toto_record_async(self):
+        """Record start and stop asynchronously."""
+        step_name = "record_step"
+
+        async def record():
+            await in_toto_record_start_async(
+                step_name, [self.test_artifact], signing_key=self.key
+            )
+            await in_toto_record_stop_async(
+                step_name, [self.test_artifact], signing_key=self.key
+            )
+
+        asyncio.run(record())
+        link = Metablock.load(
+            FILENAME_FORMAT.format(step_name=step_name, keyid=self.key["keyid"])
+        )
+        link.verify_signature(self.key_pub)
+        self.assertEqual(list(link.signed.materials), [self.test_artifact])
+        self.assertEqual(list(link.signed.products), [self.test_artifact])
+
 
 class TestInTotoRun(unittest.TestCase, TmpDirMixin):
     """ "
@@ -891,6 +1360,35 @@ class TestInTotoRun(unittest.TestCase, TmpDirMixin):
             [self.test_artifact],
         )
 
+    def test_in_toto_run_reuse_material_hashes(self):
+        """Successfully run, only hash products changed by command."""
+        os.mkdir("reuse")
+        for name in ["foo", "bar"]:
+            Path("reuse", name).write_text(name, encoding="utf8")
+
+        cmd = [
+            sys.executable,
+            "-c",
+            "open('reuse/foo', 'w').write('changed')",
+        ]
+        with patch("in_toto.resolver._hash_cache._RACY_INTERVAL_NS", 0), patch(
+            "in_toto.resolver._resolver._hash_file", wraps=_hash_file
+        ) as hash_file:
+            link = in_toto_run(self.step_name, ["reuse"], ["reuse"], cmd)
+
+        # Materials are hashed once, and only the changed file again
+        self.assertEqual(hash_file.call_count, 3)
+        self.assertEqual(hash_file.call_args[0][0], "reuse/foo")
+        self.assertEqual(
+            link.signed.materials["reuse/bar"],
+            link.signed.products["reuse/bar"],
+        )
+        self.assertNotEqual(
+            link.signed.materials["reuse/foo"],
+            link.signed.products["reuse/foo"],
+        )
+        shutil.rmtree("reuse")
+
     def test_in_toto_run_verify_workdir(self):
         """Successfully run, verify cwd."""
         link = in_toto_run(
@@ -1401,6 +1899,25 @@ class TestInTotoMatchProducts(TmpDirMixin, unittest.TestCase):
                 f"unexpected result for **kwargs: {kwargs})",
             )
 
+    def test_check_hash_algorithms(self):
+        """Match local artifacts with products recorded with other hash
+        algorithms than the default."""
+        link = Link(
+            products=record_artifacts_as_dict(
+                ["bar", "baz"], hash_algorithms=["sha256", "sha512"]
+            )
+        )
+        self.assertTupleEqual(
+            in_toto_match_products(link, paths=["bar", "baz"]),
+            (set(), set(), set()),
+        )
+
+        link.products["baz"]["sha512"] = "0" * 128
+        self.assertTupleEqual(
+            in_toto_match_products(link, paths=["bar", "baz"]),
+            (set(), set(), {"baz"}),
+        )
+
 
 class TestSigner(unittest.TestCase, TmpDirMixin):
     """Test signer argument in runlib API functions (run, record)."""
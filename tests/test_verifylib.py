@@ -28,6 +28,7 @@ import os
 import shlex
 import shutil
 import tempfile
+import time
 import unittest
 from datetime import datetime, timezone
 from unittest.mock import patch
@@ -54,10 +55,14 @@ from in_toto.models.layout import (
     Step,
 )
 from in_toto.models.link import FILENAME_FORMAT, Link
-from in_toto.models.metadata import Metablock
+from in_toto.models.metadata import Metablock, Metadata
 from in_toto.rulelib import unpack_rule
+from in_toto.runlib import record_artifacts_as_dict
 from in_toto.verifylib import (
+    _get_inspection_dependencies,
     _raise_on_bad_retval,
+    _record_inspection_artifacts,
+    _verify_link_signature,
     get_summary_link,
     in_toto_verify,
     load_links_for_layout,
@@ -191,6 +196,124 @@ class TestRunAllInspections(unittest.TestCase, TmpDirMixin):
         self.assertTrue(os.path.exists("touch-bar.link"))
 
 
+class TestRunAllInspectionsScheduling(unittest.TestCase, TmpDirMixin):
+    """Test order, concurrency and shared snapshots of run_all_inspections."""
+
+    def setUp(self):
+        self.set_up_test_dir()
+        with open("foo", "w", encoding="utf8") as f:
+            f.write("foo")
+
+        touch = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)), "scripts", "touch"
+        )
+        self.layout = Layout.read(
+            {
+                "_type": "layout",
+                "steps": [],
+                "inspect": [
+                    {"name": "touch-a", "run": ["python", touch, "a"]},
+                    {"name": "touch-b", "run": ["python", touch, "b"]},
+                    {
+                        "name": "check-a",
+                        "run": [
+                            "python",
+                            "-c",
+                            "import os, sys; sys.exit(not os.path.exists('a'))",
+                        ],
+                        "expected_materials": [
+                            [
+                                "MATCH",
+                                "a",
+                                "WITH",
+                                "PRODUCTS",
+                                "FROM",
+                                "touch-a",
+                            ]
+                        ],
+                    },
+                ],
+            }
+        )
+
+    def tearDown(self):
+        self.tear_down_test_dir()
+
+    def test_dependencies(self):
+        """Test inspections that MATCH each other run in layout order."""
+        self.layout.inspect[0].expected_products = [
+            ["MATCH", "*", "WITH", "MATERIALS", "FROM", "touch-b"],
+            ["MATCH", "*", "WITH", "MATERIALS", "FROM", "touch-a"],
+            ["MATCH", "*", "WITH", "MATERIALS", "FROM", "step"],
+            ["ALLOW", "*"],
+        ]
+        self.assertListEqual(
+            _get_inspection_dependencies(self.layout.inspect), [set(), {0}, {0}]
+        )
+
+    def test_serial_snapshot(self):
+        """Test materials are products of preceding inspection, and persisted
+        link files."""
+        # Don't exclude link files
+        with patch.object(
+            in_toto.settings, "ARTIFACT_EXCLUDE_PATTERNS", []
+        ), patch(
+            "in_toto.verifylib._record_inspection_artifacts",
+            wraps=_record_inspection_artifacts,
+        ) as record:
+            links = run_all_inspections(self.layout, True)
+            link_a_artifacts = record_artifacts_as_dict(["touch-a.link"])
+
+        # One snapshot, and products and link file per inspection
+        self.assertEqual(record.call_count, 7)
+        self.assertListEqual(list(links["touch-a"].materials), ["foo"])
+        self.assertListEqual(list(link_a_artifacts), ["touch-a.link"])
+        self.assertDictEqual(
+            links["touch-b"].materials,
+            {
+                **links["touch-a"].products,
+                **link_a_artifacts,
+            },
+        )
+        self.assertSetEqual(
+            set(links["check-a"].products),
+            {"foo", "a", "b", "touch-a.link", "touch-b.link"},
+        )
+
+    def test_concurrent(self):
+        """Test independent inspections share snapshot and run concurrently."""
+        with patch(
+            "in_toto.verifylib._record_inspection_artifacts",
+            wraps=_record_inspection_artifacts,
+        ) as record:
+            links = run_all_inspections(
+                self.layout, False, inspection_workers=3
+            )
+
+        # One snapshot, and materials of check-a, and products per inspection
+        self.assertEqual(record.call_count, 5)
+        self.assertIs(links["touch-a"].materials, links["touch-b"].materials)
+        self.assertListEqual(list(links["touch-a"].materials), ["foo"])
+        self.assertIn("a", links["check-a"].materials)
+        self.assertEqual(links["check-a"].byproducts["return-value"], 0)
+
+    def test_concurrent_fail(self):
+        """Test failing inspection stops scheduling of further inspections."""
+        self.layout.inspect[0].run = ["python", "-c", "import sys; sys.exit(1)"]
+        with self.assertRaises(BadReturnValueError):
+            run_all_inspections(self.layout, False, inspection_workers=2)
+
+        self.assertTrue(os.path.exists("b"))
+        self.assertFalse(os.path.exists("a"))
+
+    def test_bad_workers(self):
+        for workers in [0, -1, 1.5, True, "2"]:
+            with self.assertRaises(ValueError):
+                run_all_inspections(
+                    self.layout, False, inspection_workers=workers
+                )
+
+
 class TestVerifyCommandAlignment(unittest.TestCase):
     """Test verifylib.verify_command_alignment(command, expected_command)"""
 
@@ -342,6 +465,31 @@ class TestVerifyRule(unittest.TestCase):
             # Don't consume artifact that's not in materials or products
             # NOTE: In real life this shouldn't be in the queue either
             ["foo", {"foo"}, {}, {}, set()],
+            # Consume artifact modified for common hash algorithm
+            [
+                "foo",
+                {"foo"},
+                {"foo": {"sha256": sha_a}},
+                {"foo": {"sha256": sha_b, "sha512": "abcd"}},
+                {"foo"},
+            ],
+            # Consume artifact with different hash algorithms, even if the
+            # digests of the common algorithm are the same
+            [
+                "foo",
+                {"foo"},
+                {"foo": {"sha256": sha_a}},
+                {"foo": {"sha256": sha_a, "sha512": "abcd"}},
+                {"foo"},
+            ],
+            # Consume artifact without common hash algorithm
+            [
+                "foo",
+                {"foo"},
+                {"foo": {"sha256": sha_a}},
+                {"foo": {"sha512": "abcd"}},
+                {"foo"},
+            ],
             # Don't consume modified but not queued artifact
             [
                 "foo",
@@ -690,6 +838,29 @@ class TestVerifyMatchRule(unittest.TestCase):
                 self.materials,
                 {"sub/foo", "sub/foobar"},
             ],
+            [
+                # Don't consume foo with the same digest for a common hash
+                # algorithm as dest material foo, recorded with fewer hash
+                # algorithms, i.e. require the same hash algorithms
+                "MATCH foo WITH MATERIALS FROM dest-item",
+                {"foo"},
+                {"foo": {"sha256": self.sha256_foo, "sha512": "abcd"}},
+                set(),
+            ],
+            [
+                # Don't consume foo with different hash for common algorithm
+                "MATCH foo WITH MATERIALS FROM dest-item",
+                {"foo"},
+                {"foo": {"sha256": self.sha256_bar, "sha512": "abcd"}},
+                set(),
+            ],
+            [
+                # Don't consume foo without common hash algorithm
+                "MATCH foo WITH MATERIALS FROM dest-item",
+                {"foo"},
+                {"foo": {"sha512": "abcd"}},
+                set(),
+            ],
         ]
 
         for i, test_data in enumerate(test_cases):
@@ -770,6 +941,42 @@ class TestVerifyItemRules(unittest.TestCase):
         with self.assertRaises(RuleVerificationError):
             verify_item_rules(self.item_name, "materials", rules, self.links)
 
+    def test_fail_with_rule_trace(self):
+        """Fail with trace of applied rules in error message."""
+        rules = [
+            ["DELETE", "foobar"],
+            ["ALLOW", "foo*"],
+            ["REQUIRE", "bar"],
+            ["DISALLOW", "*"],
+        ]
+        with self.assertRaises(RuleVerificationError) as ctx:
+            verify_item_rules(self.item_name, "materials", rules, self.links)
+
+        self.assertEqual(
+            str(ctx.exception),
+            "'DISALLOW *' matched the following artifacts: ['bar']\n"
+            "Full trace for 'expected_materials' of item 'item':\n"
+            "Available materials (used for queue):\n"
+            "['foo', 'foobar', 'bar', 'foobarbaz']\n"
+            "Available products:\n"
+            "['baz', 'foo', 'bar', 'foobarbaz']\n"
+            "Queue after 'DELETE foobar':\n"
+            "['bar', 'foo', 'foobarbaz']\n"
+            "Queue after 'ALLOW foo*':\n"
+            "['bar']\n"
+            "Queue after 'REQUIRE bar':\n"
+            "['bar']\n",
+        )
+
+        # Rules that fail outside of an item are reported without trace
+        with self.assertRaises(RuleVerificationError) as ctx:
+            verify_disallow_rule("*", {"bar"})
+
+        self.assertEqual(
+            str(ctx.exception),
+            "'DISALLOW *' matched the following artifacts: ['bar']\n",
+        )
+
     def test_fail_wrong_source_type(self):
         """Fail with wrong source_type."""
         with self.assertRaises(securesystemslib.exceptions.FormatError):
@@ -872,6 +1079,65 @@ class TestVerifyAllItemRules(unittest.TestCase):
         verify_all_item_rules(self.inspections, self.links)
 
 
+class TestLoadLinksForLayout(unittest.TestCase, TmpDirMixin):
+    """Test verifylib.load_links_for_layout(layout, link_dir_path)."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create and change into temporary directory, and copy demo layout
+        and links to a link directory."""
+        demo_files = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)), "demo_files"
+        )
+        cls.set_up_test_dir()
+
+        os.mkdir("links")
+        for fn in ["write-code.776a00e2.link", "package.2f89b927.link"]:
+            shutil.copy(os.path.join(demo_files, fn), "links")
+
+        cls.layout_template = Metablock.load(
+            os.path.join(demo_files, "demo.layout.template")
+        ).signed
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tear_down_test_dir()
+
+    def test_load_existing_links(self):
+        """Load only links of authorized keys that exist in link dir."""
+        layout = copy.deepcopy(self.layout_template)
+        write_code_keyid = layout.steps[0].pubkeys[0]
+        package_keyid = layout.steps[1].pubkeys[0]
+
+        # Authorize more keys without links, and one with a directory, which
+        # cannot be loaded
+        for step in layout.steps:
+            step.pubkeys += ["a" * 64, "b" * 64]
+        os.mkdir(os.path.join("links", "package.aaaaaaaa.link"))
+
+        with patch(
+            "in_toto.verifylib.Metadata.load", wraps=Metadata.load
+        ) as load:
+            links = load_links_for_layout(layout, "links")
+
+        self.assertEqual(load.call_count, 3)
+        self.assertEqual(list(links["write-code"]), [write_code_keyid])
+        self.assertEqual(list(links["package"]), [package_keyid])
+        self.assertEqual(links["package"][package_keyid].signed.name, "package")
+
+        os.rmdir(os.path.join("links", "package.aaaaaaaa.link"))
+
+    def test_missing_links(self):
+        """Fail to load fewer links than threshold, or from missing dir."""
+        layout = copy.deepcopy(self.layout_template)
+        layout.steps[1].threshold = 2
+        layout.steps[1].pubkeys.append("a" * 64)
+
+        for link_dir in ["links", "missing"]:
+            with self.assertRaises(in_toto.exceptions.LinkNotFoundError):
+                load_links_for_layout(layout, link_dir)
+
+
 class TestInTotoVerify(unittest.TestCase, TmpDirMixin):
     """
     Tests verifylib.in_toto_verify(layout_path, layout_key_paths).
@@ -1020,6 +1286,38 @@ class TestInTotoVerify(unittest.TestCase, TmpDirMixin):
         layout_key_dict = {self.alice_pub["keyid"]: self.alice_pub}
         in_toto_verify(layout, layout_key_dict)
 
+    def test_verify_passing_in_workers(self):
+        """Test pass verification with signature verification and inspection
+        workers."""
+        layout = Metablock.load(self.layout_single_signed_path)
+        layout_key_dict = {self.alice_pub["keyid"]: self.alice_pub}
+        with patch(
+            "in_toto.verifylib.verify_link_signature_thresholds",
+            wraps=verify_link_signature_thresholds,
+        ) as verify_thresholds, patch(
+            "in_toto.verifylib.run_all_inspections", wraps=run_all_inspections
+        ) as run_inspections:
+            in_toto_verify(
+                layout,
+                layout_key_dict,
+                verification_workers=2,
+                inspection_workers=2,
+            )
+
+        self.assertEqual(
+            verify_thresholds.call_args.kwargs["verification_workers"], 2
+        )
+        self.assertEqual(
+            run_inspections.call_args.kwargs["inspection_workers"], 2
+        )
+
+        for kwargs in [
+            {"verification_workers": 0},
+            {"inspection_workers": 0},
+        ]:
+            with self.assertRaises(ValueError, msg=f"kwargs={kwargs}"):
+                in_toto_verify(layout, layout_key_dict, **kwargs)
+
     def test_verify_passing_double_signed_layout(self):
         """Test pass verification of double-signed layout."""
         layout = Metablock.load(self.layout_double_signed_path)
@@ -1248,6 +1546,77 @@ class TestInTotoVerifyThresholds(unittest.TestCase):
         with self.assertRaises(ThresholdVerificationError):
             verify_link_signature_thresholds(layout, chain_link_dict)
 
+    def test_thresholds_verify_in_workers(self):
+        """Verify signatures of multiple steps in thread and process pools."""
+        names = [f"{self.name}{i}" for i in range(4)]
+        layout = Layout(
+            keys={
+                self.bob_keyid: self.bob_pubkey,
+                self.alice_keyid: self.alice_pubkey,
+            },
+            steps=[
+                Step(name=name, pubkeys=[self.bob_keyid, self.alice_keyid])
+                for name in names
+            ],
+        )
+
+        # Alice's links are validly signed, Bob's link signatures are broken
+        chain_link_dict = {}
+        for name in names:
+            link_alice = Metablock(signed=Link(name=name))
+            link_alice.create_signature(self.alice)
+            link_bob = Metablock(signed=Link(name=name))
+            link_bob.create_signature(self.alice)
+            link_bob.signatures[0]["keyid"] = self.bob_keyid
+            chain_link_dict[name] = {
+                self.bob_keyid: link_bob,
+                self.alice_keyid: link_alice,
+            }
+
+        expected_chain_link_dict = {
+            name: {self.alice_keyid: links[self.alice_keyid]}
+            for name, links in chain_link_dict.items()
+        }
+
+        for executor in ["thread", "process"]:
+            returned_chain_link_dict = verify_link_signature_thresholds(
+                layout,
+                chain_link_dict,
+                verification_workers=2,
+                verification_executor=executor,
+            )
+            self.assertDictEqual(
+                returned_chain_link_dict, expected_chain_link_dict
+            )
+
+        # Fail threshold of first step, like serial verification, and don't
+        # verify links of the remaining steps, except those already running
+        layout.steps[0].threshold = 2
+
+        def _verify_slowly(*args):
+            time.sleep(0.05)
+            return _verify_link_signature(*args)
+
+        with patch(
+            "in_toto.verifylib._verify_link_signature",
+            side_effect=_verify_slowly,
+        ) as verify, self.assertRaises(ThresholdVerificationError):
+            verify_link_signature_thresholds(
+                layout, chain_link_dict, verification_workers=2
+            )
+
+        self.assertLessEqual(verify.call_count, 4)
+
+    def test_thresholds_bad_worker_args(self):
+        """Fail with invalid verification workers or executor."""
+        for kwargs in [
+            {"verification_workers": 0},
+            {"verification_workers": True},
+            {"verification_executor": "foo"},
+        ]:
+            with self.assertRaises(ValueError):
+                verify_link_signature_thresholds(Layout(), {}, **kwargs)
+
     def test_threshold_constraints_fail_with_not_enough_links(self):
         """Fail with not enough links."""
         # Layout with one step and threshold 2